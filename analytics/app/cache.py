@@ -0,0 +1,133 @@
+# analytics/app/cache.py
+"""In-process stale-while-revalidate cache with single-flight refreshes.
+
+Each entry remembers the data ``version`` it was computed for, and readers
+pass the version they observed:
+
+* fresh (same version, age < ttl): served from memory
+* stale (for up to the stale window after it expired or a reader first saw a
+  newer version): served from memory while one background task recomputes
+  it for the new version
+* missing/too old: callers wait, but identical concurrent callers share a
+  single computation
+
+Writes therefore never drop entries: an ingest flush bumps the version, the
+next reader still gets the previous body at once, and a burst of dashboard
+loads right after it shares one recomputation. ``get`` returns the version of
+the value it hands out, so a response's validator always matches its body.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+Compute = Callable[[], Awaitable[Any]]
+
+
+class _Entry:
+    __slots__ = ("value", "version", "stored_at", "ticket", "superseded_at")
+
+    def __init__(self, value: Any, version: Hashable, stored_at: float, ticket: int):
+        self.value = value
+        self.version = version
+        self.stored_at = stored_at
+        self.ticket = ticket
+        self.superseded_at: Optional[float] = None
+
+
+class SWRCache:
+    def __init__(self, ttl_s: float, stale_s: float, max_entries: int = 256):
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, _Entry] = {}
+        # key -> (version being computed, task); at most one computation per key
+        self._inflight: Dict[Hashable, Tuple[Hashable, asyncio.Task]] = {}
+        # refreshes are numbered as they start, so a slow one never overwrites a newer result
+        self._tickets = itertools.count(1)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refresh_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0
+
+    async def get(self, key: Hashable, version: Hashable, compute: Compute) -> Tuple[Any, Hashable]:
+        """Return ``(value, version it was computed for)``."""
+        if not self.enabled:
+            self.misses += 1
+            return await compute(), version
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            expires = entry.stored_at + self.ttl_s
+            if entry.version == version and now < expires:
+                self.hits += 1
+                return entry.value, entry.version
+            if entry.version != version and entry.superseded_at is None:
+                entry.superseded_at = now
+            if now < min(expires, entry.superseded_at or expires) + self.stale_s:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._refresh(key, version, compute)
+                return entry.value, entry.version
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] == version:
+            self.coalesced += 1
+            task = inflight[1]
+        else:
+            task = self._refresh(key, version, compute)
+        # shield: one cancelled caller must not cancel the shared computation
+        return await asyncio.shield(task), version
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttlSeconds": self.ttl_s,
+            "staleSeconds": self.stale_s,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshErrors": self.refresh_errors,
+            "hitRatio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+    def _refresh(self, key: Hashable, version: Hashable, compute: Compute) -> asyncio.Task:
+        task = asyncio.create_task(self._run(key, version, compute, next(self._tickets)))
+        # background refreshes may have no awaiter; retrieve their exception
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = (version, task)
+        return task
+
+    async def _run(self, key: Hashable, version: Hashable, compute: Compute, ticket: int) -> Any:
+        try:
+            value = await compute()
+        except Exception:
+            self.refresh_errors += 1
+            if key in self._entries:
+                log.exception("Background refresh failed for %r; keeping stale value", key)
+            raise
+        finally:
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[1] is asyncio.current_task():
+                self._inflight.pop(key)
+        current = self._entries.get(key)
+        if current is not None and current.ticket > ticket:
+            return value  # a later refresh already stored newer data: hand it to waiters only
+        if current is None and len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = _Entry(value, version, time.monotonic(), ticket)
+        return value
@@ -11,11 +11,77 @@ def _pick_mongo_uri() -> str:
         raise RuntimeError("Set MONGODB_URI or ANALYTICS_MONGODB_URI for analytics")
     return uri
 
+_DEFAULT_STOPWORDS = "the,a,an,of,and,for,to,in,on,at,with,by,from,is,are"
+
+def _csv_set(raw: str) -> frozenset:
+    return frozenset(w.strip().lower() for w in raw.split(",") if w.strip())
+
+def _optional_int(name: str) -> Optional[int]:
+    raw = os.getenv(name)
+    return int(raw) if raw else None
+
 class Settings:
-    mongodb_uri: str = _pick_mongo_uri()
-    service_name: str = os.getenv("ANALYTICS_SERVICE_NAME", "analytics")
-    # optional timeouts, etc.
-    request_timeout_s: float = float(os.getenv("ANALYTICS_TIMEOUT_SECONDS", "3.0"))
+    """Read from the environment when constructed (``get_settings()``), not at import.
+
+    Importing the app (e.g. in the uvicorn supervisor before it forks workers)
+    therefore needs no environment; the Mongo URI is only required once a
+    client is created.
+    """
+
+    def __init__(self) -> None:
+        self.service_name: str = os.getenv("ANALYTICS_SERVICE_NAME", "analytics")
+        # connection pool per worker process (see db_async.py): at most 100 connections (the
+        # driver's default) and at least 2 (the driver defaults to 0). Idle time and wait-queue
+        # timeout keep the driver defaults while unset.
+        self.mongodb_max_pool_size: int = int(os.getenv("ANALYTICS_MONGODB_MAX_POOL_SIZE", "100"))
+        # connections kept open, and opened in the lifespan before serving
+        self.mongodb_min_pool_size: int = int(os.getenv("ANALYTICS_MONGODB_MIN_POOL_SIZE", "2"))
+        self.mongodb_max_idle_time_ms: Optional[int] = _optional_int("ANALYTICS_MONGODB_MAX_IDLE_TIME_MS")
+        self.mongodb_wait_queue_timeout_ms: Optional[int] = _optional_int("ANALYTICS_MONGODB_WAIT_QUEUE_TIMEOUT_MS")
+        # wire compression in preference order, e.g. "zstd,snappy,zlib"; "" sends uncompressed
+        # (snappy and zstd need python-snappy / zstandard installed, otherwise the driver skips them)
+        self.mongodb_compressors: str = os.getenv("ANALYTICS_MONGODB_COMPRESSORS", "")
+        # optional timeouts, etc.
+        self.request_timeout_s: float = float(os.getenv("ANALYTICS_TIMEOUT_SECONDS", "3.0"))
+        # /summary response cache: fresh for ttl, then served stale while one refresh runs
+        self.cache_ttl_s: float = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "5.0"))  # 0 disables
+        self.cache_stale_s: float = float(os.getenv("ANALYTICS_CACHE_STALE_SECONDS", "30.0"))
+        # ingest write-behind buffer: flush on size or interval, 429 once max is pending
+        self.ingest_buffer_max: int = int(os.getenv("ANALYTICS_INGEST_BUFFER_MAX", "10000"))
+        self.ingest_flush_size: int = int(os.getenv("ANALYTICS_INGEST_FLUSH_SIZE", "500"))
+        self.ingest_flush_interval_s: float = float(os.getenv("ANALYTICS_INGEST_FLUSH_INTERVAL_SECONDS", "0.25"))
+        # failed flush attempts (other than network errors/timeouts) before an event is dropped
+        self.ingest_max_attempts: int = int(os.getenv("ANALYTICS_INGEST_MAX_ATTEMPTS", "5"))
+        self.ingest_batch_max: int = int(os.getenv("ANALYTICS_INGEST_BATCH_MAX", "1000"))
+        # /summary totalRecords: "exact" (rollup counter / count_documents) or "estimated" (collection metadata)
+        self.summary_count_mode: str = os.getenv("ANALYTICS_SUMMARY_COUNT_MODE", "exact")
+        # /summary topTerms: words skipped when ranking (comma-separated), in-memory index refresh
+        self.stopwords: frozenset = _csv_set(os.getenv("ANALYTICS_STOPWORDS", _DEFAULT_STOPWORDS))
+        self.terms_reload_s: float = float(os.getenv("ANALYTICS_TERMS_RELOAD_SECONDS", "60"))
+        # seconds nginx may micro-cache /summary (X-Accel-Expires); 0 disables
+        self.http_cache_seconds: int = int(os.getenv("ANALYTICS_HTTP_CACHE_SECONDS", "2"))
+        # read routing (see read_routing.py): default mode, per-endpoint overrides, staleness bound
+        self.read_preference: str = os.getenv("ANALYTICS_READ_PREFERENCE", "primary")
+        self.read_preference_summary: Optional[str] = os.getenv("ANALYTICS_READ_PREFERENCE_SUMMARY") or None
+        self.read_preference_events: Optional[str] = os.getenv("ANALYTICS_READ_PREFERENCE_EVENTS") or None
+        self.read_max_staleness_s: int = int(os.getenv("ANALYTICS_READ_MAX_STALENESS_SECONDS", "-1"))
+        # run every analytics read on secondaries (overrides the modes above)
+        self.secondary_reads: bool = os.getenv("ANALYTICS_SECONDARY_READS", "0").lower() in ("1", "true", "yes")
+        # retention (see retention.py): raw events expire after N days (0 keeps them forever);
+        # hourly per-kind counts are kept alongside, for longer
+        self.events_retention_days: float = float(os.getenv("ANALYTICS_EVENTS_RETENTION_DAYS", "30"))
+        self.events_hourly: bool = os.getenv("ANALYTICS_EVENTS_HOURLY", "1").lower() in ("1", "true", "yes")
+        self.events_hourly_retention_days: float = float(os.getenv("ANALYTICS_EVENTS_HOURLY_RETENTION_DAYS", "400"))
+        # `python -m app`: worker processes (WEB_CONCURRENCY is uvicorn's own convention), bind, drain time
+        self.workers: int = int(os.getenv("ANALYTICS_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1")
+        self.host: str = os.getenv("ANALYTICS_HOST", "0.0.0.0")
+        self.port: int = int(os.getenv("ANALYTICS_PORT", "8000"))
+        self.graceful_shutdown_s: int = int(os.getenv("ANALYTICS_GRACEFUL_SHUTDOWN_SECONDS", "20"))
+
+    @property
+    def mongodb_uri(self) -> str:
+        return _pick_mongo_uri()
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
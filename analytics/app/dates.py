@@ -0,0 +1,34 @@
+# analytics/app/dates.py
+"""Timestamp helpers: analytics stores ``created_at`` as a BSON datetime.
+
+Older events (and records written before the backend switched) may still
+hold ISO strings; ``python -m app.migrate_dates`` converts them in place.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+def as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    """UTC datetime from a datetime or ISO 8601 string (``Z`` allowed); None if unparsable."""
+    if isinstance(value, datetime):
+        return as_utc(value)
+    if isinstance(value, str) and value:
+        try:
+            return as_utc(datetime.fromisoformat(value.strip().replace("Z", "+00:00")))
+        except ValueError:
+            return None
+    return None
+
+
+def range_filter(field: str, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    """``field`` filter for an inclusive ``start`` / exclusive ``end`` range."""
+    bounds: Dict[str, Any] = {}
+    if start is not None:
+        bounds["$gte"] = as_utc(start)
+    if end is not None:
+        bounds["$lt"] = as_utc(end)
+    return {field: bounds} if bounds else {}
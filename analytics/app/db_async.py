@@ -1,11 +1,69 @@
-import os
+# analytics/app/db_async.py
+"""Mongo client construction.
+
+The API creates one client per worker process in its lifespan (after
+uvicorn forks), via ``create_client``. ``get_client`` / ``get_db`` give
+command-line tools (``app.rollups``, ``app.migrate_dates``) a lazily created
+process-wide client.
+
+Pool size, idle time, checkout timeout and wire compression come from
+``Settings``. ``warm_pool`` opens the first ``minPoolSize`` connections in
+the lifespan, before the worker serves traffic; checkout waits are exported by
+``MongoPoolListener`` (``mongodb_pool_checkout_wait_seconds``).
+"""
+import asyncio
 from functools import lru_cache
+from typing import Any, Dict
+
 from motor.motor_asyncio import AsyncIOMotorClient
-from .config import get_settings
+
+from .config import Settings, get_settings
+from .metrics import MongoCommandListener, MongoPoolListener
+
+
+def pool_options(settings: Settings) -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": min(settings.mongodb_min_pool_size, settings.mongodb_max_pool_size),
+    }
+    if settings.mongodb_max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.mongodb_max_idle_time_ms
+    if settings.mongodb_wait_queue_timeout_ms is not None:
+        options["waitQueueTimeoutMS"] = settings.mongodb_wait_queue_timeout_ms
+    compressors = [c.strip() for c in settings.mongodb_compressors.split(",") if c.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def create_client(settings: Settings, **kwargs: Any) -> AsyncIOMotorClient:
+    """New client for this process; the caller owns it and must ``close()`` it."""
+    return AsyncIOMotorClient(
+        settings.mongodb_uri,
+        event_listeners=[MongoCommandListener(), MongoPoolListener()],
+        **{**pool_options(settings), **kwargs},
+    )
+
+
+async def warm_pool(client, connections: int) -> int:
+    """Open up to ``connections`` pooled connections now; returns how many pings succeeded.
+
+    Concurrent pings each check out their own connection, so the pool grows to
+    ``connections`` (bounded by ``maxPoolSize``) before the first request.
+    """
+    results = await asyncio.gather(
+        *(client.admin.command("ping") for _ in range(max(connections, 1))), return_exceptions=True
+    )
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if len(failures) == len(results):
+        raise failures[0]
+    return len(results) - len(failures)
+
 
 @lru_cache(maxsize=1)
 def get_client() -> AsyncIOMotorClient:
-    return AsyncIOMotorClient(get_settings().mongodb_uri)
+    return create_client(get_settings())
+
 
 def get_db():
     return get_client().get_default_database()  # db from URI path
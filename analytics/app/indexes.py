@@ -0,0 +1,178 @@
+# analytics/app/indexes.py
+"""Declarative index registry and query-plan checks.
+
+``index_specs(...)`` lists every index the analytics queries rely
+on in collections analytics owns: event listing (keyset order plus the
+retention TTL) and unique keys for the rollup, term-count and hourly-bucket
+upserts. The source collection belongs to the backend, which declares and
+reconciles its indexes; they are only checked here, via ``hot_queries``. ``reconcile`` runs in the lifespan: missing
+indexes are created, an index whose keys no longer match its spec is dropped
+and rebuilt, a changed TTL is updated in place, and failures are reported instead of keeping the API down.
+
+``hot_queries(source)`` mirrors the finds behind ``/events`` and
+``/summary``; ``explain_queries`` runs ``explain`` on each and flags plans
+that scan the collection or sort in memory (``GET /admin/query-plans``).
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from .retention import HOURLY_COLLECTION
+from .rollups import DAILY_COLLECTION
+from .terms import TERMS_DAILY_COLLECTION, TERMS_TOTAL_COLLECTION
+
+log = logging.getLogger(__name__)
+
+EVENTS_COLLECTION = "analytics_events"
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, Any], ...]
+    name: str
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_text(self) -> bool:
+        return any(direction == "text" for _, direction in self.keys)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Tuple[Tuple[str, Any], ...] = ()
+    projection: Optional[Dict[str, Any]] = None
+    limit: int = 0
+    # set when sorting the matched set is inherent (e.g. $text); only a scan is a regression then
+    sort_after_match: bool = False
+
+
+def _ttl(seconds: Optional[int]) -> Dict[str, Any]:
+    return {} if seconds is None else {"expireAfterSeconds": seconds}
+
+
+def index_specs(events_ttl_s: Optional[int] = None, hourly_ttl_s: Optional[int] = None) -> List[IndexSpec]:
+    return [
+        # TTL indexes must be single-field, so retention lives here and the keyset order below
+        IndexSpec(EVENTS_COLLECTION, (("received_at", DESCENDING),), "received_at_desc", _ttl(events_ttl_s)),
+        IndexSpec(EVENTS_COLLECTION, (("received_at", DESCENDING), ("_id", DESCENDING)), "received_at_id_desc"),
+        IndexSpec(DAILY_COLLECTION, (("source", ASCENDING), ("day", ASCENDING)), "source_day", {"unique": True}),
+        IndexSpec(
+            TERMS_DAILY_COLLECTION,
+            (("source", ASCENDING), ("day", ASCENDING), ("term", ASCENDING)),
+            "source_day_term",
+            {"unique": True},
+        ),
+        IndexSpec(TERMS_TOTAL_COLLECTION, (("source", ASCENDING), ("term", ASCENDING)), "source_term", {"unique": True}),
+        IndexSpec(HOURLY_COLLECTION, (("hour", ASCENDING), ("kind", ASCENDING)), "hour_kind", {"unique": True}),
+        IndexSpec(HOURLY_COLLECTION, (("hour", ASCENDING),), "hour_ttl", _ttl(hourly_ttl_s)),
+    ]
+
+
+_SAMPLE_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def hot_queries(source: str) -> List[HotQuery]:
+    return [
+        HotQuery("list_events", EVENTS_COLLECTION, {}, (("received_at", DESCENDING), ("_id", DESCENDING)), None, 101),
+        HotQuery("summary_recent_titles", source, {}, (("created_at", DESCENDING),), {"title": 1}, 200),
+        HotQuery("summary_range", source, {"created_at": {"$gte": _SAMPLE_START}}),
+        HotQuery(
+            "events_range",
+            EVENTS_COLLECTION,
+            {"received_at": {"$gte": _SAMPLE_START}},
+            (("received_at", DESCENDING), ("_id", DESCENDING)),
+            None,
+            101,
+        ),
+        HotQuery("summary_daily_rollups", DAILY_COLLECTION, {"source": source}, (("day", DESCENDING),), None, 30),
+        HotQuery("term_index_daily", TERMS_DAILY_COLLECTION, {"source": source, "day": {"$gte": "0000-00-00"}}),
+        HotQuery("term_index_total", TERMS_TOTAL_COLLECTION, {"source": source}),
+    ]
+
+
+async def ensure_index(db, spec: IndexSpec) -> str:
+    """Create ``spec``; returns "created", "unchanged", "updated" (TTL changed in place) or "rebuilt"."""
+    coll = db[spec.collection]
+    existing = (await coll.index_information()).get(spec.name)
+    if existing is not None:
+        # text indexes are stored as _fts/_ftsx keys, so only their name is comparable
+        if spec.is_text or tuple(tuple(k) for k in existing["key"]) == spec.keys:
+            ttl = spec.options.get("expireAfterSeconds")
+            if existing.get("expireAfterSeconds") == ttl:
+                return "unchanged"
+            if ttl is not None:
+                # collMod changes the expiry without rebuilding the index
+                await db.command({"collMod": spec.collection, "index": {"name": spec.name, "expireAfterSeconds": ttl}})
+                return "updated"
+        log.warning("Index %s.%s changed; rebuilding", spec.collection, spec.name)
+        await coll.drop_index(spec.name)
+        await coll.create_index(list(spec.keys), name=spec.name, **spec.options)
+        return "rebuilt"
+    await coll.create_index(list(spec.keys), name=spec.name, **spec.options)
+    return "created"
+
+
+async def reconcile(db, specs: List[IndexSpec]) -> Dict[str, str]:
+    """Bring every index in ``specs`` up to date; maps ``collection.name`` to the outcome."""
+    outcome: Dict[str, str] = {}
+    for spec in specs:
+        key = f"{spec.collection}.{spec.name}"
+        try:
+            outcome[key] = await ensure_index(db, spec)
+        except OperationFailure as e:
+            log.error("Could not ensure index %s: %s", key, e)
+            outcome[key] = f"error: {e}"[:200]
+    return outcome
+
+
+def _stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = [plan]
+    for child_key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child_key), dict):
+            out.extend(_stages(plan[child_key]))
+    for child in plan.get("inputStages", []):
+        out.extend(_stages(child))
+    return out
+
+
+def summarize_plan(explained: Dict[str, Any], sort_after_match: bool = False) -> Dict[str, Any]:
+    planner = explained.get("queryPlanner", {})
+    stages = _stages(planner.get("winningPlan", {}))
+    names = [s.get("stage", "") for s in stages]
+    in_memory_sort = "SORT" in names
+    return {
+        "stages": names,
+        "indexes": sorted({s["indexName"] for s in stages if s.get("indexName")}),
+        "collectionScan": "COLLSCAN" in names,
+        "inMemorySort": in_memory_sort,
+        "indexed": "COLLSCAN" not in names and (sort_after_match or not in_memory_sort),
+    }
+
+
+async def explain_queries(db, queries: List[HotQuery]) -> Dict[str, Any]:
+    report: List[Dict[str, Any]] = []
+    for q in queries:
+        find: Dict[str, Any] = {"find": q.collection, "filter": q.filter}
+        if q.sort:
+            find["sort"] = dict(q.sort)
+        if q.projection:
+            find["projection"] = q.projection
+        if q.limit:
+            find["limit"] = q.limit
+        try:
+            explained = await db.command({"explain": find, "verbosity": "queryPlanner"})
+            report.append({"name": q.name, "collection": q.collection, **summarize_plan(explained, q.sort_after_match)})
+        except OperationFailure as e:
+            report.append({"name": q.name, "collection": q.collection, "indexed": False, "error": str(e)[:300]})
+    return {
+        "queries": report,
+        "notIndexed": [r["name"] for r in report if not r["indexed"]],
+    }
@@ -0,0 +1,182 @@
+# analytics/app/ingest_buffer.py
+"""Write-behind buffer for ingested events.
+
+``/ingest`` and ``/ingest/batch`` only append to this buffer; one background
+task persists it with ``insert_many`` whenever ``flush_size`` documents are
+pending or ``flush_interval_s`` has passed. ``offer`` refuses work once
+``max_pending`` documents are waiting, which the API turns into a 429 so
+clients back off instead of growing memory without bound.
+
+Documents get their ``_id`` before they are buffered, so a retried flush is
+idempotent: rows that already made it in come back as duplicate-key errors.
+
+A flush that persisted part of its batch raises ``PartialFlush`` and only the
+failed documents are queued again. Failures that ``retryable`` accepts
+(network errors, timeouts) are retried until they succeed. Any other failure
+counts as an attempt against each document involved; those documents are
+then flushed one at a time, so a single bad document cannot hold up the rest,
+and dropped (logged and counted) after ``max_attempts``.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from bson import ObjectId
+
+log = logging.getLogger(__name__)
+
+Flush = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class PartialFlush(Exception):
+    """Raised by a flush that persisted part of its batch; only ``failed`` is queued again."""
+
+    def __init__(self, failed: List[Dict[str, Any]], cause: BaseException):
+        super().__init__(f"{len(failed)} events not persisted: {cause}")
+        self.failed = failed
+        self.cause = cause
+
+
+def _always(_error: BaseException) -> bool:
+    return True
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        flush: Flush,
+        max_pending: int = 10_000,
+        flush_size: int = 500,
+        flush_interval_s: float = 0.25,
+        max_attempts: int = 5,
+        retryable: Callable[[BaseException], bool] = _always,
+    ):
+        self._flush = flush
+        self.max_pending = max_pending
+        self.flush_size = max(1, flush_size)
+        self.flush_interval_s = flush_interval_s
+        self.max_attempts = max(1, max_attempts)
+        self._retryable = retryable
+        self._pending: Deque[Dict[str, Any]] = deque()
+        # _id -> failed non-retryable attempts, for documents still queued
+        self._attempts: Dict[Any, int] = {}
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._worker: Optional[asyncio.Task] = None
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def offer(self, docs: List[Dict[str, Any]]) -> bool:
+        """Buffer all of ``docs`` or none of them; False means the caller should back off."""
+        if self._closing or len(self._pending) + len(docs) > self.max_pending:
+            self.rejected += len(docs)
+            return False
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+        self._pending.extend(docs)
+        self.accepted += len(docs)
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+        return True
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._closing = False
+            self._worker = asyncio.create_task(self._run(), name="ingest-write-behind")
+
+    async def stop(self, drain_timeout_s: float = 10.0) -> None:
+        """Stop accepting, flush everything still pending (bounded by the timeout)."""
+        self._closing = True
+        self._wake.set()
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._worker), timeout=drain_timeout_s)
+        except asyncio.TimeoutError:
+            log.error("Ingest buffer drain timed out; %d events not persisted", len(self._pending))
+            self._worker.cancel()
+        self._worker = None
+
+    async def flush_now(self) -> None:
+        """Persist everything pending from the caller's task (tests, benchmarks)."""
+        while self._pending:
+            await self._flush_batch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "maxPending": self.max_pending,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "flushErrors": self.flush_errors,
+            "dropped": self.dropped,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending and self._closing:
+                return
+            if len(self._pending) < self.flush_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            if not self._pending:
+                continue
+            if not await self._flush_batch():
+                # keep the batch, back off before retrying
+                await asyncio.sleep(self.flush_interval_s)
+
+    async def _flush_batch(self) -> bool:
+        # documents that already failed are isolated so a bad one fails alone
+        n = 1 if self._attempts.get(self._pending[0]["_id"]) else min(self.flush_size, len(self._pending))
+        batch = [self._pending.popleft() for _ in range(n)]
+        try:
+            await self._flush(batch)
+            failed: List[Dict[str, Any]] = []
+        except PartialFlush as e:
+            failed, error = e.failed, e.cause
+        except Exception as e:
+            failed, error = batch, e
+        self.flushed += len(batch) - len(failed)
+        failed_ids = {doc["_id"] for doc in failed}
+        for doc in batch:
+            if doc["_id"] not in failed_ids:
+                self._attempts.pop(doc["_id"], None)
+        if not failed:
+            self.flushes += 1
+            return True
+
+        self.flush_errors += 1
+        log.warning("Ingest flush: %d of %d events failed: %s", len(failed), len(batch), error)
+        if not self._retryable(error):
+            failed = self._count_attempt(failed, error)
+        # keep the failed documents at the head, in order
+        self._pending.extendleft(reversed(failed))
+        return False
+
+    def _count_attempt(self, failed: List[Dict[str, Any]], error: BaseException) -> List[Dict[str, Any]]:
+        """Record one more failed attempt; returns the documents that may be retried."""
+        keep: List[Dict[str, Any]] = []
+        for doc in failed:
+            attempts = self._attempts.get(doc["_id"], 0) + 1
+            if attempts < self.max_attempts:
+                self._attempts[doc["_id"]] = attempts
+                keep.append(doc)
+                continue
+            self._attempts.pop(doc["_id"], None)
+            self.dropped += 1
+            log.error("Dropping ingest event %s after %d failed attempts: %s", doc["_id"], attempts, error)
+        return keep
@@ -1,33 +1,176 @@
 # analytics/app/main.py
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import asyncio
+import logging
 import os
-import re
+import time
 from collections import Counter
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi.responses import HTMLResponse, Response
 from pydantic import BaseModel, Field
+from pymongo.errors import BulkWriteError, ConnectionFailure
 
+from .cache import SWRCache
+from .conditional import is_not_modified, make_etag, validator_headers
 from .config import get_settings
+from .dates import parse_datetime, range_filter
+from .db_async import create_client, warm_pool
+from .indexes import explain_queries, hot_queries, index_specs, reconcile
+from .ingest_buffer import PartialFlush, WriteBehindBuffer
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, STARTUP_SECONDS, Gauge, MetricsMiddleware
+from .pagination import after_filter, page_links
+from .read_routing import route_table
+from .responses import FastJSONResponse
+from .retention import apply_hourly, read_hourly, ttl_seconds
+from .rollups import TOTALS_COLLECTION, apply_events, day_bucket, read_rollups
+from .terms import TERMS_DAILY_COLLECTION, TermIndex, Window, apply_terms, count_terms, tokenize
+
+log = logging.getLogger(__name__)
 
 settings = get_settings()
-app = FastAPI(title="AnimoAssign Analytics", version="1.0.0")
 
-client = AsyncIOMotorClient(settings.mongodb_uri)
-db = client.get_default_database()
+# Created per worker process in the lifespan (after uvicorn forks), never at import
+client = None
+db = None
+
+# Read preference per endpoint; ingest writes and rollup updates always use the primary
+READ_ROUTES = route_table(
+    "secondary" if settings.secondary_reads else settings.read_preference,
+    {
+        "summary": None if settings.secondary_reads else settings.read_preference_summary,
+        "events": None if settings.secondary_reads else settings.read_preference_events,
+    },
+    settings.read_max_staleness_s,
+)
+
+def _reader(endpoint: str):
+    """Database handle carrying the read preference configured for ``endpoint``."""
+    return db.with_options(read_preference=READ_ROUTES[endpoint])
+
+summary_cache = SWRCache(ttl_s=settings.cache_ttl_s, stale_s=settings.cache_stale_s)
+term_index = TermIndex(reload_s=settings.terms_reload_s)
 
 # ---- Which collection should analytics read from?
 # default to "assignments" for your staging; override with env if needed
 SOURCE_COLLECTION = os.getenv("ANALYTICS_SOURCE_COLLECTION", "assignments")
 
+_DUPLICATE_KEY = 11000
+EVENTS_LIMIT_MAX = 500
+
+async def _persist_events(docs: List[Dict[str, Any]]) -> None:
+    """Flush target of the ingest buffer: one insert_many, then rollups and hourly counts for the rows that landed.
+
+    The buffer only retries rows whose counts were not applied: after a
+    partial failure just the rejected rows come back (``PartialFlush``), and
+    after a network error or timeout nothing was counted. A duplicate key on a
+    retry therefore means the row landed in an attempt whose outcome was
+    unknown, and it is counted now.
+    """
+    rejected: set[int] = set()
+    error: Optional[BulkWriteError] = None
+    try:
+        await db["analytics_events"].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        rejected = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != _DUPLICATE_KEY}
+        if rejected:
+            error = e
+    landed = [doc for i, doc in enumerate(docs) if i not in rejected]
+    created = [
+        (day_bucket(doc["created_at"], doc["received_at"]), doc["title"])
+        for doc in landed
+        if doc["kind"] == "record_created"
+    ]
+    try:
+        if await apply_events(db, SOURCE_COLLECTION, [day for day, _ in created]):
+            per_day = count_terms(created)
+            await apply_terms(db, SOURCE_COLLECTION, per_day)
+            term_index.add(per_day)
+    except Exception:
+        log.exception("Rollup update failed; run `python -m app.rollups rebuild` to reconcile")
+    if settings.events_hourly:
+        try:
+            await apply_hourly(db, landed)
+        except Exception:
+            log.exception("Hourly event counts update failed")
+    if error is not None:
+        raise PartialFlush([docs[i] for i in sorted(rejected)], error)
+
+def _is_transient(error: BaseException) -> bool:
+    """Network errors and timeouts are retried for as long as they last."""
+    return isinstance(error, ConnectionFailure) or getattr(error, "timeout", False)
+
+ingest_buffer = WriteBehindBuffer(
+    _persist_events,
+    max_pending=settings.ingest_buffer_max,
+    flush_size=settings.ingest_flush_size,
+    flush_interval_s=settings.ingest_flush_interval_s,
+    max_attempts=settings.ingest_max_attempts,
+    retryable=_is_transient,
+)
+
+def _index_specs():
+    return index_specs(
+        events_ttl_s=ttl_seconds(settings.events_retention_days),
+        hourly_ttl_s=ttl_seconds(settings.events_hourly_retention_days),
+    )
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global client, db
+    started = time.perf_counter()
+    client = create_client(settings)
+    db = client.get_default_database()
+    try:
+        log.info("Mongo pool warmed: %d connections", await warm_pool(client, settings.mongodb_min_pool_size))
+    except Exception as e:
+        log.warning("Could not warm the Mongo pool: %s", e)
+    try:
+        log.info("Indexes: %s", await reconcile(db, _index_specs()))
+    except Exception as e:
+        log.warning("Could not reconcile indexes: %s", e)
+    ingest_buffer.start()
+    elapsed = time.perf_counter() - started
+    STARTUP_SECONDS.set((str(os.getpid()),), elapsed)
+    log.info("Worker %d ready in %.3fs", os.getpid(), elapsed)
+    try:
+        yield
+    finally:
+        # the final flush still needs the client
+        await ingest_buffer.stop()
+        client.close()
+        client = db = None
+
+app = FastAPI(
+    title="AnimoAssign Analytics",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+INGEST_BUFFER = REGISTRY.register(Gauge(
+    "analytics_ingest_buffer", "Write-behind ingest buffer depth and totals.", ("state",)))
+SUMMARY_CACHE = REGISTRY.register(Gauge(
+    "analytics_summary_cache", "Summary cache entries and hit counters.", ("state",)))
+
+def _collect_service_stats() -> None:
+    for state, value in ingest_buffer.stats().items():
+        INGEST_BUFFER.set((state,), value)
+    for state, value in summary_cache.stats().items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            SUMMARY_CACHE.set((state,), value)
+
+REGISTRY.on_collect(_collect_service_stats)
 
 def _utc_now() -> datetime:
     return datetime.now(timezone.utc)
@@ -35,7 +178,9 @@ def _utc_now() -> datetime:
 class IngestEvent(BaseModel):
     id: Optional[str] = None
     title: str = Field(..., min_length=1, max_length=200)
-    created_at: Optional[str] = None  # ISO8601 from backend
+    created_at: Optional[str] = None  # ISO8601 from backend; stored as a BSON datetime
+    # only record_created events feed the /summary rollups
+    kind: str = Field("record_created", pattern=r"^[a-z0-9_]+$")
 
 @app.get("/", response_class=HTMLResponse)
 async def overview():
@@ -50,95 +195,275 @@ async def overview():
   </ul>
 </body></html>"""
 
-_WORD = re.compile(r"[A-Za-z0-9]+")
+CountMode = Literal["exact", "estimated"]
 
-@app.get("/summary")
-async def summary(limit: int = 10):
-    """
-    Computes cards from SOURCE_COLLECTION (default: 'assignments'):
-      - totalRecords: count of docs
-      - dailyIngest: per-day counts using created_at (string or date)
-      - topTerms: top tokens from recent titles
+async def _no_value() -> None:
+    return None
+
+async def _live_totals(coll, count: bool = True) -> Dict[str, Any]:
+    """Full-collection fallback used until the rollups have been built.
+
+    The exact count (a full scan) and the daily aggregation run concurrently;
+    ``count=False`` skips the scan when the caller already has an estimate.
     """
-    coll = db[SOURCE_COLLECTION]
+    total, daily = await asyncio.gather(
+        coll.count_documents({}) if count else _no_value(),
+        _live_daily(coll),
+    )
+    return {"total": total, "daily": daily}
 
-    # 1) total
-    total = await coll.count_documents({})
+async def _live_daily(coll, match: Optional[Dict[str, Any]] = None, days: int = 30) -> List[Dict[str, Any]]:
+    """Per-day counts, newest ``days`` (0 = all) returned oldest → newest.
 
-    # 2) daily ingest (created_at may be string or Date → $toDate is safe)
-    pipeline = [
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": {"$toDate": "$created_at"},
-                    }
-                },
-                "count": {"$sum": 1},
-            }
-        },
+    Without ``match`` this is the pre-rollup fallback over the whole collection,
+    where created_at may still be a string (→ $toDate). A ``match`` on a
+    created_at range only selects BSON dates, so it can use the index and
+    group on the raw field.
+    """
+    date = "$created_at" if match else {"$toDate": "$created_at"}
+    pipeline: List[Dict[str, Any]] = [{"$match": match}] if match else []
+    pipeline += [
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": date}}, "count": {"$sum": 1}}},
         {"$sort": {"_id": -1}},
-        {"$limit": 30},
     ]
+    if days:
+        pipeline.append({"$limit": days})
     daily: List[Dict[str, Any]] = []
     async for row in coll.aggregate(pipeline):
         daily.append({"date": row["_id"], "count": row["count"]})
-    daily = list(reversed(daily))  # oldest → newest
+    return list(reversed(daily))  # oldest → newest
 
-    # 3) top terms from recent titles
-    recent_cursor = coll.find({}, projection={"title": 1, "created_at": 1}) \
-                        .sort("created_at", -1).limit(200)
+async def _recent_titles(coll) -> List[str]:
+    cur = coll.find({}, projection={"title": 1}).sort("created_at", -1).limit(200)
+    return [d.get("title") or "" async for d in cur]
 
+def _recent_terms(titles: List[str]) -> List[Dict[str, Any]]:
+    """topTerms fallback from a sample of titles, used until the term rollups exist."""
     counts: Counter[str] = Counter()
-    async for d in recent_cursor:
-        title = (d.get("title") or "").lower()
-        for m in _WORD.finditer(title):
-            w = m.group(0)
-            if len(w) < 2:
-                continue
-            if w in {"the","a","an","of","and","for","to","in","on","at","with","by","from","is","are"}:
-                continue
-            counts[w] += 1
-    topTerms = [{"term": t, "count": c} for t, c in counts.most_common(10)]
+    for title in titles:
+        counts.update(w for w in tokenize(title) if w not in settings.stopwords)
+    return [{"term": t, "count": c} for t, c in counts.most_common(10)]
+
+async def _range_terms(rdb, start: Optional[datetime], end: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Top terms from the per-day term counts (day granularity) between ``start`` and ``end``."""
+    days: Dict[str, Any] = {}
+    if start is not None:
+        days["$gte"] = start.strftime("%Y-%m-%d")
+    if end is not None:
+        days["$lte"] = (end - timedelta(microseconds=1)).strftime("%Y-%m-%d")
+    match: Dict[str, Any] = {"source": SOURCE_COLLECTION, "term": {"$nin": sorted(settings.stopwords)}}
+    if days:
+        match["day"] = days
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": "$term", "count": {"$sum": "$count"}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": 10},
+    ]
+    return [{"term": row["_id"], "count": row["count"]} async for row in rdb[TERMS_DAILY_COLLECTION].aggregate(pipeline)]
+
+async def _range_summary(limit: int, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    """Summary cards for records created in [start, end): index range scans on created_at."""
+    rdb = _reader("summary")
+    coll = rdb[SOURCE_COLLECTION]
+    match = range_filter("created_at", start, end)
+    total, daily, topTerms = await asyncio.gather(
+        coll.count_documents(match),
+        _live_daily(coll, match, days=limit),
+        _range_terms(rdb, match["created_at"].get("$gte"), match["created_at"].get("$lt")),
+    )
+    return {
+        "totalRecords": int(total),
+        "countsExact": True,
+        "generatedAt": _utc_now().isoformat().replace("+00:00", "Z"),
+        "window": None,
+        "from": start,
+        "to": end,
+        "topTerms": topTerms,
+        "dailyIngest": daily,
+    }
+
+async def _summary_version(rdb) -> str:
+    """Validator for /summary: the rollup totals (bumped by every flush), or the
+    source's document count and newest ``_id`` while rollups are not built.
+
+    No ``Last-Modified`` is derived from it: both timestamps have one-second
+    precision, so ``If-Modified-Since`` would hide a second flush in the same
+    second.
+    """
+    totals = await rdb[TOTALS_COLLECTION].find_one({"_id": SOURCE_COLLECTION}, {"count": 1, "updated_at": 1})
+    if totals is not None:
+        updated = totals.get("updated_at")
+        return f"rollup:{totals.get('count')}:{updated.isoformat() if updated else ''}"
+    coll = rdb[SOURCE_COLLECTION]
+    count, newest = await asyncio.gather(
+        coll.estimated_document_count(), coll.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    )
+    if newest is None:
+        return "empty"
+    return f"live:{count}:{newest['_id']}"
+
+@app.get("/summary")
+async def summary(
+    request: Request,
+    limit: int = 10,
+    window: Window = "30d",
+    count_mode: Optional[CountMode] = None,
+    from_: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on created_at (ISO 8601)"),
+    to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at (ISO 8601)"),
+):
+    """Summary cards, served through the stale-while-revalidate cache.
+
+    With ``from``/``to`` the cards cover that created_at range (always exact
+    counts; ``window`` is ignored) instead of the rollup windows. A matching
+    ``If-None-Match`` gets a 304 after a single validator lookup.
+    """
+    # windows slide with the UTC day even when no new records arrive
+    version = f"{await _summary_version(_reader('summary'))}:{_utc_now().date()}"
+    query = request.query_params.multi_items()
+    etag = make_etag(version, request.url.path, query)
+    if is_not_modified(request.headers, etag, None):
+        return Response(status_code=304, headers=validator_headers(etag, None, settings.http_cache_seconds))
+
+    # after a flush the previous body is served stale while one refresh runs;
+    # the ETag follows the version of the body actually sent
+    if from_ is not None or to is not None:
+        key = ("summary", limit, from_, to)
+        body, served = await summary_cache.get(key, version, lambda: _range_summary(limit, from_, to))
+    else:
+        mode = count_mode or settings.summary_count_mode
+        key = ("summary", limit, window, mode)
+        body, served = await summary_cache.get(key, version, lambda: _compute_summary(limit, window, mode))
+    if served != version:
+        etag = make_etag(served, request.url.path, query)
+    return FastJSONResponse(body, headers=validator_headers(etag, None, settings.http_cache_seconds))
+
+async def _compute_summary(limit: int, window: Window = "30d", count_mode: CountMode = "exact") -> Dict[str, Any]:
+    """
+    Computes cards from SOURCE_COLLECTION (default: 'assignments'):
+      - totalRecords: count of docs (exact, or from collection metadata when estimated)
+      - dailyIngest: per-day counts using created_at
+      - topTerms: most frequent title terms over `window` (7d, 30d or all)
+    Independent reads are issued together, so latency is the slowest one, not the sum.
+    """
+    rdb = _reader("summary")
+    coll = rdb[SOURCE_COLLECTION]
+    estimated = count_mode == "estimated"
+
+    # 1) + 2) total and daily ingest from the pre-aggregated rollups
+    rollups, estimate, _ = await asyncio.gather(
+        read_rollups(rdb, SOURCE_COLLECTION, days=30),
+        coll.estimated_document_count() if estimated else _no_value(),
+        term_index.ensure_fresh(rdb, SOURCE_COLLECTION),
+    )
+    if rollups is None:
+        # rollups not built yet (`python -m app.rollups rebuild`): compute live,
+        # with topTerms from the most recent titles only
+        rollups, titles = await asyncio.gather(_live_totals(coll, count=not estimated), _recent_titles(coll))
+        topTerms = _recent_terms(titles)
+    else:
+        # 3) top terms from the write-time term counts, ranked in memory
+        topTerms = term_index.top(window, 10, settings.stopwords)
+    total = estimate if estimated else rollups["total"]
+    daily = rollups["daily"]
 
     return {
         "totalRecords": int(total),
+        "countsExact": not estimated,
         "generatedAt": _utc_now().isoformat().replace("+00:00", "Z"),
+        "window": window,
         "topTerms": topTerms,
         "dailyIngest": daily[-limit:] if limit else daily,
     }
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "service": settings.service_name, "source": SOURCE_COLLECTION}
+    return {
+        "status": "ok",
+        "service": settings.service_name,
+        "source": SOURCE_COLLECTION,
+        "cache": summary_cache.stats(),
+        "ingest": ingest_buffer.stats(),
+        "terms": term_index.stats(),
+        "readRouting": {endpoint: pref.document for endpoint, pref in READ_ROUTES.items()},
+        "retention": {
+            "eventsDays": settings.events_retention_days or None,
+            "hourly": settings.events_hourly,
+            "hourlyDays": (settings.events_hourly_retention_days or None) if settings.events_hourly else None,
+        },
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/admin/query-plans")
+async def query_plans():
+    """Explain each hot query; ``notIndexed`` lists plans that scan or sort in memory."""
+    return await explain_queries(db, hot_queries(SOURCE_COLLECTION))
 
 @app.get("/health/db")
 async def health_db():
     await client.admin.command("ping")
     return {"db": "ok"}
 
-# Kept for compatibility if backend ever posts events, but unused for your cards
-@app.post("/ingest", status_code=202)
-async def ingest(payload: IngestEvent):
-    doc: Dict[str, Any] = {
+def _event_doc(payload: IngestEvent) -> Dict[str, Any]:
+    now = _utc_now()
+    return {
         "id": payload.id,
         "title": payload.title.strip(),
-        "created_at": payload.created_at or _utc_now().isoformat().replace("+00:00", "Z"),
-        "received_at": _utc_now(),
-        "kind": "record_created",
+        # BSON date so range filters use the index; missing/unparsable → receive time
+        "created_at": parse_datetime(payload.created_at) or now,
+        "received_at": now,
+        "kind": payload.kind,
     }
-    try:
-        await db["analytics_events"].insert_one(doc)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"store_failed: {e}")
-    return {"status": "accepted"}
+
+def _accept(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not ingest_buffer.offer(docs):
+        raise HTTPException(
+            status_code=429,
+            detail="ingest_buffer_full",
+            headers={"Retry-After": str(max(1, round(settings.ingest_flush_interval_s)))},
+        )
+    return {"status": "accepted", "accepted": len(docs)}
+
+# Events are buffered and persisted in batches; record_created ones keep the
+# /summary rollups current. 429 means the buffer is full: retry later.
+@app.post("/ingest", status_code=202)
+async def ingest(payload: IngestEvent):
+    return _accept([_event_doc(payload)])
+
+@app.post("/ingest/batch", status_code=202)
+async def ingest_batch(payload: List[IngestEvent] = Body(...)):
+    if len(payload) > settings.ingest_batch_max:
+        raise HTTPException(status_code=413, detail=f"At most {settings.ingest_batch_max} events per batch")
+    return _accept([_event_doc(event) for event in payload])
 
 @app.get("/events")
-async def list_events(limit: int = 100):
-    cur = db["analytics_events"].find({}).sort("received_at", -1).limit(limit)
-    items: List[Dict[str, Any]] = []
-    async for d in cur:
-        d["_id"] = str(d["_id"])
-        items.append(d)
-    return {"items": items, "limit": limit}
+async def list_events(
+    limit: int = Query(100, ge=1, le=EVENTS_LIMIT_MAX),
+    after: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    from_: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on received_at (ISO 8601)"),
+    to: Optional[datetime] = Query(None, description="Exclusive upper bound on received_at (ISO 8601)"),
+):
+    filters = after_filter(range_filter("received_at", from_, to), after)
+    # range, cursor and sort all seek on the received_at_id_desc index; one extra row tells whether more follow
+    cur = (
+        _reader("events")["analytics_events"]
+        .find(filters)
+        .sort([("received_at", -1), ("_id", -1)])
+        .limit(limit + 1)
+    )
+    links = page_links([d async for d in cur], limit)
+    # ObjectId/datetime values are encoded by FastJSONResponse
+    return FastJSONResponse({"items": links["page"], "limit": limit, "nextCursor": links["nextCursor"]})
+
+@app.get("/events/hourly")
+async def events_hourly(
+    from_: Optional[datetime] = Query(None, alias="from", description="Inclusive lower bound on the hour (ISO 8601)"),
+    to: Optional[datetime] = Query(None, description="Exclusive upper bound on the hour (ISO 8601)"),
+    kind: Optional[str] = None,
+):
+    """Per-hour event counts by kind; kept for ``ANALYTICS_EVENTS_HOURLY_RETENTION_DAYS``."""
+    items = await read_hourly(_reader("events"), from_, to, kind)
+    return FastJSONResponse({"items": items, "enabled": settings.events_hourly})
@@ -0,0 +1,297 @@
+# analytics/app/metrics.py
+"""Prometheus-style metrics without a client library.
+
+* ``MetricsMiddleware`` (pure ASGI) times every request into a per-route
+  latency histogram, counts responses by status and tracks in-flight requests.
+  Routes are labelled by their template (``/assignments/search``), never the
+  raw path, so label cardinality stays bounded.
+* ``MongoCommandListener`` is a pymongo ``CommandListener`` recording per
+  command/collection durations, failures and documents returned.
+* ``MongoPoolListener`` is a pymongo ``ConnectionPoolListener`` recording how
+  long each connection checkout waited (including opening a new connection)
+  and how many connections are open and checked out per server.
+* ``REGISTRY.render()`` produces the text exposition format for ``/metrics``.
+
+Values are per process: with several uvicorn workers each one exposes its
+own, labelled by ``pid`` in ``process_startup_seconds``.
+
+Updates are a lock plus a few integer operations, so the hot path cost is
+negligible; pymongo calls listeners from Motor's worker threads, hence the locks.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+Labels = Tuple[str, ...]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Labels = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Labels = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels = (), value: float = 0) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        row = self._values.get(labels)
+        return int(sum(row[:-1])) if row else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines: List[str] = []
+        for labels, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += n
+                le = 'le="' + _fmt_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le)} {int(cumulative)}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {row[-1]!r}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {int(cumulative)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, fn: Callable[[], None]) -> None:
+        """Run ``fn`` before every scrape, e.g. to copy queue sizes into gauges."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            fn()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP responses by method, route template and status.", ("method", "route", "status")))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served.", ("method",)))
+MONGO_DURATION = REGISTRY.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time.", ("command", "collection")))
+MONGO_FAILURES = REGISTRY.register(Counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error.", ("command", "collection")))
+MONGO_DOCS = REGISTRY.register(Counter(
+    "mongodb_documents_returned_total", "Documents returned in cursor batches.", ("command", "collection")))
+MONGO_CHECKOUT_WAIT = REGISTRY.register(Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time to check a connection out of the pool, by server and outcome.",
+    ("address", "outcome"),
+    buckets=(0.0001, 0.0005) + DEFAULT_BUCKETS,
+))
+MONGO_POOL = REGISTRY.register(Gauge(
+    "mongodb_pool_connections", "Pooled connections per server: open and checked out.", ("address", "state")))
+STARTUP_SECONDS = REGISTRY.register(Gauge(
+    "process_startup_seconds", "Lifespan startup time of this worker (client, indexes).", ("pid",)))
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc((method,))
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            HTTP_IN_FLIGHT.dec((method,))
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe((method, template), elapsed)
+            HTTP_REQUESTS.inc((method, template, str(status["code"])))
+
+
+_CURSOR_COMMANDS = {"find", "aggregate", "getMore"}
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._pending: Dict[Tuple[Any, int], Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(event: monitoring.CommandStartedEvent) -> str:
+        if event.command_name == "getMore":
+            return str(event.command.get("collection", ""))
+        target = event.command.get(event.command_name)
+        return target if isinstance(target, str) else ""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (event.command_name, self._collection(event))
+
+    def _finish(self, event, failed: bool) -> Optional[Labels]:
+        with self._lock:
+            labels = self._pending.pop((event.connection_id, event.request_id), None)
+        if labels is None:
+            return None
+        MONGO_DURATION.observe(labels, event.duration_micros / 1e6)
+        if failed:
+            MONGO_FAILURES.inc(labels)
+        return labels
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        labels = self._finish(event, failed=False)
+        if labels is None or labels[0] not in _CURSOR_COMMANDS:
+            return
+        cursor = event.reply.get("cursor") or {}
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if batch:
+            MONGO_DOCS.inc(labels, len(batch))
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, failed=True)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        address = _address(event)
+        MONGO_CHECKOUT_WAIT.observe((address, "ok"), event.duration or 0.0)
+        MONGO_POOL.inc((address, "checkedOut"))
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        # reason is "timeout" (waitQueueTimeoutMS), "connectionError" or "poolClosed"
+        MONGO_CHECKOUT_WAIT.observe((_address(event), event.reason), event.duration or 0.0)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        MONGO_POOL.dec((_address(event), "checkedOut"))
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        MONGO_POOL.inc((_address(event), "open"))
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        MONGO_POOL.dec((_address(event), "open"))
+
+    # the base class raises NotImplementedError for every event; these are not recorded
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
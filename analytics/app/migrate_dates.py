@@ -0,0 +1,67 @@
+# analytics/app/migrate_dates.py
+"""Convert string ``created_at`` values to BSON datetimes, in batches.
+
+    python -m app.migrate_dates                      # analytics_events + source
+    python -m app.migrate_dates analytics_events --batch-size 500 --dry-run
+
+Walks only the documents whose ``created_at`` is still a string, in ``_id``
+order, ``batch_size`` at a time, so memory stays flat and the tool can be
+stopped and re-run at any point. Each update is conditional on the old string
+value, so a concurrent writer is never overwritten. Unparsable values are
+left alone and counted.
+"""
+import argparse
+import asyncio
+import sys
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from .dates import parse_datetime
+
+
+async def migrate_collection(coll, batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    converted = unparsable = 0
+    last_id: Optional[Any] = None
+    while True:
+        filters: Dict[str, Any] = {"created_at": {"$type": "string"}}
+        if last_id is not None:
+            filters["_id"] = {"$gt": last_id}
+        batch = await coll.find(filters, {"created_at": 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        ops: List[UpdateOne] = []
+        for doc in batch:
+            dt = parse_datetime(doc["created_at"])
+            if dt is None:
+                unparsable += 1
+                continue
+            ops.append(UpdateOne({"_id": doc["_id"], "created_at": doc["created_at"]}, {"$set": {"created_at": dt}}))
+        if ops and not dry_run:
+            await coll.bulk_write(ops, ordered=False)
+        converted += len(ops)
+    return {"converted": converted, "unparsable": unparsable}
+
+
+async def _main(argv: List[str]) -> int:
+    from .db_async import get_db
+    from .indexes import EVENTS_COLLECTION
+    from .main import SOURCE_COLLECTION
+
+    parser = argparse.ArgumentParser(prog="python -m app.migrate_dates", description=__doc__.splitlines()[0])
+    parser.add_argument("collections", nargs="*", default=[EVENTS_COLLECTION, SOURCE_COLLECTION])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="count without writing")
+    args = parser.parse_args(argv)
+
+    db = get_db()
+    for name in args.collections:
+        result = await migrate_collection(db[name], args.batch_size, args.dry_run)
+        verb = "would convert" if args.dry_run else "converted"
+        print(f"{name}: {verb} {result['converted']} created_at values, {result['unparsable']} unparsable")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,54 @@
+# analytics/app/pagination.py
+"""Keyset (cursor) pagination for ``/events``, newest first.
+
+Events are ordered by ``(received_at, _id)``, both descending, which the
+``received_at_id_desc`` index serves directly; a page is a bounded seek from
+the previous page's last key instead of a skip. Cursors are opaque url-safe
+tokens (received_at in microseconds plus the ObjectId); clients only pass
+them back.
+"""
+import base64
+import binascii
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+from .dates import as_utc
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROS = struct.Struct(">q")
+
+
+def encode_cursor(received_at: datetime, oid: Any) -> str:
+    micros = (as_utc(received_at) - _EPOCH) // timedelta(microseconds=1)
+    raw = _MICROS.pack(micros) + ObjectId(str(oid)).binary
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        (micros,) = _MICROS.unpack(raw[: _MICROS.size])
+        return _EPOCH + timedelta(microseconds=micros), ObjectId(raw[_MICROS.size:])
+    except (binascii.Error, InvalidId, OverflowError, TypeError, ValueError, struct.error):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def after_filter(base: Dict[str, Any], after: Optional[str]) -> Dict[str, Any]:
+    """``base`` narrowed to events older than the ``after`` cursor."""
+    if not after:
+        return base
+    received_at, oid = decode_cursor(after)
+    older = {"$or": [{"received_at": {"$lt": received_at}}, {"received_at": received_at, "_id": {"$lt": oid}}]}
+    return {"$and": [base, older]} if base else older
+
+
+def page_links(docs: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """Trim a ``limit + 1`` fetch to one page and compute the cursor for the next one."""
+    page = docs[:limit]
+    has_more = len(docs) > limit
+    return {"page": page, "nextCursor": encode_cursor(page[-1]["received_at"], page[-1]["_id"]) if has_more else None}
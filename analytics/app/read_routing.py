@@ -0,0 +1,32 @@
+# analytics/app/read_routing.py
+"""Per-endpoint read preferences for the replica set.
+
+Reads default to the primary. ``/summary`` and ``/events`` can be routed to
+secondaries (``secondaryPreferred``) or the lowest-latency member
+(``nearest``), and ``ANALYTICS_SECONDARY_READS=1`` sends every analytics read
+to secondaries only (mode ``secondary``), leaving the primary to writes. ``maxStalenessSeconds`` bounds how far behind a secondary may
+be; MongoDB requires at least 90 seconds, and -1 means no bound. Writes
+always go to the primary.
+
+Routing is applied through collection handles (``with_options``), so the
+shared client and its pools are reused.
+"""
+from typing import Dict, Optional
+
+from pymongo.read_preferences import _ServerMode, make_read_preference, read_pref_mode_from_name
+
+MIN_MAX_STALENESS_SECONDS = 90
+
+
+def read_preference(mode: str, max_staleness_s: int = -1) -> _ServerMode:
+    if mode == "primary":
+        # the primary is never stale; maxStalenessSeconds is invalid with it
+        max_staleness_s = -1
+    elif 0 <= max_staleness_s < MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(f"maxStalenessSeconds must be -1 or >= {MIN_MAX_STALENESS_SECONDS}, got {max_staleness_s}")
+    return make_read_preference(read_pref_mode_from_name(mode), None, max_staleness_s)
+
+
+def route_table(default: str, overrides: Dict[str, Optional[str]], max_staleness_s: int = -1) -> Dict[str, _ServerMode]:
+    """Resolve one preference per endpoint; endpoints without an override use ``default``."""
+    return {name: read_preference(mode or default, max_staleness_s) for name, mode in overrides.items()}
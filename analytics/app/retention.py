@@ -0,0 +1,57 @@
+# analytics/app/retention.py
+"""Bounded storage for ingested events.
+
+Raw ``analytics_events`` expire ``ANALYTICS_EVENTS_RETENTION_DAYS`` after
+they were received: a TTL on the ``received_at`` index, enforced by mongod's
+TTL monitor (about once a minute), so no job has to run. When hourly
+buckets are enabled, each flush also adds its events to
+``analytics_events_hourly``: one small document per hour and event kind
+holding a count, with its own, longer TTL. Traffic history therefore outlives
+the raw events at a tiny fraction of their size, and the live collection
+and its indexes stay bounded under continuous ingest.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from .dates import as_utc, range_filter
+
+HOURLY_COLLECTION = "analytics_events_hourly"
+
+_DAY_S = 86_400
+
+
+def ttl_seconds(days: float) -> Optional[int]:
+    """``expireAfterSeconds`` for a retention in days; None keeps documents forever."""
+    return int(days * _DAY_S) if days > 0 else None
+
+
+def hour_bucket(dt: datetime) -> datetime:
+    return as_utc(dt).replace(minute=0, second=0, microsecond=0)
+
+
+async def apply_hourly(db, docs: Iterable[Dict[str, Any]]) -> int:
+    """Count ``docs`` into their (hour, kind) buckets; returns how many buckets changed."""
+    per_bucket = Counter((hour_bucket(doc["received_at"]), doc["kind"]) for doc in docs)
+    if not per_bucket:
+        return 0
+    ops = [
+        UpdateOne({"hour": hour, "kind": kind}, {"$inc": {"count": n}}, upsert=True)
+        for (hour, kind), n in per_bucket.items()
+    ]
+    await db[HOURLY_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def read_hourly(
+    db, start: Optional[datetime], end: Optional[datetime], kind: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    filters = range_filter("hour", start, end)
+    if kind:
+        filters["kind"] = kind
+    cursor = db[HOURLY_COLLECTION].find(filters, {"_id": 0, "hour": 1, "kind": 1, "count": 1}).sort(
+        [("hour", 1), ("kind", 1)]
+    )
+    return [doc async for doc in cursor]
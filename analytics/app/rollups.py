@@ -0,0 +1,131 @@
+# analytics/app/rollups.py
+"""Pre-aggregated counters behind /summary.
+
+``analytics_totals`` holds one document per source collection with the total
+record count; ``analytics_daily`` holds one small document per UTC day. Both
+are bumped with ``$inc`` as ``record_created`` events reach ``/ingest``, so
+``/summary`` reads O(days) documents instead of grouping the whole source
+collection. Title term counts live alongside them (see ``terms.py``).
+
+Nothing is counted until a rebuild has seeded the totals: until then
+``/summary`` computes live from the source collection. Build them once after
+deploying, and again if counters ever drift (events lost while analytics was
+down, records written without an event)::
+
+    python -m app.rollups rebuild
+"""
+import asyncio
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from .dates import parse_datetime
+from .staging import replace_source_rows
+from .terms import rebuild_terms
+
+TOTALS_COLLECTION = "analytics_totals"
+DAILY_COLLECTION = "analytics_daily"
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def day_bucket(created_at: Any, fallback: Optional[datetime] = None) -> str:
+    """UTC ``YYYY-MM-DD`` for an ISO string or datetime; ``fallback`` if unparsable."""
+    dt = parse_datetime(created_at) or parse_datetime(fallback) or _utc_now()
+    return dt.strftime("%Y-%m-%d")
+
+
+async def apply_events(db, source: str, days: Iterable[str]) -> int:
+    """Add one record per entry in ``days`` to the rollups; returns how many.
+
+    Only a rebuilt source is counted: without its totals document the
+    increments would start from zero and hide the live fallback, so nothing is
+    written and 0 is returned.
+    """
+    per_day = Counter(days)
+    added = sum(per_day.values())
+    if not added:
+        return 0
+    now = _utc_now()
+    totals = await db[TOTALS_COLLECTION].update_one(
+        {"_id": source},
+        {"$inc": {"count": added}, "$set": {"updated_at": now}},
+    )
+    if not totals.matched_count:
+        return 0
+    ops = [
+        UpdateOne(
+            {"source": source, "day": day},
+            {"$inc": {"count": n}, "$set": {"updated_at": now}},
+            upsert=True,
+        )
+        for day, n in per_day.items()
+    ]
+    await db[DAILY_COLLECTION].bulk_write(ops, ordered=False)
+    return added
+
+
+async def read_rollups(db, source: str, days: int = 30) -> Optional[Dict[str, Any]]:
+    """Return ``{"total", "daily"}`` (daily oldest → newest) or None if never built."""
+    cur = db[DAILY_COLLECTION].find({"source": source}).sort("day", -1).limit(days)
+    # two independent reads: run them concurrently
+    totals, rows = await asyncio.gather(db[TOTALS_COLLECTION].find_one({"_id": source}), cur.to_list(days))
+    if totals is None:
+        return None
+    daily: List[Dict[str, Any]] = [{"date": d["day"], "count": d["count"]} for d in reversed(rows)]
+    return {"total": int(totals.get("count", 0)), "daily": daily}
+
+
+async def rebuild(db, source: str) -> Dict[str, Any]:
+    """Recompute totals, per-day and term counts from ``source`` (full scan, run offline).
+
+    New rows are swapped in whole (see ``staging.py``), so readers never see a
+    source with its per-day rows deleted.
+    """
+    pipeline = [
+        {
+            "$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$toDate": "$created_at"}}},
+                "count": {"$sum": 1},
+            }
+        },
+    ]
+    now = _utc_now()
+    rows = [
+        {"source": source, "day": row["_id"], "count": row["count"], "updated_at": now}
+        async for row in db[source].aggregate(pipeline)
+        if row["_id"]
+    ]
+    total = await db[source].count_documents({})
+
+    await replace_source_rows(db, DAILY_COLLECTION, source, rows)
+    terms = await rebuild_terms(db, source, day_bucket)
+    await db[TOTALS_COLLECTION].replace_one(
+        {"_id": source}, {"_id": source, "count": int(total), "updated_at": now}, upsert=True
+    )
+    return {"source": source, "total": int(total), "days": len(rows), **terms}
+
+
+async def _main(argv: List[str]) -> int:
+    from .db_async import get_db
+    from .main import SOURCE_COLLECTION
+
+    if argv[:1] != ["rebuild"]:
+        print("usage: python -m app.rollups rebuild [source_collection]", file=sys.stderr)
+        return 2
+    source = argv[1] if len(argv) > 1 else SOURCE_COLLECTION
+    result = await rebuild(get_db(), source)
+    print(
+        f"rebuilt rollups for {result['source']}: {result['total']} records over {result['days']} days, "
+        f"{result['terms']} distinct terms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,42 @@
+# analytics/app/staging.py
+"""Swap rebuilt rollup rows into place without an empty window.
+
+``rebuild`` used to ``delete_many`` a source's rows and then ``insert_many``
+the recount: between the two, ``/summary`` read nothing, and a live ``$inc``
+landing in the gap upserted a fresh row that the insert then collided with.
+Instead the complete new collection (other sources' rows copied over, this
+source's rows recomputed, same indexes) is written to a staging collection
+and renamed over the live one, which readers see as a single switch.
+
+Increments that land on the live collection while the rebuild runs are
+lost: this source's recount was taken before them, and other sources' rows
+are copied from a snapshot taken before the rename. Run rebuilds while ingest
+is quiet, or re-run one afterwards.
+"""
+from typing import Any, Dict, List
+
+STAGING_SUFFIX = "_rebuild"
+
+
+async def _copy_indexes(source, target) -> None:
+    for name, info in (await source.index_information()).items():
+        if name == "_id_":
+            continue
+        options = {k: v for k, v in info.items() if k not in ("key", "v", "ns")}
+        await target.create_index(list(info["key"]), name=name, **options)
+
+
+async def replace_source_rows(db, collection: str, source: str, rows: List[Dict[str, Any]]) -> None:
+    """Make ``rows`` the only rows of ``source`` in ``collection``, atomically for readers."""
+    live = db[collection]
+    staging = db[collection + STAGING_SUFFIX]
+    await staging.drop()
+    await _copy_indexes(live, staging)
+    kept = [doc async for doc in live.find({"source": {"$ne": source}})]
+    docs = kept + rows
+    if not docs:
+        # nothing to swap in; rename needs an existing source namespace
+        await live.delete_many({"source": source})
+        return
+    await staging.insert_many(docs, ordered=False)
+    await staging.rename(collection, dropTarget=True)
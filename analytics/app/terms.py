@@ -0,0 +1,191 @@
+# analytics/app/terms.py
+"""Write-time term counts behind ``/summary`` topTerms.
+
+Titles are tokenized once, when their ``record_created`` event is flushed, and
+the counts are ``$inc``-ed into two collections:
+
+* ``analytics_terms_daily``: one document per (source, UTC day, term)
+* ``analytics_terms_total``: one document per (source, term), all time
+
+``TermIndex`` keeps the last ``retain_days`` of daily counts plus the
+all-time counts in memory, so a windowed top-k never re-reads titles. It is
+updated by this process's own flushes and reloaded from Mongo every
+``reload_s`` seconds to pick up writes made by other workers or replicas.
+
+Every token is stored; stopwords are applied when ranking, so changing
+``ANALYTICS_STOPWORDS`` takes effect without a rebuild.
+"""
+import asyncio
+import heapq
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Literal, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .staging import replace_source_rows
+
+TERMS_DAILY_COLLECTION = "analytics_terms_daily"
+TERMS_TOTAL_COLLECTION = "analytics_terms_total"
+
+Window = Literal["7d", "30d", "all"]
+WINDOW_DAYS: Dict[str, Optional[int]] = {"7d": 7, "30d": 30, "all": None}
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+
+def tokenize(title: Optional[str]) -> List[str]:
+    """Lower-cased alphanumeric tokens of two or more characters."""
+    return [w for w in _WORD.findall((title or "").lower()) if len(w) >= 2]
+
+
+def count_terms(items: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Counter]:
+    """``(day, title)`` pairs → per-day term counters."""
+    per_day: Dict[str, Counter] = {}
+    for day, title in items:
+        tokens = tokenize(title)
+        if tokens:
+            per_day.setdefault(day, Counter()).update(tokens)
+    return per_day
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def apply_terms(db, source: str, per_day: Dict[str, Counter]) -> int:
+    """``$inc`` the daily and all-time term counters; returns the number of tokens."""
+    totals: Counter = Counter()
+    for counts in per_day.values():
+        totals.update(counts)
+    if not totals:
+        return 0
+    now = _utc_now()
+    daily_ops = [
+        UpdateOne(
+            {"source": source, "day": day, "term": term},
+            {"$inc": {"count": n}, "$set": {"updated_at": now}},
+            upsert=True,
+        )
+        for day, counts in per_day.items()
+        for term, n in counts.items()
+    ]
+    total_ops = [
+        UpdateOne(
+            {"source": source, "term": term},
+            {"$inc": {"count": n}, "$set": {"updated_at": now}},
+            upsert=True,
+        )
+        for term, n in totals.items()
+    ]
+    await db[TERMS_DAILY_COLLECTION].bulk_write(daily_ops, ordered=False)
+    await db[TERMS_TOTAL_COLLECTION].bulk_write(total_ops, ordered=False)
+    return sum(totals.values())
+
+
+async def rebuild_terms(db, source: str, day_of) -> Dict[str, int]:
+    """Recount every title in ``source`` (full scan, run offline).
+
+    ``day_of`` maps a source document's ``created_at`` to its day bucket.
+    """
+    per_day: Dict[str, Counter] = {}
+    async for doc in db[source].find({}, {"title": 1, "created_at": 1}):
+        tokens = tokenize(doc.get("title"))
+        if tokens:
+            per_day.setdefault(day_of(doc.get("created_at")), Counter()).update(tokens)
+
+    now = _utc_now()
+    totals: Counter = Counter()
+    daily_rows: List[Dict[str, Any]] = []
+    for day, counts in per_day.items():
+        totals.update(counts)
+        daily_rows.extend(
+            {"source": source, "day": day, "term": t, "count": n, "updated_at": now} for t, n in counts.items()
+        )
+    total_rows = [{"source": source, "term": t, "count": n, "updated_at": now} for t, n in totals.items()]
+
+    await replace_source_rows(db, TERMS_DAILY_COLLECTION, source, daily_rows)
+    await replace_source_rows(db, TERMS_TOTAL_COLLECTION, source, total_rows)
+    return {"terms": len(total_rows), "termDays": len(daily_rows)}
+
+
+def _day_string(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+class TermIndex:
+    def __init__(self, retain_days: int = 30, reload_s: float = 60.0):
+        self.retain_days = retain_days
+        self.reload_s = reload_s
+        self._daily: Dict[str, Counter] = {}
+        self._total: Counter = Counter()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _cutoff(self, days: int, now: Optional[datetime] = None) -> str:
+        return _day_string((now or _utc_now()) - timedelta(days=days - 1))
+
+    async def load(self, db, source: str) -> None:
+        cutoff = self._cutoff(self.retain_days)
+        daily: Dict[str, Counter] = {}
+        cur = db[TERMS_DAILY_COLLECTION].find(
+            {"source": source, "day": {"$gte": cutoff}}, {"day": 1, "term": 1, "count": 1}
+        )
+        async for row in cur:
+            daily.setdefault(row["day"], Counter())[row["term"]] = row["count"]
+        total: Counter = Counter()
+        async for row in db[TERMS_TOTAL_COLLECTION].find({"source": source}, {"term": 1, "count": 1}):
+            total[row["term"]] = row["count"]
+        self._daily, self._total = daily, total
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self, db, source: str) -> None:
+        """Load on first use, then reload once ``reload_s`` has passed."""
+        if self.loaded and time.monotonic() - self._loaded_at < self.reload_s:
+            return
+        async with self._lock:
+            if self.loaded and time.monotonic() - self._loaded_at < self.reload_s:
+                return
+            await self.load(db, source)
+
+    def add(self, per_day: Dict[str, Counter]) -> None:
+        """Mirror counts this process just persisted (no-op until loaded)."""
+        if not self.loaded:
+            return
+        cutoff = self._cutoff(self.retain_days)
+        for day, counts in per_day.items():
+            self._total.update(counts)
+            if day >= cutoff:
+                self._daily.setdefault(day, Counter()).update(counts)
+        for day in [d for d in self._daily if d < cutoff]:
+            del self._daily[day]
+
+    def top(self, window: Window, k: int, stopwords: FrozenSet[str] = frozenset()) -> List[Dict[str, Any]]:
+        days = WINDOW_DAYS[window]
+        if days is None:
+            counts: Counter = self._total
+        else:
+            cutoff = self._cutoff(min(days, self.retain_days))
+            counts = Counter()
+            for day, day_counts in self._daily.items():
+                if day >= cutoff:
+                    counts.update(day_counts)
+        # highest count first, ties alphabetical so the cards are stable between calls
+        best = heapq.nsmallest(
+            k, ((n, t) for t, n in counts.items() if t not in stopwords and n > 0), key=lambda item: (-item[0], item[1])
+        )
+        return [{"term": t, "count": n} for n, t in best]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "days": len(self._daily),
+            "terms": len(self._total),
+            "ageSeconds": round(time.monotonic() - self._loaded_at, 1) if self.loaded else None,
+        }
@@ -0,0 +1,101 @@
+# analytics/bench/bench_ingest.py
+"""Ingest throughput: one insert_one per request vs. the write-behind buffer.
+
+Runs fully offline against a local stand-in collection that charges a fixed
+round-trip latency per call (``--rtt-ms``), which is what bounds per-request
+inserts in production::
+
+    python -m bench.bench_ingest --events 20000 --concurrency 64 --rtt-ms 2
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_bench")
+
+from app.ingest_buffer import WriteBehindBuffer  # noqa: E402
+
+
+class LatencyCollection:
+    """Stand-in collection: every call costs one round-trip, regardless of size."""
+
+    def __init__(self, rtt_s: float):
+        self.rtt_s = rtt_s
+        self.rows = 0
+        self.calls = 0
+
+    async def insert_one(self, doc: Dict[str, Any]) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.rtt_s)
+        self.rows += 1
+
+    async def insert_many(self, docs: List[Dict[str, Any]], ordered: bool = True) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.rtt_s)
+        self.rows += len(docs)
+
+
+def _event(n: int) -> Dict[str, Any]:
+    return {"id": str(n), "title": f"Record {n}", "kind": "record_created", "created_at": None}
+
+
+async def _drive(events: int, concurrency: int, handle) -> float:
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for n in range(events):
+        queue.put_nowait(n)
+
+    async def worker() -> None:
+        while not queue.empty():
+            await handle(_event(queue.get_nowait()))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0
+
+
+async def bench_per_request(args) -> Dict[str, float]:
+    coll = LatencyCollection(args.rtt_ms / 1000)
+    elapsed = await _drive(args.events, args.concurrency, coll.insert_one)
+    return {"seconds": elapsed, "calls": coll.calls, "rows": coll.rows}
+
+
+async def bench_buffered(args) -> Dict[str, float]:
+    coll = LatencyCollection(args.rtt_ms / 1000)
+    buffer = WriteBehindBuffer(
+        coll.insert_many,
+        max_pending=args.max_pending,
+        flush_size=args.flush_size,
+        flush_interval_s=args.flush_interval_ms / 1000,
+    )
+    buffer.start()
+
+    async def handle(doc: Dict[str, Any]) -> None:
+        while not buffer.offer([doc]):  # 429: back off like a client would
+            await asyncio.sleep(args.flush_interval_ms / 1000)
+
+    t0 = time.perf_counter()
+    await _drive(args.events, args.concurrency, handle)
+    await buffer.stop()  # include the final drain in the measurement
+    return {"seconds": time.perf_counter() - t0, "calls": coll.calls, "rows": coll.rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--flush-size", type=int, default=500)
+    parser.add_argument("--flush-interval-ms", type=float, default=250.0)
+    parser.add_argument("--max-pending", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'mode':>12} {'events/s':>12} {'db calls':>9} {'rows':>8}")
+    for name, bench in (("per-request", bench_per_request), ("buffered", bench_buffered)):
+        r = asyncio.run(bench(args))
+        print(f"{name:>12} {r['rows'] / r['seconds']:>12.0f} {r['calls']:>9} {r['rows']:>8}")
+
+
+if __name__ == "__main__":
+    main()
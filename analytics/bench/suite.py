@@ -0,0 +1,76 @@
+# analytics/bench/suite.py
+"""Analytics benchmark suite on the in-memory Mongo stand-in (fully offline).
+
+    python -m bench.suite --sizes 1000 10000 --requests 300
+    python -m bench.suite --update-baseline      # after an intentional change
+
+Drives the ASGI app in-process through httpx and reports p50/p95/p99
+latency, one request at a time, for ``summary`` (cache disabled, so every
+request reads the rollups and ranks the in-memory term index) and ``ingest``
+(buffered, flushed by the background writer); throughput and p95 under
+``--concurrency`` workers are printed for information only. Exits non-zero
+when a scenario's serial p95 regresses past ``--tolerance`` relative to
+bench/baseline.json.
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "testing"))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_bench")
+
+import httpx  # noqa: E402
+from benchkit import Scenario, run_suite_cli  # noqa: E402
+from mongo_standin import InMemoryDatabase  # noqa: E402
+
+from app import main  # noqa: E402
+from app.cache import SWRCache  # noqa: E402
+from app.ingest_buffer import WriteBehindBuffer  # noqa: E402
+from app.rollups import rebuild  # noqa: E402
+from app.terms import TermIndex  # noqa: E402
+
+BASELINE = Path(__file__).with_name("baseline.json")
+_VOCAB = "deployment service analytics report review thesis lab quiz project database network design".split()
+
+
+async def seed(db: InMemoryDatabase, size: int) -> None:
+    rng = random.Random(size)
+    start = datetime.now(timezone.utc) - timedelta(days=60)
+    docs = [
+        {
+            "title": " ".join(rng.choices(_VOCAB, k=3)).title(),
+            "created_at": start + timedelta(seconds=i * 60 * 60 * 24 * 60 / max(size, 1)),
+        }
+        for i in range(size)
+    ]
+    await db[main.SOURCE_COLLECTION].insert_many(docs)
+    await rebuild(db, main.SOURCE_COLLECTION)
+
+
+async def build(size: int) -> Dict[str, Scenario]:
+    db = InMemoryDatabase()
+    await seed(db, size)
+    main.db = db
+    main.summary_cache = SWRCache(ttl_s=0, stale_s=0)
+    main.term_index = TermIndex(reload_s=main.settings.terms_reload_s)
+    if main.ingest_buffer._worker is not None:
+        await main.ingest_buffer.stop()
+    main.ingest_buffer = WriteBehindBuffer(main._persist_events, flush_size=200, flush_interval_s=0.05)
+    main.ingest_buffer.start()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+
+    async def summary(_n: int) -> int:
+        return (await client.get("/summary")).status_code
+
+    async def ingest(n: int) -> int:
+        event = {"id": f"bench-{n}", "title": f"Bench event {n}", "created_at": datetime.now(timezone.utc).isoformat()}
+        return (await client.post("/ingest", json=event)).status_code
+
+    return {"summary": summary, "ingest": ingest}
+
+
+if __name__ == "__main__":
+    sys.exit(run_suite_cli(__doc__.splitlines()[0], build, BASELINE))
@@ -0,0 +1,4 @@
+import os
+
+# Building a client needs a Mongo URI (read lazily); tests never connect to it.
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_test")
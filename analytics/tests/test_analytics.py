@@ -0,0 +1,520 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, List
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from mongo_standin import InMemoryDatabase
+
+from app import main
+from app.cache import SWRCache
+from app.ingest_buffer import WriteBehindBuffer
+from app.rollups import DAILY_COLLECTION, TOTALS_COLLECTION, apply_events, rebuild
+from app.terms import TermIndex
+
+TEST_BASE_URL = "http://localhost"
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def use_inmemory_database(monkeypatch):
+    monkeypatch.setattr(main, "db", InMemoryDatabase())
+    # no stale window: a read after a write waits for the new version
+    monkeypatch.setattr(main, "summary_cache", SWRCache(ttl_s=60, stale_s=0))
+    monkeypatch.setattr(main, "term_index", TermIndex(reload_s=60))
+    monkeypatch.setattr(main, "ingest_buffer", WriteBehindBuffer(main._persist_events, max_pending=5, flush_size=100))
+    yield
+
+
+async def _seed_source(docs: List[Dict[str, Any]]) -> None:
+    await main.db[main.SOURCE_COLLECTION].insert_many(docs)
+
+
+def _day(n: int) -> datetime:
+    return datetime(2026, 3, 1, 12, tzinfo=timezone.utc) + timedelta(days=n)
+
+
+@pytest.mark.asyncio
+async def test_summary_falls_back_to_live_aggregation():
+    await _seed_source([
+        {"title": "Lab report draft", "created_at": _day(0)},
+        {"title": "Lab quiz", "created_at": _day(0)},
+        {"title": "Final report", "created_at": _day(1).isoformat()},
+    ])
+
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        body = (await client.get("/summary")).json()
+
+    assert body["totalRecords"] == 3
+    assert body["dailyIngest"] == [{"date": "2026-03-01", "count": 2}, {"date": "2026-03-02", "count": 1}]
+    terms = {t["term"]: t["count"] for t in body["topTerms"]}
+    assert terms["lab"] == 2 and terms["report"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rebuild_then_ingest_updates_rollups():
+    await _seed_source([{"title": "Seed", "created_at": _day(0)}])
+    assert (await rebuild(main.db, main.SOURCE_COLLECTION))["total"] == 1
+
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        first = (await client.get("/summary")).json()
+        response = await client.post("/ingest/batch", json=[
+            {"title": "New one", "created_at": _day(1).isoformat()},
+            {"title": "Probe", "kind": "connectivity_test"},
+        ])
+        assert response.status_code == 202
+        await main.ingest_buffer.flush_now()
+        second = (await client.get("/summary")).json()
+        health = (await client.get("/health")).json()
+
+    assert first["totalRecords"] == 1
+    assert second["totalRecords"] == 2
+    assert second["dailyIngest"][-1] == {"date": "2026-03-02", "count": 1}
+    assert await main.db["analytics_events"].count_documents({}) == 2
+    assert health["ingest"]["flushed"] == 2
+    assert health["cache"]["misses"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_ingest_before_any_rebuild_keeps_the_live_summary():
+    await _seed_source([{"title": f"Record {i}", "created_at": _day(0)} for i in range(50)])
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        before = (await client.get("/summary")).json()
+        await _seed_source([{"title": "Latest record", "created_at": _day(1)}])
+        await client.post("/ingest", json={"title": "Latest record", "created_at": _day(1).isoformat()})
+        await main.ingest_buffer.flush_now()
+        after = (await client.get("/summary")).json()
+
+    assert (before["totalRecords"], after["totalRecords"]) == (50, 51)
+    for name in (TOTALS_COLLECTION, DAILY_COLLECTION, "analytics_terms_daily", "analytics_terms_total"):
+        assert await main.db[name].count_documents({}) == 0
+    assert await main.db["analytics_events"].count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_swaps_rows_in_without_an_empty_window(monkeypatch):
+    await _seed_source([{"title": "Seed", "created_at": _day(0)}])
+    daily = main.db[DAILY_COLLECTION]
+    await daily.create_index([("source", 1), ("day", 1)], name="source_day", unique=True)
+    await main.db[TOTALS_COLLECTION].insert_many([{"_id": main.SOURCE_COLLECTION, "count": 0}, {"_id": "other_source", "count": 0}])
+    await apply_events(main.db, main.SOURCE_COLLECTION, ["2026-02-01"])  # stale row
+    await apply_events(main.db, "other_source", ["2026-03-01"])
+
+    staging = main.db[DAILY_COLLECTION + "_rebuild"]
+    seen_during_rebuild = []
+    original_insert = staging.insert_many
+
+    async def watch_live(docs, **kwargs):
+        seen_during_rebuild.append(await daily.count_documents({"source": main.SOURCE_COLLECTION}))
+        return await original_insert(docs, **kwargs)
+
+    monkeypatch.setattr(staging, "insert_many", watch_live)
+    await rebuild(main.db, main.SOURCE_COLLECTION)
+
+    assert seen_during_rebuild == [1]
+    rows = {(d["source"], d["day"]) for d in await daily.find({}).to_list(None)}
+    assert rows == {(main.SOURCE_COLLECTION, "2026-03-01"), ("other_source", "2026-03-01")}
+    assert "source_day" in await daily.index_information()
+
+
+@pytest.mark.asyncio
+async def test_top_terms_follow_the_requested_window():
+    now = datetime.now(timezone.utc)
+    await _seed_source([
+        {"title": "Essay outline", "created_at": now - timedelta(days=60)},
+        {"title": "Essay draft", "created_at": now - timedelta(days=60)},
+        {"title": "Lab draft", "created_at": now - timedelta(days=10)},
+    ])
+    await rebuild(main.db, main.SOURCE_COLLECTION)
+
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.post("/ingest", json={"title": "Lab report for the lab", "created_at": now.isoformat()})
+        await main.ingest_buffer.flush_now()
+        windows = {w: (await client.get("/summary", params={"window": w})).json() for w in ("7d", "30d", "all")}
+        bad = await client.get("/summary", params={"window": "1y"})
+
+    def terms(body):
+        return {t["term"]: t["count"] for t in body["topTerms"]}
+
+    assert terms(windows["7d"]) == {"lab": 2, "report": 1}
+    assert terms(windows["30d"]) == {"lab": 3, "report": 1, "draft": 1}
+    assert terms(windows["all"])["essay"] == 2 and terms(windows["all"])["draft"] == 2
+    assert windows["all"]["topTerms"][0] == {"term": "lab", "count": 3}
+    assert "the" not in terms(windows["all"]) and "for" not in terms(windows["all"])
+    assert bad.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_summary_count_mode_is_reported():
+    await _seed_source([{"title": f"Doc {n}", "created_at": _day(n % 3)} for n in range(4)])
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        exact = (await client.get("/summary")).json()
+        estimated = (await client.get("/summary", params={"count_mode": "estimated"})).json()
+        bad = await client.get("/summary", params={"count_mode": "approximate"})
+
+    assert exact["countsExact"] is True and exact["totalRecords"] == 4
+    assert estimated["countsExact"] is False and estimated["totalRecords"] == 4
+    assert estimated["dailyIngest"] == exact["dailyIngest"]
+    assert bad.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ingest_applies_backpressure_when_buffer_full():
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        ok = await client.post("/ingest/batch", json=[{"title": f"e{n}"} for n in range(5)])
+        full = await client.post("/ingest", json={"title": "one too many"})
+    assert ok.status_code == 202
+    assert full.status_code == 429
+    assert "retry-after" in full.headers
+
+
+@pytest.mark.asyncio
+async def test_partial_flush_counts_landed_rows_and_drops_a_poison_event(monkeypatch):
+    from pymongo.errors import BulkWriteError
+
+    await rebuild(main.db, main.SOURCE_COLLECTION)
+    events = main.db["analytics_events"]
+    insert_many = events.insert_many
+
+    async def reject_poison(docs, ordered=True, **kwargs):
+        bad = [i for i, doc in enumerate(docs) if doc["title"] == "poison"]
+        await insert_many([doc for i, doc in enumerate(docs) if i not in bad], ordered=ordered)
+        if bad:
+            errors = [{"index": i, "code": 121, "errmsg": "Document failed validation"} for i in bad]
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(bad)})
+
+    monkeypatch.setattr(events, "insert_many", reject_poison)
+    buffer = WriteBehindBuffer(main._persist_events, flush_size=100, max_attempts=3, retryable=main._is_transient)
+    monkeypatch.setattr(main, "ingest_buffer", buffer)
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.post("/ingest/batch", json=[{"title": "good one"}, {"title": "poison"}, {"title": "good two"}])
+        await buffer.flush_now()
+        await client.post("/ingest", json={"title": "after"})
+        await buffer.flush_now()
+        summary = (await client.get("/summary")).json()
+
+    assert summary["totalRecords"] == 3
+    assert await events.count_documents({}) == 3
+    assert (buffer.stats()["flushed"], buffer.stats()["dropped"], buffer.pending) == (3, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_rows_landed_before_a_network_error_are_counted_on_retry(monkeypatch):
+    from pymongo.errors import AutoReconnect
+
+    await rebuild(main.db, main.SOURCE_COLLECTION)
+    events = main.db["analytics_events"]
+    insert_many = events.insert_many
+    calls = 0
+
+    async def drop_connection_once(docs, ordered=True, **kwargs):
+        nonlocal calls
+        calls += 1
+        await insert_many(docs, ordered=ordered)
+        if calls == 1:
+            raise AutoReconnect("connection reset after the batch was written")
+
+    monkeypatch.setattr(events, "insert_many", drop_connection_once)
+    buffer = WriteBehindBuffer(main._persist_events, flush_size=100, max_attempts=1, retryable=main._is_transient)
+    monkeypatch.setattr(main, "ingest_buffer", buffer)
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.post("/ingest/batch", json=[{"title": "first"}, {"title": "second"}])
+        await buffer.flush_now()
+        summary = (await client.get("/summary")).json()
+        hourly = (await client.get("/events/hourly")).json()
+
+    assert calls == 2 and buffer.stats()["dropped"] == 0
+    assert summary["totalRecords"] == 2
+    assert [h["count"] for h in hourly["items"]] == [2]
+
+
+@pytest.mark.asyncio
+async def test_summary_cache_follows_the_data_version():
+    await _seed_source([{"title": "Cached", "created_at": _day(0)}])
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.get("/summary")
+        cached = (await client.get("/summary")).json()
+        await _seed_source([{"title": "New version", "created_at": _day(0)}])
+        fresh = (await client.get("/summary")).json()
+    assert cached["totalRecords"] == 1 and fresh["totalRecords"] == 2
+    stats = main.summary_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_summary_is_served_stale_while_a_flush_refreshes_it(monkeypatch):
+    monkeypatch.setattr(main, "summary_cache", SWRCache(ttl_s=60, stale_s=60))
+    computed = 0
+    compute_summary = main._compute_summary
+
+    async def counting(*args, **kwargs):
+        nonlocal computed
+        computed += 1
+        return await compute_summary(*args, **kwargs)
+
+    monkeypatch.setattr(main, "_compute_summary", counting)
+    await _seed_source([{"title": "Seed", "created_at": _day(0)}])
+    await rebuild(main.db, main.SOURCE_COLLECTION)
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        first = await client.get("/summary")
+        await client.post("/ingest", json={"title": "Flushed", "created_at": _day(0).isoformat()})
+        await main.ingest_buffer.flush_now()
+        burst = await asyncio.gather(*(client.get("/summary") for _ in range(5)))
+        while main.summary_cache.stats()["inflight"]:
+            await asyncio.sleep(0)
+        refreshed = await client.get("/summary")
+
+    # the burst gets the previous body at once, tagged with its own version
+    assert {(r.json()["totalRecords"], r.headers["etag"]) for r in burst} == {(1, first.headers["etag"])}
+    assert refreshed.json()["totalRecords"] == 2 and refreshed.headers["etag"] != first.headers["etag"]
+    assert computed == 2
+    stats = main.summary_cache.stats()
+    assert (stats["misses"], stats["staleHits"], stats["hits"]) == (1, 5, 1)
+
+
+@pytest.mark.asyncio
+async def test_events_lists_newest_first():
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.post("/ingest", json={"title": "older"})
+        await client.post("/ingest", json={"title": "newer"})
+        await main.ingest_buffer.flush_now()
+        body = (await client.get("/events", params={"limit": 10})).json()
+    assert [e["title"] for e in body["items"]] == ["newer", "older"]
+    assert isinstance(body["items"][0]["_id"], str)
+
+
+@pytest.mark.asyncio
+async def test_events_pages_by_cursor_and_caps_limit():
+    same_instant = _day(0)
+    await main.db["analytics_events"].insert_many(
+        [{"title": f"e{n}", "kind": "record_created", "received_at": same_instant if n < 3 else _day(n)} for n in range(5)]
+    )
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        pages, after = [], None
+        while True:
+            body = (await client.get("/events", params={"limit": 2, **({"after": after} if after else {})})).json()
+            pages.append([e["title"] for e in body["items"]])
+            after = body["nextCursor"]
+            if after is None:
+                break
+        too_many = await client.get("/events", params={"limit": main.EVENTS_LIMIT_MAX + 1})
+        bad_cursor = await client.get("/events", params={"after": "not-a-cursor"})
+
+    # ties on received_at are broken by _id, so no event is repeated or skipped across pages
+    assert pages == [["e4", "e3"], ["e2", "e1"], ["e0"]]
+    assert too_many.status_code == 422
+    assert bad_cursor.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_retention_ttl_reconciles_and_hourly_counts_outlive_events():
+    from app.indexes import index_specs, reconcile
+    from app.retention import ttl_seconds
+
+    specs = index_specs(events_ttl_s=ttl_seconds(30), hourly_ttl_s=ttl_seconds(400))
+    await reconcile(main.db, specs)
+    shorter = index_specs(events_ttl_s=ttl_seconds(7), hourly_ttl_s=ttl_seconds(400))
+    outcome = await reconcile(main.db, shorter)
+    assert outcome["analytics_events.received_at_desc"] == "updated"
+    assert {v for k, v in outcome.items() if k != "analytics_events.received_at_desc"} == {"unchanged"}
+
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.post("/ingest/batch", json=[{"title": "a"}, {"title": "b", "kind": "viewed"}, {"title": "c"}])
+        await main.ingest_buffer.flush_now()
+        removed = await main.db.expire_ttl(now=main._utc_now() + timedelta(days=8))
+        events = (await client.get("/events")).json()
+        hourly = (await client.get("/events/hourly")).json()
+
+    assert removed == 3 and events["items"] == []
+    assert sorted((h["kind"], h["count"]) for h in hourly["items"]) == [("record_created", 2), ("viewed", 1)]
+    assert ttl_seconds(0) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_coalesces_concurrent_misses():
+    import asyncio
+
+    cache = SWRCache(ttl_s=60, stale_s=0)
+    calls = 0
+
+    async def compute() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(cache.get("k", "v1", compute) for _ in range(10)))
+    assert results == [(1, "v1")] * 10
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_cache_keeps_the_newest_refresh_when_an_older_one_finishes_last():
+    import asyncio
+
+    cache = SWRCache(ttl_s=60, stale_s=0)
+
+    def value_after(delay: float, value: str):
+        async def compute() -> str:
+            await asyncio.sleep(delay)
+            return value
+        return compute
+
+    slow = asyncio.create_task(cache.get("k", "v1", value_after(0.05, "old")))
+    await asyncio.sleep(0)
+    assert await cache.get("k", "v2", value_after(0, "new")) == ("new", "v2")
+    assert await slow == ("old", "v1")
+    assert await cache.get("k", "v2", value_after(0, "unused")) == ("new", "v2")
+
+
+@pytest.mark.asyncio
+async def test_metrics_exposes_routes_and_buffer_depth():
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.post("/ingest", json={"title": "queued"})
+        response = await client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="POST",route="/ingest",status="202"}' in body
+    assert 'analytics_ingest_buffer{state="pending"} 1' in body
+    assert "# TYPE mongodb_command_duration_seconds histogram" in body
+
+
+@pytest.mark.asyncio
+async def test_query_plans_are_indexed_after_reconcile():
+    from app.indexes import index_specs, reconcile
+
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        before = (await client.get("/admin/query-plans")).json()
+        outcome = await reconcile(main.db, index_specs())
+        after = (await client.get("/admin/query-plans")).json()
+        # the source collection's index is the backend's to create
+        await main.db[main.SOURCE_COLLECTION].create_index([("created_at", -1), ("_id", -1)], name="created_at_id_desc")
+        with_backend = (await client.get("/admin/query-plans")).json()
+
+    assert "list_events" in before["notIndexed"]
+    assert set(outcome.values()) == {"created"}
+    assert not any(key.startswith(f"{main.SOURCE_COLLECTION}.") for key in outcome)
+    assert after["notIndexed"] == ["summary_recent_titles", "summary_range"]
+    assert with_backend["notIndexed"] == []
+
+
+@pytest.mark.asyncio
+async def test_ingest_stores_dates_and_ranges_filter_by_them():
+    await rebuild(main.db, main.SOURCE_COLLECTION)
+    await _seed_source([
+        {"title": "Early lab", "created_at": _day(0)},
+        {"title": "Later lab", "created_at": _day(2)},
+    ])
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.post("/ingest/batch", json=[
+            {"title": "Early lab", "created_at": "2026-03-01T12:00:00Z"},
+            {"title": "Later lab", "created_at": "2026-03-03T12:00:00+00:00"},
+            {"title": "No date"},
+        ])
+        await main.ingest_buffer.flush_now()
+        stored = [d async for d in main.db["analytics_events"].find({})]
+        assert all(isinstance(d["created_at"], datetime) for d in stored)
+
+        await main.db["analytics_events"].update_one({"title": "Early lab"}, {"$set": {"received_at": _day(-10)}})
+        events = (await client.get("/events", params={"from": _day(-1).isoformat()})).json()
+        summary = (await client.get("/summary", params={"from": "2026-03-02T00:00:00Z", "to": "2026-03-04T00:00:00Z"})).json()
+
+    assert sorted(e["title"] for e in events["items"]) == ["Later lab", "No date"]
+    assert summary["totalRecords"] == 1 and summary["countsExact"] is True
+    assert summary["dailyIngest"] == [{"date": "2026-03-03", "count": 1}]
+    assert summary["topTerms"] == [{"term": "lab", "count": 1}, {"term": "later", "count": 1}]
+
+
+@pytest.mark.asyncio
+async def test_migrate_dates_converts_strings_in_batches():
+    from app.migrate_dates import migrate_collection
+
+    coll = main.db["analytics_events"]
+    await coll.insert_many([{"title": f"e{n}", "created_at": f"2026-03-0{n + 1}T00:00:00Z"} for n in range(5)])
+    await coll.insert_one({"title": "bad", "created_at": "not a date"})
+
+    assert await migrate_collection(coll, batch_size=2, dry_run=True) == {"converted": 5, "unparsable": 1}
+    assert await coll.count_documents({"created_at": {"$type": "date"}}) == 0
+    assert await migrate_collection(coll, batch_size=2) == {"converted": 5, "unparsable": 1}
+    assert await coll.count_documents({"created_at": {"$type": "date"}}) == 5
+    assert await migrate_collection(coll, batch_size=2) == {"converted": 0, "unparsable": 1}
+
+
+@pytest.mark.asyncio
+async def test_reads_follow_configured_read_preferences(monkeypatch):
+    from app.read_routing import route_table
+
+    monkeypatch.setattr(main, "READ_ROUTES", route_table("secondary", {"summary": None, "events": "nearest"}, 90))
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        await client.get("/summary")
+        summary_pref = main.db.read_preference
+        await client.get("/events")
+        events_pref = main.db.read_preference
+        health = (await client.get("/health")).json()
+
+    assert summary_pref.document == {"mode": "secondary", "maxStalenessSeconds": 90}
+    assert events_pref.document == {"mode": "nearest", "maxStalenessSeconds": 90}
+    assert health["readRouting"]["summary"]["mode"] == "secondary"
+
+
+@pytest.mark.asyncio
+async def test_summary_answers_conditional_gets():
+    await _seed_source([{"title": "Seed", "created_at": _day(0)}])
+    await rebuild(main.db, main.SOURCE_COLLECTION)
+    async with AsyncClient(app=main.app, base_url=TEST_BASE_URL) as client:
+        first = await client.get("/summary")
+        etag = first.headers["etag"]
+        again = await client.get("/summary", headers={"If-None-Match": etag})
+        other_window = await client.get("/summary", params={"window": "7d"}, headers={"If-None-Match": etag})
+
+        await client.post("/ingest", json={"title": "Fresh", "created_at": _day(1).isoformat()})
+        await main.ingest_buffer.flush_now()
+        after_flush = await client.get("/summary", headers={"If-None-Match": etag})
+        # a revalidation carrying only a date, made in the same second as the flush
+        since_only = await client.get("/summary", headers={"If-Modified-Since": format_datetime(main._utc_now(), usegmt=True)})
+
+    assert "last-modified" not in first.headers and first.headers["cache-control"] == "public, no-cache"
+    assert since_only.status_code == 200
+    assert again.status_code == 304 and again.content == b""
+    assert other_window.status_code == 200
+    assert after_flush.status_code == 200 and after_flush.json()["totalRecords"] == 2
+
+
+def test_settings_read_the_environment_when_built(monkeypatch):
+    from app.config import Settings
+
+    from app.db_async import pool_options
+
+    monkeypatch.setenv("ANALYTICS_WORKERS", "4")
+    monkeypatch.setenv("ANALYTICS_MONGODB_MAX_POOL_SIZE", "8")
+    monkeypatch.setenv("ANALYTICS_MONGODB_MAX_IDLE_TIME_MS", "60000")
+    monkeypatch.setenv("ANALYTICS_MONGODB_COMPRESSORS", "zstd, zlib")
+    monkeypatch.delenv("MONGODB_URI")
+    settings = Settings()
+    assert settings.workers == 4
+    assert pool_options(settings) == {
+        "maxPoolSize": 8, "minPoolSize": 2, "maxIdleTimeMS": 60000, "compressors": ["zstd", "zlib"]
+    }
+    with pytest.raises(RuntimeError):
+        settings.mongodb_uri
+
+
+@pytest.mark.asyncio
+async def test_lifespan_owns_a_client_per_worker(monkeypatch):
+    from mongo_standin import InMemoryClient
+
+    created: List[InMemoryClient] = []
+
+    def _create(_settings: Any) -> InMemoryClient:
+        created.append(InMemoryClient())
+        return created[-1]
+
+    monkeypatch.setattr(main, "create_client", _create)
+    monkeypatch.setattr(main, "client", None)
+    async with main.lifespan(main.app):
+        assert main.db is created[0].get_default_database()
+        assert "received_at_desc" in await main.db["analytics_events"].index_information()
+    assert len(created) == 1 and main.client is None
@@ -0,0 +1,17 @@
+import pytest
+from benchkit import load_baseline, run_suite
+
+from app import main
+from bench.suite import BASELINE, build
+
+
+@pytest.mark.asyncio
+async def test_analytics_suite_runs_offline():
+    try:
+        results = await run_suite(build, sizes=[50], requests=5, concurrency=2)
+    finally:
+        await main.ingest_buffer.stop()
+    assert {r["name"] for r in results} == {"summary@50", "ingest@50"}
+    assert all(r["errors"] == 0 for r in results)
+    # a scenario without a committed baseline is never gated
+    assert {name.split("@")[0] for name in load_baseline(BASELINE)} == {r["name"].split("@")[0] for r in results}
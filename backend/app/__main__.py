@@ -1,4 +1,29 @@
+"""Production server: ``python -m app``.
+
+With ``BACKEND_WORKERS`` (or ``WEB_CONCURRENCY``) above 1, uvicorn runs a
+supervisor that forks that many workers on one socket. Each worker opens its
+own Mongo client and analytics connection pool in the app lifespan, after the
+fork. Send the supervisor SIGHUP for a rolling restart: workers are replaced
+one at a time, each finishing in-flight requests (up to the graceful shutdown
+timeout) and flushing queued analytics events. SIGTTIN / SIGTTOU add or
+remove a worker.
+"""
 import uvicorn
 
+from .config import get_settings
+
+
+def main() -> None:
+    settings = get_settings()
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+        reload=False,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
+    main()
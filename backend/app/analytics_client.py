@@ -0,0 +1,123 @@
+# backend/app/analytics_client.py
+"""Shared HTTP client and fire-and-forget event delivery to analytics.
+
+One keep-alive pooled ``httpx.AsyncClient`` is opened in the app lifespan and
+reused by every call to the analytics service. Record events are put on a
+bounded in-memory queue and a single worker delivers them in batches, so a
+slow or unavailable analytics service never adds latency to the request that
+produced the event. When the queue is full new events are dropped (and
+counted) rather than blocking writers; analytics can be reconciled with its
+rollup rebuild.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .config import Settings
+from .responses import dumps
+
+log = logging.getLogger(__name__)
+
+
+def build_http_client(settings: Settings, **kwargs: Any) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.analytics_pool_max_connections,
+        max_keepalive_connections=settings.analytics_pool_max_keepalive,
+        keepalive_expiry=settings.analytics_keepalive_expiry_seconds,
+    )
+    return httpx.AsyncClient(
+        base_url=settings.analytics_url,
+        timeout=settings.analytics_timeout_seconds,
+        limits=limits,
+        **kwargs,
+    )
+
+
+class AnalyticsEmitter:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        queue_size: int = 1000,
+        batch_size: int = 50,
+        flush_interval_s: float = 0.5,
+    ):
+        self._client = client
+        self._queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=queue_size)
+        self._batch_size = max(1, batch_size)
+        self._flush_interval_s = flush_interval_s
+        self._worker: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def emit(self, event: Dict[str, Any]) -> bool:
+        """Queue an event without waiting; returns False if it had to be dropped."""
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(), name="analytics-emitter")
+
+    async def stop(self, drain_timeout_s: float = 5.0) -> None:
+        """Deliver what is already queued (bounded by ``drain_timeout_s``), then stop."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout_s)
+        except asyncio.TimeoutError:
+            log.warning("Dropping %d undelivered analytics events on shutdown", self._queue.qsize())
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "sent": self.sent, "failed": self.failed, "dropped": self.dropped}
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._flush_interval_s
+        while len(batch) < self._batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        # one POST per batch; analytics buffers it and persists with insert_many
+        try:
+            response = await self._client.post(
+                "/ingest/batch", content=dumps(batch), headers={"Content-Type": "application/json"}
+            )
+            detail = f"HTTP {response.status_code}"
+            ok = response.is_success
+        except httpx.HTTPError as e:
+            detail, ok = str(e), False
+        if ok:
+            self.sent += len(batch)
+        else:
+            self.failed += len(batch)
+            log.warning("Analytics delivery of %d events failed: %s", len(batch), detail)
@@ -0,0 +1,62 @@
+# backend/app/conditional.py
+"""Conditional GET: cheap validators, ETag / Last-Modified and 304s.
+
+A validator is a short string that changes whenever the data behind a
+response may have changed (for assignments: the document count and newest
+``_id``, read concurrently from metadata and an index). The ETag hashes it with the request path and normalized query, so a
+matching ``If-None-Match`` can be answered with 304 before the real query
+runs.
+
+``Cache-Control: public, no-cache`` lets browsers keep the body but
+revalidate every time. ``X-Accel-Expires`` lets nginx micro-cache the
+response for a few seconds; nginx strips that header before it reaches the
+client.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from starlette.datastructures import Headers
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # pymongo returns naive UTC datetimes unless the client is tz_aware
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def make_etag(version: str, path: str, query: Iterable[Tuple[str, str]]) -> str:
+    raw = "|".join([version, path, *(f"{k}={v}" for k, v in sorted(query))])
+    # weak: nginx may gzip the body, which must not invalidate the tag
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(headers: Headers, etag: str, last_modified: Optional[datetime]) -> bool:
+    """RFC 9110: If-None-Match (weak comparison) wins; If-Modified-Since only without it."""
+    inm = headers.get("if-none-match")
+    if inm is not None:
+        if inm.strip() == "*":
+            return True
+        return _strip_weak(etag) in {_strip_weak(t) for t in inm.split(",")}
+    ims = headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime], shared_max_age_s: int) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    if shared_max_age_s > 0:
+        headers["X-Accel-Expires"] = str(shared_max_age_s)
+    return headers
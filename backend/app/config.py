@@ -1,8 +1,11 @@
 # backend/app/config.py
 from functools import lru_cache
+from typing import Literal, Optional
 from pydantic import Field, AliasChoices
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+ReadMode = Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"]
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -19,6 +22,38 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("MONGODB_DIRECT_CONNECTION", "BACKEND_MONGODB_DIRECT_CONNECTION"),
     )
 
+    # Connection pool per worker process (see db.py): at most 100 connections (the driver's
+    # default) and at least 2 (the driver defaults to 0); warm_pool opens the minimum at startup.
+    # Idle time and wait-queue timeout keep the driver defaults while unset.
+    mongodb_max_pool_size: int = Field(
+        default=100,
+        ge=1,
+        validation_alias=AliasChoices("MONGODB_MAX_POOL_SIZE", "BACKEND_MONGODB_MAX_POOL_SIZE"),
+    )
+    mongodb_min_pool_size: int = Field(
+        default=2,
+        ge=0,
+        description="Connections kept open, and opened in the lifespan before serving",
+        validation_alias=AliasChoices("MONGODB_MIN_POOL_SIZE", "BACKEND_MONGODB_MIN_POOL_SIZE"),
+    )
+    mongodb_max_idle_time_ms: Optional[int] = Field(
+        default=None,
+        ge=0,
+        validation_alias=AliasChoices("MONGODB_MAX_IDLE_TIME_MS", "BACKEND_MONGODB_MAX_IDLE_TIME_MS"),
+    )
+    mongodb_wait_queue_timeout_ms: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Fail a request after this long waiting for a free connection",
+        validation_alias=AliasChoices("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "BACKEND_MONGODB_WAIT_QUEUE_TIMEOUT_MS"),
+    )
+    # Wire compression in preference order, e.g. "zstd,snappy,zlib"; "" sends uncompressed.
+    # snappy and zstd need python-snappy / zstandard installed, otherwise the driver skips them.
+    mongodb_compressors: str = Field(
+        default="",
+        validation_alias=AliasChoices("MONGODB_COMPRESSORS", "BACKEND_MONGODB_COMPRESSORS"),
+    )
+
     # Service name (used by /health)
     service_name: str = Field(
         default="backend",
@@ -37,6 +72,119 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("ANALYTICS_TIMEOUT_SECONDS", "BACKEND_ANALYTICS_TIMEOUT_SECONDS"),
     )
 
+    # Shared keep-alive pool for calls to analytics
+    analytics_pool_max_connections: int = Field(
+        default=20,
+        validation_alias=AliasChoices("ANALYTICS_POOL_MAX_CONNECTIONS", "BACKEND_ANALYTICS_POOL_MAX_CONNECTIONS"),
+    )
+    analytics_pool_max_keepalive: int = Field(
+        default=10,
+        validation_alias=AliasChoices("ANALYTICS_POOL_MAX_KEEPALIVE", "BACKEND_ANALYTICS_POOL_MAX_KEEPALIVE"),
+    )
+    analytics_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        validation_alias=AliasChoices("ANALYTICS_KEEPALIVE_EXPIRY_SECONDS", "BACKEND_ANALYTICS_KEEPALIVE_EXPIRY_SECONDS"),
+    )
+
+    # Record-created events: bounded queue, delivered in batches off the request path
+    analytics_events_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("ANALYTICS_EVENTS_ENABLED", "BACKEND_ANALYTICS_EVENTS_ENABLED"),
+    )
+    analytics_queue_size: int = Field(
+        default=1000,
+        validation_alias=AliasChoices("ANALYTICS_QUEUE_SIZE", "BACKEND_ANALYTICS_QUEUE_SIZE"),
+    )
+    analytics_batch_size: int = Field(
+        default=50,
+        validation_alias=AliasChoices("ANALYTICS_BATCH_SIZE", "BACKEND_ANALYTICS_BATCH_SIZE"),
+    )
+    analytics_flush_interval_seconds: float = Field(
+        default=0.5,
+        validation_alias=AliasChoices("ANALYTICS_FLUSH_INTERVAL_SECONDS", "BACKEND_ANALYTICS_FLUSH_INTERVAL_SECONDS"),
+    )
+
+    # Documents per cursor batch when streaming /assignments/export
+    export_batch_size: int = Field(
+        default=1000,
+        validation_alias=AliasChoices("EXPORT_BATCH_SIZE", "BACKEND_EXPORT_BATCH_SIZE"),
+    )
+
+    # Seconds nginx may micro-cache list/search responses (X-Accel-Expires); 0 disables
+    http_cache_seconds: int = Field(
+        default=2,
+        validation_alias=AliasChoices("HTTP_CACHE_SECONDS", "BACKEND_HTTP_CACHE_SECONDS"),
+    )
+
+    # Read routing: default mode plus optional per-endpoint overrides (see read_routing.py)
+    read_preference: ReadMode = Field(
+        default="primary",
+        validation_alias=AliasChoices("READ_PREFERENCE", "BACKEND_READ_PREFERENCE"),
+    )
+    read_max_staleness_seconds: int = Field(
+        default=-1,
+        description="-1 for no bound, otherwise >= 90",
+        validation_alias=AliasChoices("READ_MAX_STALENESS_SECONDS", "BACKEND_READ_MAX_STALENESS_SECONDS"),
+    )
+    read_preference_list: Optional[ReadMode] = Field(
+        default=None,
+        validation_alias=AliasChoices("READ_PREFERENCE_LIST", "BACKEND_READ_PREFERENCE_LIST"),
+    )
+    read_preference_search: Optional[ReadMode] = Field(
+        default=None,
+        validation_alias=AliasChoices("READ_PREFERENCE_SEARCH", "BACKEND_READ_PREFERENCE_SEARCH"),
+    )
+    read_preference_export: Optional[ReadMode] = Field(
+        default=None,
+        validation_alias=AliasChoices("READ_PREFERENCE_EXPORT", "BACKEND_READ_PREFERENCE_EXPORT"),
+    )
+
+    # In-process LRU of list/search pages; a size or TTL of 0 disables it
+    result_cache_size: int = Field(
+        default=512,
+        ge=0,
+        validation_alias=AliasChoices("RESULT_CACHE_SIZE", "BACKEND_RESULT_CACHE_SIZE"),
+    )
+    result_cache_ttl_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        validation_alias=AliasChoices("RESULT_CACHE_TTL_SECONDS", "BACKEND_RESULT_CACHE_TTL_SECONDS"),
+    )
+
+    # How often /assignments/suggest picks up titles written by other workers
+    suggest_sync_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        validation_alias=AliasChoices("SUGGEST_SYNC_SECONDS", "BACKEND_SUGGEST_SYNC_SECONDS"),
+    )
+
+    # Background read-only dependency probe for /connectivity-test?cached=1; 0 disables
+    connectivity_probe_interval_seconds: float = Field(
+        default=0.0,
+        ge=0,
+        validation_alias=AliasChoices("CONNECTIVITY_PROBE_INTERVAL_SECONDS", "BACKEND_CONNECTIVITY_PROBE_INTERVAL_SECONDS"),
+    )
+
+    # `python -m app` server: worker processes (WEB_CONCURRENCY is uvicorn's convention), bind, drain time
+    workers: int = Field(
+        default=1,
+        ge=1,
+        validation_alias=AliasChoices("BACKEND_WORKERS", "WEB_CONCURRENCY"),
+    )
+    host: str = Field(
+        default="0.0.0.0",
+        validation_alias=AliasChoices("BACKEND_HOST"),
+    )
+    port: int = Field(
+        default=8000,
+        validation_alias=AliasChoices("BACKEND_PORT"),
+    )
+    graceful_shutdown_seconds: int = Field(
+        default=20,
+        description="How long a stopping worker may finish in-flight requests",
+        validation_alias=AliasChoices("GRACEFUL_SHUTDOWN_SECONDS", "BACKEND_GRACEFUL_SHUTDOWN_SECONDS"),
+    )
+
 @lru_cache
 def get_settings() -> Settings:
     return Settings()
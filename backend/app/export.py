@@ -0,0 +1,74 @@
+# backend/app/export.py
+"""Streaming NDJSON/CSV export of assignments.
+
+Rows are pulled from the Motor cursor batch by batch and encoded straight
+into small chunks, so memory stays flat no matter how many documents match.
+The sort must come from the index that serves the filter, or the server
+buffers the whole range for a blocking SORT (``export_sort``).
+"""
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Literal, Tuple
+
+from .responses import dumps
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_FIELDS = ("id", "title", "content", "createdAt")
+# only what the export needs comes over the wire
+EXPORT_PROJECTION = {"title": 1, "content": 1, "created_at": 1}
+
+# flush encoded rows to the client once roughly this many bytes are pending
+_CHUNK_BYTES = 64 * 1024
+
+
+def date_range_filter(start: datetime | None, end: datetime | None) -> Dict[str, Any]:
+    """``created_at`` filter for an inclusive ``start`` / exclusive ``end`` range."""
+    bounds: Dict[str, Any] = {}
+    if start is not None:
+        bounds["$gte"] = _as_utc(start)
+    if end is not None:
+        bounds["$lt"] = _as_utc(end)
+    return {"created_at": bounds} if bounds else {}
+
+
+def export_sort(start: datetime | None, end: datetime | None) -> List[Tuple[str, int]]:
+    """Oldest first: ``_id`` order for a full export, ``created_at_id_desc`` order (read backwards) for a range."""
+    if start is None and end is None:
+        return [("_id", 1)]
+    return [("created_at", 1), ("_id", 1)]
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    ca = doc.get("created_at")
+    return {
+        "id": str(doc["_id"]),
+        "title": doc.get("title", ""),
+        "content": doc.get("content", ""),
+        "createdAt": _as_utc(ca).isoformat().replace("+00:00", "Z") if isinstance(ca, datetime) else None,
+    }
+
+
+async def stream_rows(cursor, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS) if fmt == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+    async for doc in cursor:
+        if writer is not None:
+            writer.writerow(_row(doc))
+        else:
+            buf.write(dumps(_row(doc)).decode("utf-8"))
+            buf.write("\n")
+        if buf.tell() >= _CHUNK_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
@@ -0,0 +1,178 @@
+# backend/app/indexes.py
+"""Declarative index registry and query-plan checks.
+
+``INDEXES`` lists every index the backend's queries rely on. ``reconcile``
+runs in the lifespan: missing indexes are created, an index whose keys no
+longer match its spec is dropped and rebuilt, superseded ones listed in
+``RETIRED_INDEXES`` are dropped, and failures are reported instead of
+keeping the API down.
+
+``HOT_QUERIES`` mirrors the finds issued by the busiest endpoints;
+``explain_queries`` runs ``explain`` on each and flags plans that scan the
+collection or sort in memory (served by ``GET /admin/query-plans``).
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import DESCENDING
+from pymongo.errors import OperationFailure
+
+from .export import date_range_filter, export_sort
+from .search import TEXT_INDEX_KEYS, TEXT_INDEX_NAME, TEXT_INDEX_WEIGHTS, build_query
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, Any], ...]
+    name: str
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_text(self) -> bool:
+        return any(direction == "text" for _, direction in self.keys)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Tuple[Tuple[str, Any], ...] = ()
+    projection: Optional[Dict[str, Any]] = None
+    limit: int = 0
+    # set when sorting the matched set is inherent (e.g. $text); only a scan is a regression then
+    sort_after_match: bool = False
+
+
+INDEXES: List[IndexSpec] = [
+    # ranged exports stream in (created_at, _id) order; also "newest first" reads by creation time
+    IndexSpec("assignments", (("created_at", DESCENDING), ("_id", DESCENDING)), "created_at_id_desc"),
+    IndexSpec(
+        "assignments",
+        tuple(TEXT_INDEX_KEYS),
+        TEXT_INDEX_NAME,
+        {"weights": TEXT_INDEX_WEIGHTS, "default_language": "english"},
+    ),
+]
+
+# (collection, name) of indexes a spec above replaced
+RETIRED_INDEXES: List[Tuple[str, str]] = [
+    ("assignments", "created_at_desc"),  # single-field; ranged exports had to sort in memory
+]
+
+
+def _search(name: str, q: str, order: str) -> HotQuery:
+    query = build_query(q, "text", order)
+    return HotQuery(name, "assignments", query["filter"], tuple(query["sort"]), query["projection"], 25, True)
+
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("list_assignments", "assignments", {}, (("_id", DESCENDING),), None, 51),
+    _search("search_text_relevance", "report", "relevance"),
+    _search("search_text_recent", "report", "recent"),
+    HotQuery(
+        "export_by_created_at",
+        "assignments",
+        date_range_filter(datetime(2024, 1, 1, tzinfo=timezone.utc), None),
+        tuple(export_sort(datetime(2024, 1, 1, tzinfo=timezone.utc), None)),
+    ),
+]
+
+
+async def ensure_index(db, spec: IndexSpec) -> str:
+    """Create ``spec``; returns "created", "unchanged", "updated" (TTL changed in place) or "rebuilt"."""
+    coll = db[spec.collection]
+    existing = (await coll.index_information()).get(spec.name)
+    if existing is not None:
+        # text indexes are stored as _fts/_ftsx keys, so only their name is comparable
+        if spec.is_text or tuple(tuple(k) for k in existing["key"]) == spec.keys:
+            ttl = spec.options.get("expireAfterSeconds")
+            if existing.get("expireAfterSeconds") == ttl:
+                return "unchanged"
+            if ttl is not None:
+                # collMod changes the expiry without rebuilding the index
+                await db.command({"collMod": spec.collection, "index": {"name": spec.name, "expireAfterSeconds": ttl}})
+                return "updated"
+        log.warning("Index %s.%s changed; rebuilding", spec.collection, spec.name)
+        await coll.drop_index(spec.name)
+        await coll.create_index(list(spec.keys), name=spec.name, **spec.options)
+        return "rebuilt"
+    await coll.create_index(list(spec.keys), name=spec.name, **spec.options)
+    return "created"
+
+
+async def reconcile(
+    db, specs: List[IndexSpec] = INDEXES, retired: List[Tuple[str, str]] = RETIRED_INDEXES
+) -> Dict[str, str]:
+    """Bring every index in ``specs`` up to date; maps ``collection.name`` to the outcome.
+
+    Retired indexes appear in the outcome ("dropped") only when one was found.
+    """
+    outcome: Dict[str, str] = {}
+    for spec in specs:
+        key = f"{spec.collection}.{spec.name}"
+        try:
+            outcome[key] = await ensure_index(db, spec)
+        except OperationFailure as e:
+            log.error("Could not ensure index %s: %s", key, e)
+            outcome[key] = f"error: {e}"[:200]
+    for collection, name in retired:
+        key = f"{collection}.{name}"
+        try:
+            if name in await db[collection].index_information():
+                await db[collection].drop_index(name)
+                outcome[key] = "dropped"
+        except OperationFailure as e:
+            # another worker may have dropped it first
+            log.warning("Could not drop retired index %s: %s", key, e)
+    return outcome
+
+
+def _stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = [plan]
+    for child_key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child_key), dict):
+            out.extend(_stages(plan[child_key]))
+    for child in plan.get("inputStages", []):
+        out.extend(_stages(child))
+    return out
+
+
+def summarize_plan(explained: Dict[str, Any], sort_after_match: bool = False) -> Dict[str, Any]:
+    planner = explained.get("queryPlanner", {})
+    stages = _stages(planner.get("winningPlan", {}))
+    names = [s.get("stage", "") for s in stages]
+    in_memory_sort = "SORT" in names
+    return {
+        "stages": names,
+        "indexes": sorted({s["indexName"] for s in stages if s.get("indexName")}),
+        "collectionScan": "COLLSCAN" in names,
+        "inMemorySort": in_memory_sort,
+        "indexed": "COLLSCAN" not in names and (sort_after_match or not in_memory_sort),
+    }
+
+
+async def explain_queries(db, queries: List[HotQuery] = HOT_QUERIES) -> Dict[str, Any]:
+    report: List[Dict[str, Any]] = []
+    for q in queries:
+        find: Dict[str, Any] = {"find": q.collection, "filter": q.filter}
+        if q.sort:
+            find["sort"] = dict(q.sort)
+        if q.projection:
+            find["projection"] = q.projection
+        if q.limit:
+            find["limit"] = q.limit
+        try:
+            explained = await db.command({"explain": find, "verbosity": "queryPlanner"})
+            report.append({"name": q.name, "collection": q.collection, **summarize_plan(explained, q.sort_after_match)})
+        except OperationFailure as e:
+            report.append({"name": q.name, "collection": q.collection, "indexed": False, "error": str(e)[:300]})
+    return {
+        "queries": report,
+        "notIndexed": [r["name"] for r in report if not r["indexed"]],
+    }
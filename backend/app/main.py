@@ -1,25 +1,114 @@
 # backend/app/main.py
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Awaitable, Callable, Dict, List
 
-import httpx
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Body, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from pymongo.errors import BulkWriteError
 
+from .analytics_client import AnalyticsEmitter, build_http_client
+from .conditional import is_not_modified, make_etag, validator_headers
 from .config import get_settings
+from .db import create_client, warm_pool
+from .export import EXPORT_PROJECTION, MEDIA_TYPES, ExportFormat, date_range_filter, export_sort, stream_rows
+from .indexes import explain_queries, reconcile
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, STARTUP_SECONDS, Gauge, MetricsMiddleware
+from .pagination import keyset_query, page_links
+from .probes import DependencyProber, analytics_health, analytics_ingest, mongo_ping, mongo_round_trip, run_probes, service_result
+from .read_routing import route_table
+from .result_cache import ResultCache
+from .responses import FastJSONResponse
+from .search import SCORE_FIELD, SearchMode, SearchOrder, build_query, normalize_terms
+from .suggest import SUGGEST_MAX, PrefixIndex, last_word
+from .write_version import read_write_version
+
+log = logging.getLogger(__name__)
 
 settings = get_settings()
 
-app = FastAPI(title="AnimoAssign Backend", version="1.0.0")
 
-# Async Mongo client; directConnection may be False in RS mode, True for single-node probes
-client = AsyncIOMotorClient(
-    settings.mongodb_uri,
-    directConnection=getattr(settings, "mongodb_direct_connection", False),
+# Mongo client, shared analytics HTTP pool and event queue; owned by the lifespan
+# below, so each uvicorn worker builds its own after the fork
+client = None
+db = None
+analytics_http = None
+emitter: AnalyticsEmitter | None = None
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global client, db, analytics_http, emitter
+    started = time.perf_counter()
+    client = create_client(settings)
+    db = client.get_default_database()
+    # open the pool's first connections now rather than on the first requests after a deploy
+    try:
+        log.info("Mongo pool warmed: %d connections", await warm_pool(client, settings.mongodb_min_pool_size))
+    except Exception as e:
+        log.warning("Could not warm the Mongo pool: %s", e)
+    # Indexes back the sorts and /assignments/search; a failure here should not keep the API down.
+    try:
+        log.info("Indexes: %s", await reconcile(db))
+    except Exception as e:
+        log.warning("Could not reconcile indexes: %s", e)
+
+    analytics_http = build_http_client(settings)
+    if settings.analytics_events_enabled:
+        emitter = AnalyticsEmitter(
+            analytics_http,
+            queue_size=settings.analytics_queue_size,
+            batch_size=settings.analytics_batch_size,
+            flush_interval_s=settings.analytics_flush_interval_seconds,
+        )
+        emitter.start()
+    prober.start()
+    suggest_index.start(db.assignments)
+    elapsed = time.perf_counter() - started
+    STARTUP_SECONDS.set((str(os.getpid()),), elapsed)
+    log.info("Worker %d ready in %.3fs", os.getpid(), elapsed)
+    try:
+        yield
+    finally:
+        await prober.stop()
+        await suggest_index.stop()
+        if emitter is not None:
+            await emitter.stop()
+            emitter = None
+        await analytics_http.aclose()
+        analytics_http = None
+        client.close()
+        client = db = None
+
+
+app = FastAPI(
+    title="AnimoAssign Backend",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
-db = client.get_default_database()
+
+# Read preference per read-heavy endpoint; writes always use the primary
+READ_ROUTES = route_table(
+    settings.read_preference,
+    {
+        "list": settings.read_preference_list,
+        "search": settings.read_preference_search,
+        "export": settings.read_preference_export,
+    },
+    settings.read_max_staleness_seconds,
+)
+
+# List/search pages, keyed by the data version and dropped on local writes (see result_cache.py)
+result_cache = ResultCache(settings.result_cache_size, settings.result_cache_ttl_seconds)
+
+# Title-word trie for /assignments/suggest; loaded and synced by the lifespan
+suggest_index = PrefixIndex(sync_interval_s=settings.suggest_sync_seconds)
 
 # ---------- Models ----------
 
@@ -32,29 +121,89 @@ class AssignmentIn(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
     content: str | None = Field(default=None, max_length=4000)
 
+# Upper bound for one POST /assignments/bulk request
+BULK_MAX_ITEMS = 1000
+
 # ---------- Helpers ----------
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
-def _service_result(name: str, ok: bool, detail: str, latency_ms: float | None) -> Dict[str, Any]:
-    out: Dict[str, Any] = {"service": name, "ok": ok, "detail": detail}
-    if latency_ms is not None:
-        out["latencyMs"] = round(latency_ms, 2)
-    return out
+def _assignments_reader(endpoint: str):
+    """``assignments`` handle carrying the read preference configured for ``endpoint``."""
+    return db.assignments.with_options(read_preference=READ_ROUTES[endpoint])
+
+def _new_document(payload: AssignmentIn) -> Dict[str, Any]:
+    now = _utcnow()
+    return {
+        "title": payload.title.strip(),
+        "content": (payload.content or "").strip(),
+        # BSON dates keep milliseconds; truncate so the response matches later reads
+        "created_at": now.replace(microsecond=now.microsecond // 1000 * 1000),
+    }
 
 def _serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
-    d = dict(doc)
-    d["id"] = str(d.pop("_id", ""))
-    # normalize created_at
-    ca = d.get("created_at")
-    if isinstance(ca, datetime):
-        if ca.tzinfo is None:
-            ca = ca.replace(tzinfo=timezone.utc)
-        d["createdAt"] = ca.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-    else:
-        d["createdAt"] = _utcnow().isoformat().replace("+00:00", "Z")
-    return d
+    """Shape a Mongo document for the API in place (no copy).
+
+    Datetimes stay datetimes; FastJSONResponse renders them as UTC ``...Z``.
+    The text search score is only a sort key and is dropped.
+    """
+    doc["id"] = str(doc.pop("_id", ""))
+    doc.pop(SCORE_FIELD, None)
+    ca = doc.get("created_at")
+    doc["createdAt"] = ca if isinstance(ca, datetime) else _utcnow()
+    return doc
+
+async def _fetch_page(
+    filters: Dict[str, Any],
+    projection: Dict[str, Any] | None,
+    limit: int,
+    after: str | None,
+    before: str | None,
+    endpoint: str = "list",
+) -> Dict[str, Any]:
+    """One newest-first keyset page: fetch ``limit + 1`` rows to detect more."""
+    query = keyset_query(filters, after, before)
+    cursor = _assignments_reader(endpoint).find(query["filter"], projection).sort("_id", query["direction"]).limit(limit + 1)
+    docs = [doc async for doc in cursor]
+    if query["direction"] > 0:
+        docs.reverse()
+    links = page_links(docs, limit, after, before)
+    return {
+        "items": [_serialize(doc) for doc in links["page"]],
+        "nextCursor": links["nextCursor"],
+        "prevCursor": links["prevCursor"],
+    }
+
+async def _conditional(
+    request: Request, endpoint: str, build: Callable[[str], Awaitable[Dict[str, Any]]]
+) -> Response:
+    """Answer from the data version alone when the client's copy is current.
+
+    The version (see write_version.py) is read through the endpoint's read
+    preference, so the validator and the body come from the same replica-set
+    member. ``build`` receives it as the data version (part of result cache
+    keys). There is no ``Last-Modified``: HTTP dates have one-second
+    precision, so ``If-Modified-Since`` would hide writes made in the same
+    second.
+    """
+    version = await read_write_version(db.with_options(read_preference=READ_ROUTES[endpoint]))
+    etag = make_etag(version, request.url.path, request.query_params.multi_items())
+    headers = validator_headers(etag, None, settings.http_cache_seconds)
+    if is_not_modified(request.headers, etag, None):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(await build(version), headers=headers)
+
+async def _notify_analytics(item: Dict[str, Any]) -> None:
+    """Queue a record_created event for analytics; never waits on the network."""
+    if emitter is None:
+        return
+    emitter.emit({
+        "id": item["id"],
+        "kind": "record_created",
+        "title": item["title"],
+        "created_at": item["createdAt"],
+    })
 
 # ---------- CORS ----------
 
@@ -63,12 +212,40 @@ app.add_middleware(
     allow_origins=["*"], allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"],
 )
+# outermost, so CORS preflights and errors are timed too
+app.add_middleware(MetricsMiddleware)
 
 # ---------- System ----------
 
 @app.get("/health", tags=["system"])
 async def health():
-    return {"status": "ok", "service": settings.service_name}
+    return {
+        "status": "ok",
+        "service": settings.service_name,
+        "analyticsEvents": emitter.stats() if emitter is not None else None,
+        "readRouting": {endpoint: pref.document for endpoint, pref in READ_ROUTES.items()},
+        "resultCache": result_cache.stats(),
+        "suggestIndex": suggest_index.stats(),
+    }
+
+ANALYTICS_QUEUE = REGISTRY.register(Gauge(
+    "analytics_emitter_events", "Analytics emitter queue depth and delivery totals.", ("state",)))
+RESULT_CACHE = REGISTRY.register(Gauge(
+    "result_cache", "List/search result cache entries, hit counters and write generation.", ("state",)))
+
+def _collect_service_stats() -> None:
+    if emitter is not None:
+        for state, value in emitter.stats().items():
+            ANALYTICS_QUEUE.set((state,), value)
+    for state, value in result_cache.stats().items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            RESULT_CACHE.set((state,), value)
+
+REGISTRY.on_collect(_collect_service_stats)
+
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+async def metrics():
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
 
 @app.get("/health/db", tags=["system"])
 async def health_db():
@@ -79,126 +256,222 @@ async def health_db():
 # ---------- Assignments ----------
 
 @app.get("/assignments", tags=["assignments"])
-async def list_assignments(limit: int = Query(50, ge=1, le=200)):
-    cursor = db.assignments.find({}).sort("_id", -1).limit(limit)
-    items: List[Dict[str, Any]] = []
-    async for doc in cursor:
-        items.append(_serialize(doc))
-    return {"items": items, "limit": limit}
+async def list_assignments(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    after: str | None = Query(None, description="Cursor: return records older than this page"),
+    before: str | None = Query(None, description="Cursor: return records newer than this page"),
+):
+    async def build(version: str) -> Dict[str, Any]:
+        page = await result_cache.get(
+            ("list", version, limit, after, before), lambda: _fetch_page({}, None, limit, after, before)
+        )
+        return {**page, "limit": limit}
+
+    return await _conditional(request, "list", build)
 
 @app.post("/assignments", tags=["assignments"], status_code=201)
 async def create_assignment(payload: AssignmentIn):
-    document = {
-        "title": payload.title.strip(),
-        "content": (payload.content or "").strip(),
-        "created_at": _utcnow(),
-    }
-    result = await db.assignments.insert_one(document)
-    created = await db.assignments.find_one({"_id": result.inserted_id})
-    if not created:
-        raise HTTPException(status_code=500, detail="Failed to create assignment")
-    return _serialize(created)
+    document = _new_document(payload)
+    # insert_one stamps the generated _id onto `document`; no read-back round-trip needed
+    await db.assignments.insert_one(document)
+    result_cache.bump()
+    suggest_index.add(document["_id"], document["title"])
+    item = _serialize(document)
+    await _notify_analytics(item)
+    return FastJSONResponse(item, status_code=201)
+
+@app.post("/assignments/bulk", tags=["assignments"])
+async def create_assignments_bulk(
+    payload: List[Dict[str, Any]] = Body(..., description=f"Up to {BULK_MAX_ITEMS} assignments"),
+):
+    """Validate each item independently and write the valid ones with one unordered insert_many."""
+    if len(payload) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+    results: List[Dict[str, Any]] = [{} for _ in payload]
+    documents: List[Dict[str, Any]] = []
+    positions: List[int] = []  # documents[i] came from payload[positions[i]]
+    for index, raw in enumerate(payload):
+        try:
+            documents.append(_new_document(AssignmentIn.model_validate(raw)))
+            positions.append(index)
+        except ValidationError as e:
+            errors = [{"loc": err["loc"], "msg": err["msg"]} for err in e.errors()]
+            results[index] = {"index": index, "ok": False, "error": errors}
+
+    write_errors: Dict[int, str] = {}
+    if documents:
+        try:
+            await db.assignments.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            write_errors = {err["index"]: err.get("errmsg", "write failed") for err in e.details.get("writeErrors", [])}
+        finally:
+            # some rows may have landed even if insert_many raised
+            result_cache.bump()
+
+    for i, document in enumerate(documents):
+        index = positions[i]
+        if i in write_errors:
+            results[index] = {"index": index, "ok": False, "error": write_errors[i][:300]}
+            continue
+        suggest_index.add(document["_id"], document["title"])
+        item = _serialize(document)
+        await _notify_analytics(item)
+        results[index] = {"index": index, "ok": True, "item": item}
+
+    inserted = sum(1 for r in results if r["ok"])
+    return FastJSONResponse({"results": results, "inserted": inserted, "failed": len(results) - inserted})
 
 @app.get("/assignments/search", tags=["assignments"])
 async def search_assignments(
+    request: Request,
     q: str = Query("", max_length=200, description="Search term for assignment titles/content"),
     limit: int = Query(25, ge=1, le=100),
+    mode: SearchMode = Query("text", description="'text' (indexed, ranked) or 'regex' (fallback scan)"),
+    order: SearchOrder = Query("relevance", description="'relevance' (text mode only) or 'recent'"),
+    after: str | None = Query(None),
+    before: str | None = Query(None),
 ):
     q = q.strip()
-    filters: Dict[str, Any] = {}
-    if q:
-        regex = {"$regex": q, "$options": "i"}
-        filters = {"$or": [{"title": regex}, {"content": regex}]}
-    cursor = db.assignments.find(filters).sort("_id", -1).limit(limit)
-    items: List[Dict[str, Any]] = []
-    async for doc in cursor:
-        items.append(_serialize(doc))
-    return {"items": items, "query": q, "count": len(items)}
+    query = build_query(q, mode, order)
+    if query["ranked"] and (after or before):
+        raise HTTPException(status_code=400, detail="Cursor pagination requires order=recent")
+
+    async def fetch() -> Dict[str, Any]:
+        if query["ranked"]:
+            reader = _assignments_reader("search")
+            cursor = reader.find(query["filter"], query["projection"]).sort(query["sort"]).limit(limit)
+            return {"items": [_serialize(doc) async for doc in cursor], "nextCursor": None, "prevCursor": None}
+        return await _fetch_page(query["filter"], query["projection"], limit, after, before, endpoint="search")
+
+    async def build(version: str) -> Dict[str, Any]:
+        key = ("search", version, normalize_terms(q, mode), mode, order, limit, after, before)
+        page = await result_cache.get(key, fetch)
+        return {**page, "query": q, "mode": mode, "order": order, "count": len(page["items"])}
+
+    return await _conditional(request, "search", build)
+
+@app.get("/assignments/suggest", tags=["assignments"])
+async def suggest_assignments(
+    prefix: str = Query(..., max_length=100, description="Text typed so far; its last word is completed"),
+    limit: int = Query(8, ge=1, le=SUGGEST_MAX),
+):
+    """Most frequent title words starting with the last word of ``prefix``, from memory."""
+    if not suggest_index.loaded:
+        # no lifespan (tests, scripts): load on first use
+        await suggest_index.sync(db.assignments)
+    word = last_word(prefix)
+    suggestions = suggest_index.suggest(word, limit) if word else []
+    return {
+        "prefix": prefix,
+        "suggestions": [{"term": term, "count": count} for count, term in suggestions],
+    }
+
+@app.get("/assignments/export", tags=["assignments"])
+async def export_assignments(
+    format: ExportFormat = Query("ndjson"),
+    from_: datetime | None = Query(None, alias="from", description="Inclusive lower bound on created_at (ISO 8601)"),
+    to: datetime | None = Query(None, description="Exclusive upper bound on created_at (ISO 8601)"),
+):
+    cursor = _assignments_reader("export").find(
+        date_range_filter(from_, to), EXPORT_PROJECTION, batch_size=settings.export_batch_size
+    ).sort(export_sort(from_, to))
+    return StreamingResponse(
+        stream_rows(cursor, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="assignments.{format}"'},
+    )
 
 @app.get("/records", tags=["records"])
-async def list_records_compat(limit: int = Query(50, ge=1, le=200)):
+async def list_records_compat(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    after: str | None = Query(None),
+    before: str | None = Query(None),
+):
     # reuse assignments implementation
-    return await list_assignments(limit=limit)
+    return await list_assignments(request, limit=limit, after=after, before=before)
 
 @app.post("/records", tags=["records"], status_code=201)
 async def create_record_compat(payload: AssignmentIn):
     return await create_assignment(payload)
 
+@app.post("/records/bulk", tags=["records"])
+async def create_records_bulk_compat(payload: List[Dict[str, Any]] = Body(...)):
+    return await create_assignments_bulk(payload)
+
+@app.get("/records/export", tags=["records"])
+async def export_records_compat(
+    format: ExportFormat = Query("ndjson"),
+    from_: datetime | None = Query(None, alias="from"),
+    to: datetime | None = Query(None),
+):
+    return await export_assignments(format=format, from_=from_, to=to)
+
 @app.get("/records/search", tags=["records"])
 async def search_records_compat(
+    request: Request,
     q: str = Query("", max_length=200),
     limit: int = Query(25, ge=1, le=100),
+    mode: SearchMode = Query("text"),
+    order: SearchOrder = Query("relevance"),
+    after: str | None = Query(None),
+    before: str | None = Query(None),
 ):
-    return await search_assignments(q=q, limit=limit)
+    return await search_assignments(request, q=q, limit=limit, mode=mode, order=order, after=after, before=before)
 
-# ---------- Diagnostics (end-to-end) ----------
-
-@app.post("/connectivity-test", tags=["diagnostics"])
-async def connectivity_test(payload: ConnectivityTestPayload):
-    results: List[Dict[str, Any]] = []
-    t0 = _utcnow()
+# ---------- Admin ----------
 
-    # Backend self
-    results.append(_service_result(settings.service_name, True, "Backend reached.", 0.0))
+@app.get("/admin/query-plans", tags=["admin"])
+async def query_plans():
+    """Explain each hot query; ``notIndexed`` lists plans that scan or sort in memory."""
+    return await explain_queries(db)
 
-    # Mongo write/read/cleanup
-    m0 = _utcnow()
-    mongo_ok, mongo_detail = True, "Inserted and read diagnostic record."
-    inserted_id = None
-    try:
-        doc = {
-            "title": payload.title,
-            "status": payload.status,
-            "notes": payload.notes,
-            "source": "connectivity-test",
-            "created_at": _utcnow(),
-        }
-        ins = await db.connectivity_tests.insert_one(doc)
-        inserted_id = ins.inserted_id
-        back = await db.connectivity_tests.find_one({"_id": inserted_id})
-        if back is None:
-            mongo_ok = False
-            mongo_detail = "Insert OK, but read-back failed."
-    except Exception as e:
-        mongo_ok = False
-        mongo_detail = f"MongoDB error: {e}"[:300]
-    finally:
-        if inserted_id is not None:
-            try:
-                await db.connectivity_tests.delete_one({"_id": inserted_id})
-            except Exception as e:
-                mongo_ok = False
-                extra = f"Cleanup error: {e}"[:200]
-                mongo_detail = f"{mongo_detail} | {extra}"
-    m_latency = (datetime.now(timezone.utc) - m0).total_seconds() * 1000
-    results.append(_service_result("mongodb", mongo_ok, mongo_detail, m_latency))
-
-    # Analytics POST (NOTE: analytics_url points to ROOT; endpoint is /ingest)
-    a0 = _utcnow()
-    a_ok, a_detail = True, "Analytics acknowledged event."
-    try:
-        async with httpx.AsyncClient(timeout=settings.analytics_timeout_seconds) as s:
-            r = await s.post(
-                f"{settings.analytics_url}/ingest",
-                json={
-                    "id": "connectivity-test",
-                    "title": payload.title,
-                    "created_at": _utcnow().isoformat().replace("+00:00", "Z"),
-                },
-            )
-            r.raise_for_status()
-            # optional: check returned JSON
-            _ = r.json()
-    except Exception as e:
-        a_ok = False
-        a_detail = f"Analytics error: {e}"[:300]
-    a_latency = (datetime.now(timezone.utc) - a0).total_seconds() * 1000
-    results.append(_service_result("analytics", a_ok, a_detail, a_latency))
+# ---------- Diagnostics (end-to-end) ----------
 
-    total_ms = (datetime.now(timezone.utc) - t0).total_seconds() * 1000
+async def _connectivity_report(checks) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    services = [service_result(settings.service_name, True, "Backend reached.", 0.0), *await run_probes(checks)]
     return {
-        "echo": payload.model_dump(),
-        "services": results,
-        "latencyMs": round(total_ms, 2),
+        "services": services,
+        "latencyMs": round((time.perf_counter() - t0) * 1000, 2),
         "timestamp": _utcnow().isoformat().replace("+00:00", "Z"),
     }
+
+async def _readonly_report() -> Dict[str, Any]:
+    report = await _connectivity_report([
+        ("mongodb", "MongoDB", lambda: mongo_ping(client)),
+        ("analytics", "Analytics", lambda: analytics_health(analytics_http)),
+    ])
+    return {**report, "probe": "ping"}
+
+# Newest report of either kind; refreshed in the background when an interval is set
+prober = DependencyProber(_readonly_report, settings.connectivity_probe_interval_seconds)
+
+@app.post("/connectivity-test", tags=["diagnostics"])
+async def connectivity_test(
+    payload: ConnectivityTestPayload | None = None,
+    cached: bool = Query(False, description="Return the last report (with its age) instead of probing"),
+):
+    if cached:
+        last = prober.last()
+        report, age = last if last is not None else (await prober.refresh(), 0.0)
+        return {**report, "cached": True, "ageSeconds": round(age, 3)}
+    if payload is None:
+        raise HTTPException(status_code=422, detail="A request body is required unless cached=1")
+
+    doc = {
+        "title": payload.title,
+        "status": payload.status,
+        "notes": payload.notes,
+        "source": "connectivity-test",
+        "created_at": _utcnow(),
+    }
+    report = await _connectivity_report([
+        ("mongodb", "MongoDB", lambda: mongo_round_trip(db, doc)),
+        ("analytics", "Analytics", lambda: analytics_ingest(analytics_http, payload.title)),
+    ])
+    report["probe"] = "roundTrip"
+    prober.record(report)
+    return {"echo": payload.model_dump(), **report, "cached": False}
@@ -0,0 +1,60 @@
+# backend/app/pagination.py
+"""Keyset (cursor) pagination over ``_id``.
+
+ObjectIds grow with insertion time, so ``_id`` order is ``created_at`` order
+and every page is a bounded seek on the ``_id`` index instead of a skip.
+Cursors are opaque url-safe tokens; clients only pass them back.
+"""
+import base64
+import binascii
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+
+def encode_cursor(oid: Any) -> str:
+    return base64.urlsafe_b64encode(ObjectId(str(oid)).binary).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> ObjectId:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return ObjectId(raw)
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_query(base: Dict[str, Any], after: Optional[str], before: Optional[str]) -> Dict[str, Any]:
+    """Return ``filter`` and ``direction`` for a newest-first page.
+
+    ``after`` walks towards older documents, ``before`` towards newer ones.
+    """
+    if after and before:
+        raise HTTPException(status_code=400, detail="Pass either 'after' or 'before', not both")
+    if not (after or before):
+        return {"filter": base, "direction": -1}
+    bound = {"$lt": decode_cursor(after)} if after else {"$gt": decode_cursor(before)}
+    flt = {"_id": bound} if not base else {"$and": [base, {"_id": bound}]}
+    return {"filter": flt, "direction": -1 if after else 1}
+
+
+def page_links(
+    docs: List[Dict[str, Any]], limit: int, after: Optional[str], before: Optional[str]
+) -> Dict[str, Any]:
+    """Trim a ``limit + 1`` fetch to one page and compute neighbour cursors.
+
+    ``docs`` must already be in newest-first order.
+    """
+    has_more = len(docs) > limit
+    if before:
+        # fetched ascending then reversed: the overflow row is the newest one
+        page = docs[-limit:] if has_more else docs
+        next_cursor = encode_cursor(page[-1]["_id"]) if page else before
+        prev_cursor = encode_cursor(page[0]["_id"]) if has_more else None
+    else:
+        page = docs[:limit]
+        next_cursor = encode_cursor(page[-1]["_id"]) if has_more else None
+        prev_cursor = (encode_cursor(page[0]["_id"]) if page else after) if after else None
+    return {"page": page, "nextCursor": next_cursor, "prevCursor": prev_cursor}
@@ -0,0 +1,150 @@
+# backend/app/probes.py
+"""Dependency probes behind ``POST /connectivity-test``.
+
+Each probe checks one dependency and reports ``(ok, detail)``; ``run_probes``
+times them and runs them concurrently, so a report takes as long as the
+slowest dependency rather than the sum of all of them.
+
+A live request does the full round trip: a diagnostic insert, read-back and
+delete on Mongo, and an ``/ingest`` on analytics. ``DependencyProber`` keeps
+the newest report and can refresh it in the background with read-only checks
+(Mongo ``ping``, analytics ``/health``), so monitors polling ``?cached=1`` add
+no write load.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+Check = Callable[[], Awaitable[Tuple[bool, str]]]
+
+
+def service_result(name: str, ok: bool, detail: str, latency_ms: Optional[float]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"service": name, "ok": ok, "detail": detail}
+    if latency_ms is not None:
+        out["latencyMs"] = round(latency_ms, 2)
+    return out
+
+
+async def _timed(name: str, label: str, check: Check) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        ok, detail = await check()
+    except Exception as e:
+        ok, detail = False, f"{label} error: {e}"[:300]
+    return service_result(name, ok, detail, (time.perf_counter() - t0) * 1000)
+
+
+async def run_probes(checks: List[Tuple[str, str, Check]]) -> List[Dict[str, Any]]:
+    """Run ``(service, label, check)`` probes concurrently; results keep the given order."""
+    return list(await asyncio.gather(*(_timed(name, label, check) for name, label, check in checks)))
+
+
+async def mongo_round_trip(db, doc: Dict[str, Any]) -> Tuple[bool, str]:
+    """Insert ``doc``, read it back and delete it again."""
+    ok, detail = True, "Inserted and read diagnostic record."
+    inserted_id = None
+    try:
+        inserted_id = (await db.connectivity_tests.insert_one(doc)).inserted_id
+        if await db.connectivity_tests.find_one({"_id": inserted_id}) is None:
+            ok, detail = False, "Insert OK, but read-back failed."
+    except Exception as e:
+        ok, detail = False, f"MongoDB error: {e}"[:300]
+    finally:
+        if inserted_id is not None:
+            try:
+                await db.connectivity_tests.delete_one({"_id": inserted_id})
+            except Exception as e:
+                ok = False
+                detail = f"{detail} | {f'Cleanup error: {e}'[:200]}"
+    return ok, detail
+
+
+async def mongo_ping(client) -> Tuple[bool, str]:
+    await client.admin.command("ping")
+    return True, "Ping acknowledged."
+
+
+async def analytics_ingest(http, title: str) -> Tuple[bool, str]:
+    if http is None:
+        raise RuntimeError("analytics client not initialised")
+    # analytics_url points to ROOT; the endpoint is /ingest
+    r = await http.post(
+        "/ingest",
+        json={
+            "id": "connectivity-test",
+            "kind": "connectivity_test",
+            "title": title,
+            "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        },
+    )
+    r.raise_for_status()
+    r.json()
+    return True, "Analytics acknowledged event."
+
+
+async def analytics_health(http) -> Tuple[bool, str]:
+    if http is None:
+        raise RuntimeError("analytics client not initialised")
+    r = await http.get("/health")
+    r.raise_for_status()
+    return True, "Analytics healthy."
+
+
+class DependencyProber:
+    """Newest connectivity report plus an optional background refresh every ``interval_s``."""
+
+    def __init__(self, probe: Callable[[], Awaitable[Dict[str, Any]]], interval_s: float = 0.0):
+        self._probe = probe
+        self._interval_s = interval_s
+        self._report: Optional[Dict[str, Any]] = None
+        self._at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: Optional[asyncio.Future] = None
+
+    def record(self, report: Dict[str, Any]) -> None:
+        self._report, self._at = report, time.monotonic()
+
+    def last(self) -> Optional[Tuple[Dict[str, Any], float]]:
+        """The newest report and its age in seconds, or None before the first probe."""
+        if self._report is None:
+            return None
+        return self._report, time.monotonic() - self._at
+
+    async def refresh(self) -> Dict[str, Any]:
+        # concurrent callers share one probe run
+        running = self._refreshing
+        if running is None:
+            running = self._refreshing = asyncio.ensure_future(self._probe())
+        try:
+            report = await asyncio.shield(running)
+        finally:
+            if self._refreshing is running:
+                self._refreshing = None
+        self.record(report)
+        return report
+
+    def start(self) -> None:
+        if self._task is None and self._interval_s > 0:
+            self._task = asyncio.create_task(self._run(), name="dependency-prober")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.warning("Background dependency probe failed: %s", e)
+            await asyncio.sleep(self._interval_s)
@@ -0,0 +1,32 @@
+# backend/app/responses.py
+"""orjson-backed JSON responses.
+
+orjson encodes ``datetime`` natively (naive values are treated as UTC and
+rendered with a ``Z`` suffix) and we teach it ``ObjectId``, so documents can
+be handed over as they come from Motor. Returning a ``FastJSONResponse``
+from an endpoint also skips FastAPI's generic ``jsonable_encoder`` pass.
+"""
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
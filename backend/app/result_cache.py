@@ -0,0 +1,98 @@
+# backend/app/result_cache.py
+"""Bounded LRU cache for list and search pages, invalidated by write generation.
+
+Every write path bumps ``generation``, which drops all entries, so a new
+record is visible on the very next read. Keys also carry the collection's
+data version (see write_version.py), so a write handled by another worker process
+moves readers here to new keys as well. ``ttl_s`` bounds how long an entry
+may be served at all.
+
+Identical misses arriving while a page is being computed share that one
+computation (single flight). A computation that straddles a write is handed
+to its waiters but not stored.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+Compute = Callable[[], Awaitable[Any]]
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 512, ttl_s: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.generation = 0
+        # key -> (value, stored_at); least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_s > 0
+
+    def bump(self) -> None:
+        """Record a write: everything cached so far is out of date."""
+        self.generation += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    async def get(self, key: Hashable, compute: Compute) -> Any:
+        if not self.enabled:
+            return await compute()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            if time.monotonic() - stored_at < self.ttl_s:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(self._compute(key, compute, self.generation))
+            # every waiter may have been cancelled; retrieve the exception anyway
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        # shield: one cancelled caller must not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_s,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    async def _compute(self, key: Hashable, compute: Compute, generation: int) -> Any:
+        try:
+            value = await compute()
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+        if generation == self.generation:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
@@ -0,0 +1,57 @@
+# backend/app/search.py
+"""Search helpers for the assignments collection.
+
+The default ``text`` mode is served by a MongoDB text index over ``title`` and
+``content`` (tokenized, stemmed, relevance-ranked by ``textScore``), declared
+in ``indexes.py``. The old case-insensitive ``$regex`` scan is kept as the
+explicit ``regex`` fallback.
+"""
+from typing import Any, Dict, List, Literal, Tuple
+
+from pymongo import TEXT
+
+SearchMode = Literal["text", "regex"]
+SearchOrder = Literal["relevance", "recent"]
+
+TEXT_INDEX_NAME = "assignments_text"
+TEXT_INDEX_KEYS: List[Tuple[str, str]] = [("title", TEXT), ("content", TEXT)]
+# Title hits should outrank matches buried in the body.
+TEXT_INDEX_WEIGHTS: Dict[str, int] = {"title": 3, "content": 1}
+
+SCORE_FIELD = "score"
+_SCORE_META = {"$meta": "textScore"}
+
+
+def normalize_terms(q: str, mode: SearchMode) -> str:
+    """Cache-key form of ``q``: equal for queries that match the same records.
+
+    Text search ignores case and extra whitespace; a regex is kept verbatim
+    (``\\S`` and ``\\s`` differ).
+    """
+    q = q.strip()
+    return " ".join(q.split()).casefold() if mode == "text" else q
+
+
+def build_query(q: str, mode: SearchMode, order: SearchOrder = "relevance") -> Dict[str, Any]:
+    """Return ``filter``/``projection``/``sort`` arguments for ``find``.
+
+    ``ranked`` is True when results are ordered by text score; such pages
+    cannot be walked with ``_id`` cursors.
+    """
+    if not q:
+        return {"filter": {}, "projection": None, "sort": [("_id", -1)], "ranked": False}
+    if mode == "regex":
+        regex = {"$regex": q, "$options": "i"}
+        return {
+            "filter": {"$or": [{"title": regex}, {"content": regex}]},
+            "projection": None,
+            "sort": [("_id", -1)],
+            "ranked": False,
+        }
+    ranked = order == "relevance"
+    return {
+        "filter": {"$text": {"$search": q}},
+        "projection": {SCORE_FIELD: _SCORE_META},
+        "sort": [(SCORE_FIELD, _SCORE_META), ("_id", -1)] if ranked else [("_id", -1)],
+        "ranked": ranked,
+    }
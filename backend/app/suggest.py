@@ -0,0 +1,200 @@
+# backend/app/suggest.py
+"""Title autocomplete for ``GET /assignments/suggest``.
+
+``PrefixIndex`` keeps a trie of the (case-folded) words that appear in
+assignment titles. Every node stores the ``k`` most frequent words below it,
+so a lookup is one walk down the prefix and costs the same at 1M titles as at
+a thousand; no query reaches Mongo.
+
+The index is loaded in the lifespan (counted first, then built bottom-up in
+one pass) and kept in sync two ways. ``create_assignment`` adds its own
+titles immediately, and a background task picks up records written by other
+worker processes. That catch-up re-reads the last ``overlap_s`` seconds of
+``_id`` values and skips ids it has already counted, so records whose
+ObjectIds land slightly out of order across processes are not missed or
+counted twice. Word counts only grow, which keeps the per-node top lists exact
+under incremental updates.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+log = logging.getLogger(__name__)
+
+SUGGEST_MAX = 10
+MIN_TERM_LEN = 2
+MAX_TERM_LEN = 32
+# distinct words in one sync above which the trie is rebuilt rather than patched
+_REBUILD_THRESHOLD = 2000
+
+_WORD = re.compile(r"[^\W_]+")
+
+Entry = Tuple[int, str]
+
+
+def terms(title: Any) -> List[str]:
+    """Distinct words of ``title`` worth completing."""
+    if not isinstance(title, str):
+        return []
+    return list(dict.fromkeys(
+        w for w in _WORD.findall(title.casefold()) if MIN_TERM_LEN <= len(w) <= MAX_TERM_LEN
+    ))
+
+
+def last_word(prefix: str) -> str:
+    """The word being typed at the end of ``prefix`` ("" after a trailing space)."""
+    words = _WORD.findall(prefix.casefold())
+    if not words or not prefix.casefold().endswith(words[-1]):
+        return ""
+    return words[-1][:MAX_TERM_LEN]
+
+
+def _rank(entry: Entry) -> Tuple[int, str]:
+    return -entry[0], entry[1]
+
+
+class _Node:
+    __slots__ = ("children", "term", "top")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.term: Optional[str] = None
+        self.top: List[Entry] = []
+
+
+class PrefixIndex:
+    def __init__(self, k: int = SUGGEST_MAX, sync_interval_s: float = 5.0, overlap_s: float = 10.0):
+        self.k = k
+        self.sync_interval_s = sync_interval_s
+        self.overlap_s = overlap_s
+        self._counts: Dict[str, int] = {}
+        self._root = _Node()
+        # ids already counted that a later catch-up could read again
+        self._seen: Dict[ObjectId, None] = {}
+        self._since: Optional[datetime] = None
+        self._synced_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._synced_at is not None
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_MAX) -> List[Entry]:
+        """Most frequent words starting with ``prefix`` as ``(count, word)``, best first."""
+        node = self._root
+        for ch in prefix.casefold():
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.top[:limit]
+
+    def add(self, oid: ObjectId, title: Any) -> None:
+        """Count a record written by this process."""
+        if oid in self._seen:
+            return
+        self._seen[oid] = None
+        for term in terms(title):
+            self._bump(term, 1)
+
+    async def sync(self, coll) -> int:
+        """Count records not seen yet (everything on the first call); returns how many."""
+        if self._lock.locked():
+            return 0  # a sync is already running; serve what is indexed so far
+        async with self._lock:
+            started = datetime.now(timezone.utc)
+            horizon = started - timedelta(seconds=self.overlap_s)
+            filters = {} if self._since is None else {"_id": {"$gte": ObjectId.from_datetime(self._since)}}
+            counts: Counter = Counter()
+            added = 0
+            async for doc in coll.find(filters, {"title": 1}):
+                oid = doc["_id"]
+                if oid in self._seen:
+                    continue
+                if oid.generation_time >= horizon:
+                    self._seen[oid] = None
+                counts.update(terms(doc.get("title")))
+                added += 1
+            self._apply(counts)
+            self._since = horizon
+            self._seen = {oid: None for oid in self._seen if oid.generation_time >= horizon}
+            self._synced_at = time.monotonic()
+            return added
+
+    def start(self, coll) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(coll), name="suggest-index")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "terms": len(self._counts),
+            "syncAgeSeconds": round(time.monotonic() - self._synced_at, 3) if self.loaded else None,
+        }
+
+    async def _run(self, coll) -> None:
+        while True:
+            t0 = time.perf_counter()
+            first = not self.loaded
+            try:
+                added = await self.sync(coll)
+                if first:
+                    log.info("Suggest index: %d titles, %d terms in %.2fs", added, len(self._counts), time.perf_counter() - t0)
+            except Exception as e:
+                log.warning("Suggest index sync failed: %s", e)
+            await asyncio.sleep(self.sync_interval_s)
+
+    def _apply(self, counts: Counter) -> None:
+        if len(counts) <= _REBUILD_THRESHOLD:
+            for term, n in counts.items():
+                self._bump(term, n)
+            return
+        for term, n in counts.items():
+            self._counts[term] = self._counts.get(term, 0) + n
+        self._root = self._build(self._counts)
+
+    def _bump(self, term: str, n: int) -> None:
+        count = self._counts[term] = self._counts.get(term, 0) + n
+        node = self._root
+        for ch in term:
+            node = node.children.setdefault(ch, _Node())
+            entries = [e for e in node.top if e[1] != term]
+            entries.append((count, term))
+            entries.sort(key=_rank)
+            node.top = entries[: self.k]
+        node.term = term
+
+    def _build(self, words: Iterable[str]) -> _Node:
+        root = _Node()
+        for term in words:
+            node = root
+            for ch in term:
+                node = node.children.setdefault(ch, _Node())
+            node.term = term
+        self._fill(root)
+        return root
+
+    def _fill(self, node: _Node) -> None:
+        # post-order: a node's top list is the best of its own word and its children's lists
+        entries: List[Entry] = [(self._counts[node.term], node.term)] if node.term else []
+        for child in node.children.values():
+            self._fill(child)
+            entries.extend(child.top)
+        entries.sort(key=_rank)
+        node.top = entries[: self.k]
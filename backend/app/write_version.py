@@ -0,0 +1,23 @@
+# backend/app/write_version.py
+"""Data version of ``assignments`` for ETags and result cache keys.
+
+``assignments`` is insert-only, so its document count changes on every
+write, whichever worker process made it. The version pairs the count with
+the newest ``_id``. It is read from the collection's metadata and the
+``_id`` index, so writers pay nothing for it.
+
+The newest ``_id`` alone cannot serve: ObjectIds order by the second they
+were generated, then by a per-process random value, so a record another
+worker inserts in the same second can sort below the current maximum.
+"""
+import asyncio
+
+
+async def read_write_version(db) -> str:
+    """``"<count>:<newest _id>"``; "0:" while the collection is empty."""
+    coll = db.assignments
+    count, newest = await asyncio.gather(
+        coll.estimated_document_count(),
+        coll.find_one({}, {"_id": 1}, sort=[("_id", -1)]),
+    )
+    return f"{count}:{newest['_id'] if newest else ''}"
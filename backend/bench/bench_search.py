@@ -0,0 +1,201 @@
+# backend/bench/bench_search.py
+"""Search latency benchmark: text index vs. regex scan as the collection grows.
+
+Needs a scratch MongoDB (never point this at production data)::
+
+    MONGODB_URI=mongodb://localhost:27017/animoassign_bench \\
+        python -m bench.bench_search --sizes 10000 100000 1000000
+
+or offline against the in-memory stand-in, which answers ``$text`` from
+postings like the index does; its numbers show how cost scales with size,
+not what a server would measure::
+
+    python -m bench.bench_search --standin --sizes 10000 100000
+
+Documents draw their words from a Zipf-like vocabulary (as in
+bench_suggest.py), and queries are grouped by how common their term is:
+``rare`` (about 0.15% of documents), ``mid`` (about 7%) and ``common``
+(about 85%). Each group runs in text relevance order, text ``order=recent``
+and regex mode.
+
+What to expect: a text query finds its terms in the index, but then fetches
+every matching document, to score it for relevance order or to sort it by
+``_id`` for ``order=recent`` (the text index cannot supply that order). Its
+cost follows the number of matches, which grows with the collection even for
+rare terms; the index only saves the scan of non-matching documents. Text
+search is therefore far cheaper than regex for specific terms, but on a
+common term both orders cost about as much as the regex scan, and relevance
+order cannot stay flat there.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import string
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from pymongo import MongoClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "testing"))
+# the scratch database, read before the app import below needs some URI to load its settings
+_URI = os.getenv("MONGODB_URI") or os.getenv("BACKEND_MONGODB_URI")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_bench")
+
+from benchkit import percentile  # noqa: E402
+
+from app.search import TEXT_INDEX_KEYS, TEXT_INDEX_NAME, TEXT_INDEX_WEIGHTS, build_query  # noqa: E402
+
+COLLECTION = "bench_assignments"
+VOCAB_SIZE = 5000
+# vocabulary ranks each query group draws from (rank 0 is the most common word)
+QUERY_RANKS = {"rare": (1000, VOCAB_SIZE), "mid": (30, 100), "common": (0, 3)}
+QUERIES_PER_GROUP = 5
+
+
+def _vocabulary(size: int, rng: random.Random) -> List[str]:
+    words: Dict[str, None] = {}
+    while len(words) < size:
+        words["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))] = None
+    return list(words)
+
+
+class _Corpus:
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.vocab = _vocabulary(VOCAB_SIZE, self.rng)
+        # rank-weighted choice: a few words are very common, most are rare (like real text)
+        weights = [1 / (rank + 1) for rank in range(VOCAB_SIZE)]
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    def words(self, k: int) -> str:
+        return " ".join(self.rng.choices(self.vocab, cum_weights=self.cum_weights, k=k))
+
+    def doc(self) -> Dict[str, Any]:
+        return {"title": self.words(4).title(), "content": self.words(30), "created_at": datetime.now(timezone.utc)}
+
+    def queries(self) -> Dict[str, List[str]]:
+        pick = random.Random(7)
+        return {
+            group: pick.sample(self.vocab[lo:hi], min(QUERIES_PER_GROUP, hi - lo))
+            for group, (lo, hi) in QUERY_RANKS.items()
+        }
+
+
+class _StandInCursor:
+    def __init__(self, cursor, loop: asyncio.AbstractEventLoop):
+        self._cursor = cursor
+        self._loop = loop
+
+    def sort(self, spec):
+        self._cursor.sort(spec)
+        return self
+
+    def limit(self, n: int):
+        self._cursor.limit(n)
+        return self
+
+    def __iter__(self):
+        return iter(self._loop.run_until_complete(self._cursor.to_list(None)))
+
+
+class _StandInCollection:
+    """The pymongo calls used below, run on the async in-memory stand-in."""
+
+    def __init__(self):
+        from mongo_standin import InMemoryDatabase
+
+        self._coll = InMemoryDatabase()[COLLECTION]
+        self._loop = asyncio.new_event_loop()
+
+    def _run(self, awaitable):
+        return self._loop.run_until_complete(awaitable)
+
+    def estimated_document_count(self) -> int:
+        return self._run(self._coll.estimated_document_count())
+
+    def count_documents(self, filters: Dict[str, Any]) -> int:
+        return self._run(self._coll.count_documents(filters))
+
+    def insert_many(self, docs: List[Dict[str, Any]], ordered: bool = True) -> None:
+        self._run(self._coll.insert_many(docs, ordered=ordered))
+
+    def create_index(self, keys, **options: Any) -> None:
+        self._run(self._coll.create_index(keys, **options))
+
+    def drop(self) -> None:
+        self._run(self._coll.drop())
+
+    def find(self, filters: Dict[str, Any], projection: Any = None) -> _StandInCursor:
+        return _StandInCursor(self._coll.find(filters, projection), self._loop)
+
+
+def _seed(coll, target: int, corpus: _Corpus, batch: int = 5000) -> None:
+    have = coll.estimated_document_count()
+    while have < target:
+        n = min(batch, target - have)
+        coll.insert_many([corpus.doc() for _ in range(n)], ordered=False)
+        have += n
+
+
+def _build(q: str, mode: str) -> Dict[str, Any]:
+    if mode == "recent":
+        return build_query(q, "text", "recent")
+    return build_query(q, mode)
+
+
+def _time_queries(coll, queries: List[str], mode: str, limit: int, rounds: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(rounds):
+        for q in queries:
+            query = _build(q, mode)
+            t0 = time.perf_counter()
+            list(coll.find(query["filter"], query["projection"]).sort(query["sort"]).limit(limit))
+            samples.append((time.perf_counter() - t0) * 1000)
+    return sorted(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--modes", nargs="+", default=["text", "recent", "regex"], choices=["text", "recent", "regex"])
+    parser.add_argument("--groups", nargs="+", default=list(QUERY_RANKS), choices=list(QUERY_RANKS))
+    parser.add_argument("--drop", action="store_true", help="drop the bench collection first")
+    parser.add_argument("--standin", action="store_true", help="use the in-memory stand-in instead of MONGODB_URI")
+    args = parser.parse_args()
+
+    if args.standin:
+        coll = _StandInCollection()
+    else:
+        if not _URI:
+            raise SystemExit("Set MONGODB_URI to a scratch database, or pass --standin")
+        coll = MongoClient(_URI).get_default_database()[COLLECTION]
+    if args.drop:
+        coll.drop()
+    coll.create_index(TEXT_INDEX_KEYS, name=TEXT_INDEX_NAME, weights=TEXT_INDEX_WEIGHTS)
+
+    corpus = _Corpus()
+    queries = corpus.queries()
+    print(f"{'docs':>10} {'mode':>6} {'terms':>7} {'matches':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for size in sorted(args.sizes):
+        _seed(coll, size, corpus)
+        for group in args.groups:
+            matches = statistics.mean(coll.count_documents(_build(q, "text")["filter"]) for q in queries[group])
+            for mode in args.modes:
+                _time_queries(coll, queries[group], mode, args.limit, 1)  # warm cache
+                samples = _time_queries(coll, queries[group], mode, args.limit, args.rounds)
+                print(
+                    f"{size:>10} {mode:>6} {group:>7} {matches:>9.0f} {statistics.median(samples):>9.2f}"
+                    f" {percentile(samples, 95):>9.2f} {samples[-1]:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# backend/bench/bench_suggest.py
+"""Micro-benchmark: ``/assignments/suggest`` lookups at up to 1M titles.
+
+Offline, no Mongo needed::
+
+    python -m bench.bench_suggest --titles 1000000 --lookups 20000
+
+Builds a ``PrefixIndex`` over synthetic titles drawn from a Zipf-like
+vocabulary (loaded through ``sync`` the way the lifespan does it), then
+times lookups for random 1-4 character prefixes and live ``add`` calls.
+For comparison, ``scan`` answers the same prefixes by walking the sorted
+vocabulary with ``bisect`` and ranking the matches, which is what a lookup
+costs without per-node top lists. Exits non-zero if the p99 lookup reaches
+``--budget-us``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import string
+import sys
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "testing"))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_bench")
+
+from benchkit import percentile  # noqa: E402
+from mongo_standin import InMemoryDatabase  # noqa: E402
+
+from app.suggest import PrefixIndex  # noqa: E402
+
+
+def _vocabulary(size: int, rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))))
+    return sorted(words)
+
+
+def _titles(n: int, vocab: List[str], rng: random.Random) -> List[str]:
+    # rank-weighted choice: a few words are very common, most are rare (like real titles)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    picks = rng.choices(vocab, weights=weights, k=n * 4)
+    return [" ".join(picks[i * 4:(i + 1) * 4]).title() for i in range(n)]
+
+
+def _time_us(fn, args_list) -> List[float]:
+    out = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        out.append((time.perf_counter() - t0) * 1e6)
+    out.sort()
+    return out
+
+
+def _report(name: str, samples: List[float]) -> None:
+    print(
+        f"{name:>8}: p50 {percentile(samples, 50):8.1f} µs"
+        f"  p95 {percentile(samples, 95):8.1f} µs  p99 {percentile(samples, 99):8.1f} µs"
+    )
+
+
+async def _load(titles: List[str]) -> Tuple[PrefixIndex, float]:
+    db = InMemoryDatabase()
+    await db.assignments.insert_many([{"title": t} for t in titles])
+    index = PrefixIndex()
+    t0 = time.perf_counter()
+    await index.sync(db.assignments)
+    return index, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--budget-us", type=float, default=1000.0, help="p99 lookup budget in microseconds")
+    args = parser.parse_args()
+
+    rng = random.Random(21)
+    vocab = _vocabulary(args.vocabulary, rng)
+    titles = _titles(args.titles, vocab, rng)
+    index, load_s = asyncio.run(_load(titles))
+    print(f"loaded {args.titles} titles, {index.stats()['terms']} terms in {load_s:.2f}s")
+
+    prefixes = [(rng.choice(vocab)[: rng.randint(1, 4)],) for _ in range(args.lookups)]
+    lookups = _time_us(index.suggest, prefixes)
+    _report("trie", lookups)
+
+    counts: Dict[str, int] = dict(index._counts)
+    ordered = sorted(counts)
+
+    def scan(prefix: str) -> List[Tuple[int, str]]:
+        i = bisect_left(ordered, prefix)
+        matches = []
+        while i < len(ordered) and ordered[i].startswith(prefix):
+            matches.append((counts[ordered[i]], ordered[i]))
+            i += 1
+        return sorted(matches, key=lambda e: (-e[0], e[1]))[:10]
+
+    sample = prefixes[: max(1, args.lookups // 10)]
+    assert all(index.suggest(p) == scan(p) for (p,) in sample[:200]), "trie and scan disagree"
+    _report("scan", _time_us(scan, sample))
+
+    adds = [(ObjectId(), title) for title in rng.sample(titles, min(5000, len(titles)))]
+    _report("add", _time_us(index.add, adds))
+
+    p99 = percentile(lookups, 99)
+    if p99 >= args.budget_us:
+        print(f"FAIL: p99 lookup {p99:.1f} µs >= budget {args.budget_us:.0f} µs")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# backend/bench/suite.py
+"""Backend benchmark suite on the in-memory Mongo stand-in (fully offline).
+
+    python -m bench.suite --sizes 1000 10000 --requests 300
+    python -m bench.suite --update-baseline      # after an intentional change
+
+Drives the ASGI app in-process through httpx and reports p50/p95/p99
+latency, one request at a time, for list, search and create with the result
+cache off, plus ``search_cached`` for cache hits; throughput and
+p95 under ``--concurrency`` workers are printed for information only. Exits
+non-zero when a scenario's serial p95 regresses past ``--tolerance``
+relative to bench/baseline.json. Numbers measure the service's own overhead (routing, validation,
+serialization), not MongoDB.
+"""
+import os
+import random
+import string
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "testing"))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_bench")
+
+import httpx  # noqa: E402
+from benchkit import Scenario, run_suite_cli  # noqa: E402
+from mongo_standin import InMemoryDatabase  # noqa: E402
+
+from app import main  # noqa: E402
+from app.indexes import reconcile  # noqa: E402
+from app.result_cache import ResultCache  # noqa: E402
+
+BASELINE = Path(__file__).with_name("baseline.json")
+_COMMON = "deployment service analytics report review thesis lab quiz project database network design".split()
+
+
+def _vocabulary(size: int = 2000) -> List[str]:
+    rng = random.Random(0)
+    words = dict.fromkeys(_COMMON)
+    while len(words) < size:
+        words["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))] = None
+    return list(words)
+
+
+# Zipf-like, as in bench_suggest.py: the course words are the most common, most words are rare
+_VOCAB = _vocabulary()
+_WEIGHTS = [1 / (rank + 1) for rank in range(len(_VOCAB))]
+# what people search for: a specific word, not one in every record
+_QUERY_TERMS = random.Random(1).sample(_VOCAB[len(_COMMON):], 50)
+
+
+async def seed(db: InMemoryDatabase, size: int) -> None:
+    rng = random.Random(size)
+    start = datetime.now(timezone.utc) - timedelta(days=60)
+    docs = [
+        {
+            "title": " ".join(rng.choices(_VOCAB, weights=_WEIGHTS, k=3)).title(),
+            "content": " ".join(rng.choices(_VOCAB, weights=_WEIGHTS, k=20)),
+            "created_at": start + timedelta(seconds=i * 60 * 60 * 24 * 60 / max(size, 1)),
+        }
+        for i in range(size)
+    ]
+    await db.assignments.insert_many(docs)
+    await reconcile(db)
+
+
+async def build(size: int) -> Dict[str, Scenario]:
+    db = InMemoryDatabase()
+    await seed(db, size)
+    main.db = db
+    # list/search are timed against Mongo (here: the stand-in), so a lost index
+    # or an O(n) path shows up; cache hits are tracked by search_cached alone
+    uncached, cached = ResultCache(0, 0), ResultCache(main.settings.result_cache_size, 3600)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    rng = random.Random(1)
+
+    def using(cache: ResultCache, op: Scenario) -> Scenario:
+        async def run(n: int) -> int:
+            main.result_cache = cache
+            return await op(n)
+        return run
+
+    async def list_assignments(_n: int) -> int:
+        return (await client.get("/assignments", params={"limit": 50})).status_code
+
+    async def search_assignments(_n: int) -> int:
+        return (await client.get("/assignments/search", params={"q": rng.choice(_QUERY_TERMS), "limit": 25})).status_code
+
+    async def search_cached(n: int) -> int:
+        if n < 0:
+            # warm-up fills the cache for every term, so the run measures hits only
+            for term in _QUERY_TERMS:
+                await client.get("/assignments/search", params={"q": term, "limit": 25})
+        return await search_assignments(n)
+
+    async def create_assignment(n: int) -> int:
+        payload = {"title": f"Bench record {n}", "content": "created by bench suite"}
+        return (await client.post("/assignments", json=payload)).status_code
+
+    return {
+        "list_assignments": using(uncached, list_assignments),
+        "search_assignments": using(uncached, search_assignments),
+        "search_cached": using(cached, search_cached),
+        "create_assignment": using(uncached, create_assignment),
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(run_suite_cli(__doc__.splitlines()[0], build, BASELINE))
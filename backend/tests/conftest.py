@@ -0,0 +1,4 @@
+import os
+
+# Settings require a Mongo URI at import time; tests never connect to it.
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_test")
@@ -0,0 +1,54 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from app.analytics_client import AnalyticsEmitter
+
+
+def _client(received: List[Dict[str, Any]], status: int = 202) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/ingest/batch"
+        received.extend(json.loads(request.content))
+        return httpx.Response(status, json={"status": "accepted"})
+
+    return httpx.AsyncClient(base_url="http://analytics", transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_emitter_delivers_queued_events_in_batches():
+    received: List[Dict[str, Any]] = []
+    async with _client(received) as client:
+        emitter = AnalyticsEmitter(client, queue_size=10, batch_size=3, flush_interval_s=0.01)
+        emitter.start()
+        for n in range(5):
+            assert emitter.emit({"id": str(n), "title": f"Record {n}"})
+        await emitter.stop()
+
+    assert sorted(event["id"] for event in received) == ["0", "1", "2", "3", "4"]
+    assert emitter.stats() == {"queued": 0, "sent": 5, "failed": 0, "dropped": 0}
+
+
+@pytest.mark.asyncio
+async def test_emitter_drops_instead_of_blocking_when_full():
+    received: List[Dict[str, Any]] = []
+    async with _client(received) as client:
+        emitter = AnalyticsEmitter(client, queue_size=2)
+        assert emitter.emit({"id": "a", "title": "a"})
+        assert emitter.emit({"id": "b", "title": "b"})
+        assert not emitter.emit({"id": "c", "title": "c"})
+    assert emitter.stats()["dropped"] == 1
+    assert received == []
+
+
+@pytest.mark.asyncio
+async def test_emitter_counts_failed_deliveries():
+    received: List[Dict[str, Any]] = []
+    async with _client(received, status=503) as client:
+        emitter = AnalyticsEmitter(client, batch_size=2, flush_interval_s=0.01)
+        emitter.start()
+        emitter.emit({"id": "x", "title": "x"})
+        await asyncio.wait_for(emitter.stop(), timeout=1)
+    assert emitter.stats()["failed"] == 1
@@ -0,0 +1,35 @@
+import pytest
+from benchkit import compare, load_baseline, percentile, run_suite
+
+from bench.suite import BASELINE, build
+
+
+def test_percentile_uses_nearest_rank():
+    sample = [float(n) for n in range(1, 101)]
+    assert percentile(sample, 50) == 50.0
+    assert percentile(sample, 95) == 95.0
+    assert percentile(sample, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_gates_serial_latency_only():
+    baseline = {"list@10": {"p95Ms": 10.0}}
+    # the load pass is informational: a throughput drop alone is not a regression
+    ok = [{"name": "list@10", "errors": 0, "p95Ms": 14.0, "loadThroughput": 10.0, "loadP95Ms": 90.0}]
+    slow = [{"name": "list@10", "errors": 0, "p95Ms": 16.0, "loadThroughput": 100.0, "loadP95Ms": 20.0}]
+    assert compare(ok, baseline, tolerance=0.5) == []
+    assert len(compare(slow, baseline, tolerance=0.5)) == 1
+
+
+@pytest.mark.asyncio
+async def test_backend_suite_runs_offline():
+    results = await run_suite(build, sizes=[50], requests=5, concurrency=2)
+    assert {r["name"] for r in results} == {
+        "list_assignments@50",
+        "search_assignments@50",
+        "search_cached@50",
+        "create_assignment@50",
+    }
+    assert all(r["errors"] == 0 and r["requests"] == 5 and r["concurrency"] == 2 for r in results)
+    # a scenario without a committed baseline is never gated
+    assert {name.split("@")[0] for name in load_baseline(BASELINE)} == {r["name"].split("@")[0] for r in results}
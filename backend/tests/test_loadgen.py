@@ -0,0 +1,26 @@
+import pytest
+from loadgen import DEFAULT_MIX, generate, inprocess_clients, main, read_traffic, replay, summarize, write_traffic
+
+
+def test_generate_follows_the_mix_and_rate(tmp_path):
+    entries = generate(400, {"list": 3, "summary": 1}, rate=100, arrival="uniform")
+    assert {e["name"] for e in entries} == {"list", "summary"}
+    assert entries[-1]["at"] == pytest.approx(3.99)
+
+    path = tmp_path / "traffic.jsonl"
+    write_traffic(path, entries)
+    assert read_traffic(path) == entries
+    with pytest.raises(SystemExit):
+        main(["generate", "-o", str(path)])  # refuses to overwrite without --force
+
+
+@pytest.mark.asyncio
+async def test_inprocess_replay_covers_both_services():
+    entries = generate(60, DEFAULT_MIX, rate=1000)
+    async with inprocess_clients(seed_records=50) as clients:
+        results, elapsed = await replay(entries, clients, concurrency=4, closed=True)
+
+    rows = {row["name"]: row for row in summarize(results, elapsed)}
+    assert set(rows) == {*DEFAULT_MIX, "all"}
+    assert rows["all"]["requests"] == 60 and rows["all"]["errors"] == 0
+    assert all(r["status"] in (200, 201) for r in results)
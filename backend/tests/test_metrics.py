@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from mongo_standin import InMemoryDatabase
+from pymongo import monitoring
+
+from app.main import app
+from app.metrics import (
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    MONGO_CHECKOUT_WAIT,
+    MONGO_DOCS,
+    MONGO_DURATION,
+    MONGO_POOL,
+    MongoCommandListener,
+    MongoPoolListener,
+)
+
+TEST_BASE_URL = "http://localhost"
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def use_inmemory_database(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "db", InMemoryDatabase())
+    yield
+
+
+@pytest.mark.asyncio
+async def test_metrics_label_routes_by_template():
+    before = HTTP_REQUESTS.value(("GET", "/assignments", "200"))
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        assert (await client.get("/assignments?limit=5")).status_code == 200
+        assert (await client.get("/no/such/path")).status_code == 404
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert HTTP_REQUESTS.value(("GET", "/assignments", "200")) == before + 1
+    assert HTTP_LATENCY.count(("GET", "/assignments")) >= 1
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/assignments",le="+Inf"}' in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+    assert "/no/such/path" not in body
+
+
+def test_command_listener_records_duration_and_documents():
+    listener = MongoCommandListener()
+    connection = ("localhost", 27017)
+    started = monitoring.CommandStartedEvent(
+        {"find": "assignments", "filter": {}}, "animo", 7, connection, 1
+    )
+    listener.started(started)
+    listener.succeeded(monitoring.CommandSucceededEvent(
+        timedelta(milliseconds=3),
+        {"ok": 1, "cursor": {"id": 0, "ns": "animo.assignments", "firstBatch": [{}, {}, {}]}},
+        "find", 7, connection, 1,
+    ))
+
+    assert MONGO_DURATION.count(("find", "assignments")) >= 1
+    assert MONGO_DOCS.value(("find", "assignments")) >= 3
+
+
+def test_pool_listener_records_checkout_waits_and_connections():
+    listener = MongoPoolListener()
+    address = ("10.1.11.17", 27017)
+    label = "10.1.11.17:27017"
+    open_before = MONGO_POOL.value((label, "open"))
+
+    listener.connection_created(monitoring.ConnectionCreatedEvent(address, 1))
+    listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, 1, 0.004))
+    listener.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(address, "timeout", 0.5))
+    checked_out = MONGO_POOL.value((label, "checkedOut"))
+    listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(address, 1))
+
+    assert MONGO_CHECKOUT_WAIT.count((label, "ok")) >= 1
+    assert MONGO_CHECKOUT_WAIT.count((label, "timeout")) >= 1
+    assert MONGO_POOL.value((label, "open")) == open_before + 1
+    assert MONGO_POOL.value((label, "checkedOut")) == checked_out - 1
+
+
+@pytest.mark.asyncio
+async def test_client_uses_pool_settings_and_warms_the_pool():
+    from mongo_standin import InMemoryClient
+
+    from app.config import Settings
+    from app.db import create_client, warm_pool
+
+    settings = Settings(
+        MONGODB_URI="mongodb://localhost:27017/animo",
+        MONGODB_MAX_POOL_SIZE=8,
+        MONGODB_MIN_POOL_SIZE=3,
+        MONGODB_WAIT_QUEUE_TIMEOUT_MS=250,
+        MONGODB_COMPRESSORS="zlib",
+    )
+    client = create_client(settings)
+    try:
+        pool = client.delegate.options.pool_options
+        assert (pool.max_pool_size, pool.min_pool_size, pool.wait_queue_timeout) == (8, 3, 0.25)
+        assert client.delegate.options._options["compressors"] == ["zlib"]
+    finally:
+        client.close()
+
+    assert await warm_pool(InMemoryClient(), settings.mongodb_min_pool_size) == 3
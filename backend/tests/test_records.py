@@ -1,107 +1,40 @@
-import re
-from collections.abc import AsyncIterator
+import asyncio
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List
 
+import httpx
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
+from mongo_standin import InMemoryDatabase
 
 from app.main import app, settings
+from app.indexes import reconcile
+from app.result_cache import ResultCache
+from app.suggest import PrefixIndex
 
 TEST_BASE_URL = "http://localhost"
 
 
-class InsertOneResult:
-    def __init__(self, inserted_id: str):
-        self.inserted_id = inserted_id
-
-
-class InMemoryCursor:
-    def __init__(self, items: List[Dict[str, Any]]):
-        self._items = list(items)
-        self._iter: AsyncIterator[Dict[str, Any]] | None = None
-
-    def sort(self, key: str, direction: int):
-        reverse = direction < 0
-        self._items.sort(key=lambda item: item.get(key), reverse=reverse)
-        return self
-
-    def limit(self, count: int):
-        if count >= 0:
-            self._items = self._items[:count]
-        return self
-
-    def __aiter__(self):
-        self._iter = iter(self._items)
-        return self
-
-    async def __anext__(self):
-        assert self._iter is not None
-        try:
-            return next(self._iter)
-        except StopIteration as exc:  # pragma: no cover - iterator protocol
-            raise StopAsyncIteration from exc
-
-
-class InMemoryCollection:
-    def __init__(self):
-        self._data: List[Dict[str, Any]] = []
-        self._counter = 0
-
-    async def insert_one(self, document: Dict[str, Any]):
-        self._counter += 1
-        stored = dict(document)
-        stored["_id"] = str(self._counter)
-        self._data.append(stored)
-        return InsertOneResult(stored["_id"])
-
-    async def find_one(self, filters: Dict[str, Any]):
-        identifier = filters.get("_id")
-        for item in self._data:
-            if item.get("_id") == identifier:
-                return dict(item)
-        return None
-
-    def find(self, filters: Dict[str, Any]):
-        if not filters:
-            candidates = list(self._data)
-        else:
-            candidates = [doc for doc in self._data if _match_filters(doc, filters)]
-        return InMemoryCursor(candidates)
-
-    async def delete_many(self, _filters: Dict[str, Any]):
-        self._data.clear()
-
-
-def _match_filters(document: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-    if "$or" in filters:
-        for clause in filters["$or"]:
-            field, pattern = next(iter(clause.items()))
-            value = str(document.get(field, ""))
-            regex = pattern.get("$regex", "")
-            if re.search(regex, value, re.IGNORECASE):
-                return True
-        return False
-    return True
-
-
-class InMemoryDatabase:
-    def __init__(self):
-        self.records = InMemoryCollection()
-
-
 @pytest_asyncio.fixture(autouse=True)
 async def use_inmemory_database(monkeypatch):
     from app import main
 
-    main.db = InMemoryDatabase()
+    monkeypatch.setattr(main, "db", InMemoryDatabase())
+    monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=64, ttl_s=60))
+    monkeypatch.setattr(main, "suggest_index", PrefixIndex())
+    await reconcile(main.db)
 
     async def _noop(*_args: Any, **_kwargs: Any) -> None:
         return None
 
     monkeypatch.setattr(main, "_notify_analytics", _noop)
     yield
-    await main.db.records.delete_many({})
+    await main.db.assignments.delete_many({})
 
 
 def _headers() -> Dict[str, str]:
@@ -158,4 +91,414 @@ async def test_search_records():
     assert payload["count"] == 2
     titles = {item["title"] for item in payload["items"]}
     assert "First Deployment" in titles
-    assert "Second Deployment" in titles
\ No newline at end of file
+    assert "Second Deployment" in titles
+
+@pytest.mark.asyncio
+async def test_text_search_ranks_title_matches_first():
+    records = [
+        {"title": "Quarterly report", "content": "Deployment notes for the quarter"},
+        {"title": "Deployment checklist", "content": "Steps before release"},
+        {"title": "Unrelated", "content": "Nothing to see here"},
+    ]
+
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        for record in records:
+            response = await client.post("/assignments", json=record, headers=_headers())
+            assert response.status_code == 201
+        search_response = await client.get("/assignments/search", params={"q": "deployment"}, headers=_headers())
+    assert search_response.status_code == 200
+    payload = search_response.json()
+    assert payload["mode"] == "text"
+    assert [item["title"] for item in payload["items"]] == ["Deployment checklist", "Quarterly report"]
+    assert all("score" not in item for item in payload["items"])
+
+
+@pytest.mark.asyncio
+async def test_regex_search_fallback_mode():
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await client.post("/records", json={"title": "Deployment", "content": ""}, headers=_headers())
+        await client.post("/records", json={"title": "Redeploy", "content": ""}, headers=_headers())
+        search_response = await client.get(
+            "/records/search", params={"q": "deploy", "mode": "regex"}, headers=_headers()
+        )
+    assert search_response.status_code == 200
+    payload = search_response.json()
+    assert payload["mode"] == "regex"
+    assert payload["count"] == 2
+
+
+async def _seed_records(client: AsyncClient, count: int) -> None:
+    for n in range(count):
+        response = await client.post("/records", json={"title": f"Record {n}", "content": "paging"}, headers=_headers())
+        assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_list_records_keyset_pagination():
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await _seed_records(client, 7)
+
+        first = (await client.get("/records", params={"limit": 3}, headers=_headers())).json()
+        assert [item["title"] for item in first["items"]] == ["Record 6", "Record 5", "Record 4"]
+        assert first["prevCursor"] is None
+
+        second = (await client.get("/records", params={"limit": 3, "after": first["nextCursor"]}, headers=_headers())).json()
+        assert [item["title"] for item in second["items"]] == ["Record 3", "Record 2", "Record 1"]
+
+        last = (await client.get("/records", params={"limit": 3, "after": second["nextCursor"]}, headers=_headers())).json()
+        assert [item["title"] for item in last["items"]] == ["Record 0"]
+        assert last["nextCursor"] is None
+
+        back = (await client.get("/records", params={"limit": 3, "before": last["prevCursor"]}, headers=_headers())).json()
+        assert back["items"] == second["items"]
+        assert back["prevCursor"] is not None
+
+        top = (await client.get("/records", params={"limit": 3, "before": back["prevCursor"]}, headers=_headers())).json()
+        assert top["items"] == first["items"]
+        assert top["prevCursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_pagination_requires_recent_order():
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await _seed_records(client, 4)
+
+        page = (await client.get(
+            "/records/search", params={"q": "paging", "order": "recent", "limit": 2}, headers=_headers()
+        )).json()
+        assert [item["title"] for item in page["items"]] == ["Record 3", "Record 2"]
+        nxt = (await client.get(
+            "/records/search",
+            params={"q": "paging", "order": "recent", "limit": 2, "after": page["nextCursor"]},
+            headers=_headers(),
+        )).json()
+        assert [item["title"] for item in nxt["items"]] == ["Record 1", "Record 0"]
+        assert nxt["nextCursor"] is None
+
+        ranked = await client.get(
+            "/records/search", params={"q": "paging", "after": page["nextCursor"]}, headers=_headers()
+        )
+        assert ranked.status_code == 400
+
+        bad = await client.get("/records", params={"after": "not-a-cursor"}, headers=_headers())
+        assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_create_queues_analytics_event(monkeypatch):
+    from app import main
+
+    events: List[Dict[str, Any]] = []
+
+    async def _capture(item: Dict[str, Any]) -> None:
+        events.append(item)
+
+    monkeypatch.setattr(main, "_notify_analytics", _capture)
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        response = await client.post("/assignments", json={"title": "Notify me"}, headers=_headers())
+    assert response.status_code == 201
+    assert [event["id"] for event in events] == [response.json()["id"]]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_reports_per_item_results():
+    payload = [
+        {"title": "Bulk one", "content": "first"},
+        {"title": ""},
+        {"content": "missing title"},
+        {"title": "Bulk two"},
+    ]
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        response = await client.post("/records/bulk", json=payload, headers=_headers())
+        listed = (await client.get("/records", headers=_headers())).json()["items"]
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inserted"] == 2
+    assert body["failed"] == 2
+    assert [r["ok"] for r in body["results"]] == [True, False, False, True]
+    assert body["results"][0]["item"]["title"] == "Bulk one"
+    assert body["results"][2]["error"][0]["loc"] == ["title"]
+    assert {item["title"] for item in listed} == {"Bulk one", "Bulk two"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_rejects_oversized_batches():
+    from app.main import BULK_MAX_ITEMS
+
+    payload = [{"title": f"r{n}"} for n in range(BULK_MAX_ITEMS + 1)]
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        response = await client.post("/assignments/bulk", json=payload, headers=_headers())
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_export_streams_ndjson_and_csv():
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await _seed_records(client, 3)
+        ndjson = await client.get("/assignments/export", headers=_headers())
+        as_csv = await client.get("/records/export", params={"format": "csv"}, headers=_headers())
+
+    assert ndjson.status_code == 200
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Record 0", "Record 1", "Record 2"]
+    assert rows[0]["createdAt"].endswith("Z")
+
+    assert as_csv.headers["content-type"].startswith("text/csv")
+    parsed = list(csv.DictReader(io.StringIO(as_csv.text)))
+    assert [row["title"] for row in parsed] == ["Record 0", "Record 1", "Record 2"]
+    assert set(parsed[0]) == {"id", "title", "content", "createdAt"}
+
+
+@pytest.mark.asyncio
+async def test_export_filters_by_created_at_range():
+    from app import main
+
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for day in range(5):
+        await main.db.assignments.insert_one(
+            {"title": f"Day {day}", "content": "", "created_at": base + timedelta(days=day)}
+        )
+
+    params = {"from": "2026-01-02T00:00:00Z", "to": "2026-01-04T00:00:00Z"}
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        response = await client.get("/assignments/export", params=params, headers=_headers())
+    titles = [json.loads(line)["title"] for line in response.text.splitlines()]
+    assert titles == ["Day 1", "Day 2"]
+
+
+@pytest.mark.asyncio
+async def test_ranged_export_streams_in_index_order():
+    from app import main
+    from app.export import date_range_filter, export_sort
+    from app.indexes import summarize_plan
+
+    # a deployment still carrying the single-field index loses it on reconcile
+    await main.db.assignments.create_index([("created_at", -1)], name="created_at_desc")
+    assert (await reconcile(main.db))["assignments.created_at_desc"] == "dropped"
+
+    start = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    find = {"find": "assignments", "filter": date_range_filter(start, None), "sort": dict(export_sort(start, None))}
+    plan = summarize_plan(await main.db.command({"explain": find, "verbosity": "queryPlanner"}))
+    assert plan["indexes"] == ["created_at_id_desc"]
+    assert not plan["inMemorySort"] and not plan["collectionScan"]
+
+
+@pytest.mark.asyncio
+async def test_query_plans_report_indexed_hot_queries():
+    from app import main
+    from app.indexes import INDEXES
+
+    assert set((await reconcile(main.db)).values()) == {"unchanged"}
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        body = (await client.get("/admin/query-plans", headers=_headers())).json()
+    assert body["notIndexed"] == []
+    plans = {q["name"]: q for q in body["queries"]}
+    assert plans["search_text_relevance"]["indexes"] == ["assignments_text"]
+
+    await main.db.assignments.drop_index(INDEXES[1].name)
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        body = (await client.get("/admin/query-plans", headers=_headers())).json()
+    assert "search_text_relevance" in body["notIndexed"]
+
+
+@pytest.mark.asyncio
+async def test_read_routing_applies_per_endpoint_preferences(monkeypatch):
+    from app import main
+    from app.read_routing import read_preference, route_table
+
+    routes = route_table("primary", {"list": "secondaryPreferred", "search": "nearest", "export": None}, 120)
+    monkeypatch.setattr(main, "READ_ROUTES", routes)
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await client.get("/assignments", headers=_headers())
+        listed = main.db.assignments.read_preference
+        await client.get("/assignments/search", params={"q": "x"}, headers=_headers())
+        searched = main.db.assignments.read_preference
+        health = (await client.get("/health", headers=_headers())).json()
+
+    assert listed.document == {"mode": "secondaryPreferred", "maxStalenessSeconds": 120}
+    assert searched.document == {"mode": "nearest", "maxStalenessSeconds": 120}
+    assert health["readRouting"]["export"] == {"mode": "primary"}
+    with pytest.raises(ValueError):
+        read_preference("secondary", 30)
+
+
+@pytest.mark.asyncio
+async def test_list_and_search_answer_conditional_gets():
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await client.post("/assignments", json={"title": "Cached list"}, headers=_headers())
+        first = await client.get("/records", params={"limit": 5}, headers=_headers())
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "public, no-cache"
+        assert first.headers["x-accel-expires"] == str(settings.http_cache_seconds)
+
+        again = await client.get("/records", params={"limit": 5}, headers={**_headers(), "If-None-Match": etag})
+        other_params = await client.get("/records", params={"limit": 6}, headers={**_headers(), "If-None-Match": etag})
+        search = await client.get("/records/search", params={"q": "cached"}, headers=_headers())
+
+        await client.post("/assignments", json={"title": "Newer"}, headers=_headers())
+        after_write = await client.get("/records", params={"limit": 5}, headers={**_headers(), "If-None-Match": etag})
+
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+    assert "last-modified" not in first.headers
+    assert other_params.status_code == 200
+    assert search.headers["etag"] != etag
+    assert after_write.status_code == 200 and after_write.headers["etag"] != etag
+    assert after_write.json()["items"][0]["title"] == "Newer"
+
+
+@pytest.mark.asyncio
+async def test_write_below_the_newest_id_still_changes_the_etag(monkeypatch):
+    from bson import ObjectId
+
+    from app import main
+
+    # same second, different per-process random bytes: B's id sorts below A's
+    second = int(datetime.now(timezone.utc).timestamp()).to_bytes(4, "big")
+    worker_a = ObjectId(second + b"\xff" * 5 + b"\x00\x00\x01")
+    worker_b = ObjectId(second + b"\x00" * 5 + b"\x00\x00\x01")
+    ids = iter([worker_a, worker_b])
+    new_document = main._new_document
+    monkeypatch.setattr(main, "_new_document", lambda payload: {"_id": next(ids), **new_document(payload)})
+
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await client.post("/assignments", json={"title": "From worker A"}, headers=_headers())
+        first = await client.get("/assignments", headers=_headers())
+        await client.post("/assignments", json={"title": "From worker B"}, headers=_headers())
+        second_read = await client.get("/assignments", headers={**_headers(), "If-None-Match": first.headers["etag"]})
+
+    assert worker_b < worker_a
+    assert second_read.status_code == 200
+    assert {item["title"] for item in second_read.json()["items"]} == {"From worker A", "From worker B"}
+    # the version is read, never written: creates stay a single insert
+    assert await main.db.list_collection_names() == ["assignments"]
+
+
+@pytest.mark.asyncio
+async def test_lifespan_owns_a_client_per_worker(monkeypatch):
+    from mongo_standin import InMemoryClient
+
+    from app import main
+    from app.metrics import STARTUP_SECONDS
+
+    created: List[InMemoryClient] = []
+
+    def _create(_settings: Any) -> InMemoryClient:
+        created.append(InMemoryClient())
+        return created[-1]
+
+    monkeypatch.setattr(main, "create_client", _create)
+    monkeypatch.setattr(main, "client", None)
+    fixture_db = main.db
+    async with main.lifespan(app):
+        assert main.client is created[0]
+        assert main.db is created[0].get_default_database()
+        assert set((await reconcile(main.db)).values()) == {"unchanged"}
+    assert len(created) == 1 and main.client is None and main.db is None
+    assert STARTUP_SECONDS.value((str(os.getpid()),)) > 0
+    main.db = fixture_db
+
+
+class _SlowAnalytics:
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+        self.calls: List[str] = []
+
+    async def _reply(self, method: str, path: str) -> httpx.Response:
+        self.calls.append(f"{method} {path}")
+        await asyncio.sleep(self.delay_s)
+        return httpx.Response(200, json={"ok": True}, request=httpx.Request(method, f"http://analytics{path}"))
+
+    async def post(self, path: str, **_kwargs: Any) -> httpx.Response:
+        return await self._reply("POST", path)
+
+    async def get(self, path: str, **_kwargs: Any) -> httpx.Response:
+        return await self._reply("GET", path)
+
+
+@pytest.mark.asyncio
+async def test_connectivity_probes_run_concurrently_and_cache(monkeypatch):
+    from mongo_standin import InMemoryClient
+
+    from app import main
+    from app.probes import DependencyProber
+
+    analytics = _SlowAnalytics(0.2)
+
+    async def _slow_round_trip(db: Any, doc: Dict[str, Any]):
+        await asyncio.sleep(0.2)
+        return True, "Inserted and read diagnostic record."
+
+    monkeypatch.setattr(main, "analytics_http", analytics)
+    monkeypatch.setattr(main, "client", InMemoryClient(main.db))
+    monkeypatch.setattr(main, "mongo_round_trip", _slow_round_trip)
+    monkeypatch.setattr(main, "prober", DependencyProber(main._readonly_report))
+
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        # nothing recorded yet: a cached request runs the read-only probe once
+        first = (await client.post("/connectivity-test?cached=1")).json()
+        live = (await client.post("/connectivity-test", json={"title": "Probe"})).json()
+        cached = (await client.post("/connectivity-test?cached=1")).json()
+        missing_body = await client.post("/connectivity-test")
+
+    assert first["probe"] == "ping" and first["cached"] is True
+    assert [s["ok"] for s in live["services"]] == [True, True, True]
+    assert live["probe"] == "roundTrip" and live["echo"]["title"] == "Probe"
+    # both dependencies take 0.2s; sequential probing would take 0.4s
+    assert live["latencyMs"] < 350
+    assert cached["timestamp"] == live["timestamp"] and cached["ageSeconds"] >= 0
+    assert analytics.calls == ["GET /health", "POST /ingest"]
+    assert missing_body.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_search_results_are_cached_until_the_next_write():
+    from app import main
+
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await client.post("/assignments", json={"title": "Network lab"})
+        first = (await client.get("/assignments/search", params={"q": "network"})).json()
+        again = (await client.get("/assignments/search", params={"q": "  NETWORK "})).json()
+        stats = main.result_cache.stats()
+        await client.post("/assignments", json={"title": "Network quiz"})
+        after_write = (await client.get("/assignments/search", params={"q": "network"})).json()
+        health = (await client.get("/health")).json()
+
+    assert first["count"] == again["count"] == 1 and again["query"] == "NETWORK"
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert after_write["count"] == 2
+    assert health["resultCache"]["generation"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_follow_writes_from_other_workers():
+    from bson import ObjectId
+
+    from app import main
+
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        await client.post("/assignments", json={"title": "Local write"})
+        first = (await client.get("/assignments")).json()
+        # another worker: its insert sorts below ours and never touches this process's cache
+        low_id = ObjectId(ObjectId(first["items"][0]["id"]).binary[:4] + b"\x00" * 8)
+        await main.db.assignments.insert_one({"_id": low_id, "title": "Remote write", "created_at": main._utcnow()})
+        after_remote = (await client.get("/assignments")).json()
+
+    assert [item["title"] for item in after_remote["items"]] == ["Local write", "Remote write"]
+    assert main.result_cache.generation == 1
+
+
+@pytest.mark.asyncio
+async def test_suggest_completes_the_last_word_and_follows_writes():
+    from app import main
+
+    await main.db.assignments.insert_many([{"title": "Network lab"}, {"title": "Network design"}])
+    async with AsyncClient(app=app, base_url=TEST_BASE_URL) as client:
+        first = (await client.get("/assignments/suggest", params={"prefix": "intro to net"})).json()
+        await client.post("/assignments", json={"title": "Neural networks"})
+        after_write = (await client.get("/assignments/suggest", params={"prefix": "ne", "limit": 2})).json()
+        blank = (await client.get("/assignments/suggest", params={"prefix": "network "})).json()
+
+    assert first["suggestions"] == [{"term": "network", "count": 2}]
+    assert after_write["suggestions"] == [{"term": "network", "count": 2}, {"term": "networks", "count": 1}]
+    assert blank["suggestions"] == []
@@ -0,0 +1,63 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from app.result_cache import ResultCache
+
+
+@pytest.mark.asyncio
+async def test_cache_coalesces_identical_misses():
+    calls: List[str] = []
+
+    async def compute() -> str:
+        calls.append("q")
+        await asyncio.sleep(0.01)
+        return "page"
+
+    cache = ResultCache(max_entries=4, ttl_s=60)
+    results = await asyncio.gather(*(cache.get("q", compute) for _ in range(5)))
+    assert results == ["page"] * 5 and calls == ["q"]
+    assert await cache.get("q", compute) == "page"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["coalesced"]) == (1, 5, 4)
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl_s=60)
+
+    def value(v: str):
+        async def compute() -> str:
+            return v
+        return compute
+
+    await cache.get("a", value("a"))
+    await cache.get("b", value("b"))
+    await cache.get("a", value("a2"))  # hit: "a" becomes most recent
+    await cache.get("c", value("c"))
+    assert await cache.get("a", value("a3")) == "a"
+    assert await cache.get("b", value("b2")) == "b2"
+    assert cache.stats()["evictions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_write_during_compute_is_not_cached():
+    cache = ResultCache(max_entries=4, ttl_s=60)
+    started = asyncio.Event()
+
+    async def slow() -> str:
+        started.set()
+        await asyncio.sleep(0.01)
+        return "old"
+
+    pending = asyncio.ensure_future(cache.get("q", slow))
+    await started.wait()
+    cache.bump()
+    assert await pending == "old"
+
+    async def fresh() -> str:
+        return "new"
+
+    assert await cache.get("q", fresh) == "new"
+    assert cache.stats()["generation"] == 1
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from mongo_standin import InMemoryDatabase
+
+from app.suggest import PrefixIndex, last_word, terms
+
+
+def test_terms_and_last_word():
+    assert terms("Network Lab: network design_2") == ["network", "lab", "design"]
+    assert last_word("intro to Netw") == "netw"
+    assert last_word("intro to ") == ""
+
+
+@pytest.mark.asyncio
+async def test_incremental_updates_match_a_full_rebuild():
+    db = InMemoryDatabase()
+    titles = ["Network lab", "Network quiz", "Neural nets", "New project", "Network design"]
+    await db.assignments.insert_many([{"title": t} for t in titles])
+    loaded = PrefixIndex(k=3)
+    assert await loaded.sync(db.assignments) == 5
+
+    patched = PrefixIndex(k=3)
+    for title in titles:
+        patched.add(ObjectId(), title)
+
+    expected = [(3, "network"), (1, "nets"), (1, "neural")]
+    assert loaded.suggest("ne") == patched.suggest("ne") == expected
+    assert loaded.suggest("NETW", 1) == [(3, "network")]
+    assert loaded.suggest("x") == []
+
+
+@pytest.mark.asyncio
+async def test_catch_up_counts_other_writers_once():
+    db = InMemoryDatabase()
+    index = PrefixIndex(overlap_s=10)
+    await index.sync(db.assignments)
+
+    # written by this process: added immediately, skipped by the catch-up
+    own = {"_id": ObjectId(), "title": "Thesis draft"}
+    await db.assignments.insert_one(own)
+    index.add(own["_id"], own["title"])
+    # written by another worker, with an ObjectId a few seconds older
+    other_id = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=3))
+    await db.assignments.insert_one({"_id": other_id, "title": "Thesis outline"})
+
+    assert await index.sync(db.assignments) == 1
+    assert await index.sync(db.assignments) == 0
+    assert index.suggest("the") == [(2, "thesis")]
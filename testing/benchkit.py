@@ -0,0 +1,164 @@
+# testing/benchkit.py
+"""Small harness shared by the backend and analytics benchmark suites.
+
+A scenario is an async callable issuing one request and returning its HTTP
+status. ``run_scenario`` drives it with ``concurrency`` workers, then in a
+few rounds of one request at a time; the best serial round measures the
+service time of the code under test. Against the in-process stand-in, concurrent latency is mostly
+queueing behind other requests on the same event loop, so that pass is
+reported (``loadThroughput``, ``loadP95Ms``) but never gated. ``compare``
+checks the serial p95 against a stored baseline with a relative tolerance,
+so the suites can fail CI on regressions. ``run_suite_cli`` is the common
+command line.
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+Scenario = Callable[[int], Awaitable[int]]
+BuildScenarios = Callable[[int], Awaitable[Dict[str, Scenario]]]
+
+
+def percentile(sorted_ms: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sample (q in 0..100)."""
+    if not sorted_ms:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_ms)))
+    return sorted_ms[rank - 1]
+
+
+async def _drive(op: Scenario, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for n in counter:
+            t0 = time.perf_counter()
+            try:
+                status = await op(n)
+            except Exception:
+                status = 599
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if status >= 400:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {"latencies": latencies, "errors": errors, "seconds": elapsed}
+
+
+async def run_scenario(name: str, op: Scenario, requests: int, concurrency: int, rounds: int = 3) -> Dict[str, Any]:
+    # the load pass goes first and doubles as warm-up for the gated serial pass
+    loaded = await _drive(op, requests, concurrency) if concurrency > 1 else None
+    serial_rounds = [await _drive(op, requests, 1) for _ in range(max(1, rounds))]
+    # like timeit, keep the best round: slower ones measure other load on the machine
+    serial = min(serial_rounds, key=lambda r: percentile(r["latencies"], 95))
+    loaded = loaded or serial
+    latencies = serial["latencies"]
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "errors": sum(r["errors"] for r in serial_rounds) + (loaded["errors"] if loaded is not serial else 0),
+        "p50Ms": round(percentile(latencies, 50), 3),
+        "p95Ms": round(percentile(latencies, 95), 3),
+        "p99Ms": round(percentile(latencies, 99), 3),
+        "concurrency": max(1, concurrency),
+        "loadThroughput": round(len(loaded["latencies"]) / loaded["seconds"], 1) if loaded["seconds"] else 0.0,
+        "loadP95Ms": round(percentile(loaded["latencies"], 95), 3),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Human-readable regressions of the serial p95; scenarios missing from the baseline are skipped."""
+    problems: List[str] = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if r["errors"]:
+            problems.append(f"{r['name']}: {r['errors']} failed requests")
+        if not base:
+            continue
+        if r["p95Ms"] > base["p95Ms"] * (1 + tolerance):
+            problems.append(f"{r['name']}: p95 {r['p95Ms']}ms > baseline {base['p95Ms']}ms (+{tolerance:.0%})")
+    return problems
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, results: List[Dict[str, Any]]) -> None:
+    data = {r["name"]: {"p95Ms": r["p95Ms"]} for r in results}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    lines = [
+        f"{'scenario':<32} {'req':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        f" | {'load req/s':>10} {'load p95':>9}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r['name']:<32} {r['requests']:>6} {r['errors']:>4} "
+            f"{r['p50Ms']:>8.2f} {r['p95Ms']:>8.2f} {r['p99Ms']:>8.2f}"
+            f" | {r['loadThroughput']:>10.1f} {r['loadP95Ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+async def run_suite(
+    build: BuildScenarios,
+    sizes: Sequence[int],
+    requests: int,
+    concurrency: int,
+    only: Optional[Sequence[str]] = None,
+    rounds: int = 3,
+) -> List[Dict[str, Any]]:
+    """Seed each dataset size with ``build`` and run every scenario it returns."""
+    results: List[Dict[str, Any]] = []
+    for size in sizes:
+        scenarios = await build(size)
+        for name, op in scenarios.items():
+            if only and name not in only:
+                continue
+            await op(-1)  # warm-up: imports, first-route compilation, caches
+            results.append(await run_scenario(f"{name}@{size}", op, requests, concurrency, rounds))
+    return results
+
+
+def run_suite_cli(description: str, build: BuildScenarios, default_baseline: Path, argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000], help="seeded documents per run")
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="workers for the informational load pass")
+    parser.add_argument("--rounds", type=int, default=3, help="serial rounds; the best one is gated")
+    parser.add_argument("--only", nargs="*", help="run just these scenarios")
+    parser.add_argument("--baseline", type=Path, default=default_baseline)
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed relative slowdown of the serial p95")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, help="also write raw results here")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_suite(build, args.sizes, args.requests, args.concurrency, args.only, args.rounds))
+    print(format_table(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    problems = compare(results, load_baseline(args.baseline), args.tolerance)
+    for p in problems:
+        print(f"REGRESSION {p}", file=sys.stderr)
+    return 1 if problems else 0
@@ -0,0 +1,355 @@
+# testing/loadgen.py
+"""Load generator: write and replay traffic files against backend and analytics.
+
+    python testing/loadgen.py generate -o traffic.jsonl --requests 2000 --rate 200
+    python testing/loadgen.py replay traffic.jsonl --inprocess --seed-records 10000
+    python testing/loadgen.py replay traffic.jsonl --concurrency 32 \\
+        --base-url backend=http://localhost/api --base-url analytics=http://localhost/analytics
+
+Traffic files are JSONL, one request per line::
+
+    {"at": 0.012, "name": "search", "service": "backend", "method": "GET",
+     "path": "/assignments/search", "params": {"q": "lab", "limit": 25}}
+
+``at`` is the arrival offset in seconds and ``name`` groups the report.
+``generate`` draws a weighted mix (``--mix list=30,search=25,...``) with
+Poisson or uniform arrivals at ``--rate`` requests per second.
+
+Replays are open loop: each request is sent at its offset (scaled by
+``--speed``) and its latency counts from that moment, so a slow server is not
+hidden by the generator waiting on it. ``--concurrency`` caps requests in
+flight; ``--closed`` ignores offsets and keeps that many requests busy back to
+back. ``--record`` writes every replayed request with its status and latency.
+
+``--inprocess`` needs no network: both ASGI apps are imported over one shared
+in-memory Mongo stand-in (they share a database in production too), their
+lifespans run, and the backend's analytics events are delivered to the
+in-process analytics app.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import ModuleType
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from benchkit import percentile
+from mongo_standin import InMemoryClient, InMemoryDatabase
+
+REPO = Path(__file__).resolve().parents[1]
+SERVICES = ("backend", "analytics")
+
+_VOCAB = "deployment service analytics report review thesis lab quiz project database network design".split()
+
+Entry = Dict[str, Any]
+Builder = Callable[[random.Random, int], Entry]
+
+_BUILDERS: Dict[str, Builder] = {
+    "list": lambda rng, n: {"service": "backend", "method": "GET", "path": "/assignments",
+                            "params": {"limit": rng.choice([10, 25, 50])}},
+    "search": lambda rng, n: {"service": "backend", "method": "GET", "path": "/assignments/search",
+                              "params": {"q": rng.choice(_VOCAB), "limit": 25}},
+    "suggest": lambda rng, n: {"service": "backend", "method": "GET", "path": "/assignments/suggest",
+                               "params": {"prefix": rng.choice(_VOCAB)[: rng.randint(1, 4)]}},
+    "create": lambda rng, n: {"service": "backend", "method": "POST", "path": "/assignments",
+                              "json": {"title": " ".join(rng.choices(_VOCAB, k=3)).title(),
+                                       "content": f"loadgen record {n}"}},
+    "summary": lambda rng, n: {"service": "analytics", "method": "GET", "path": "/summary"},
+    "events": lambda rng, n: {"service": "analytics", "method": "GET", "path": "/events",
+                              "params": {"limit": 50}},
+}
+DEFAULT_MIX = {"list": 30, "search": 25, "suggest": 10, "create": 10, "summary": 20, "events": 5}
+
+
+# ---------- Traffic files ----------
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in _BUILDERS:
+            raise argparse.ArgumentTypeError(f"unknown request kind {name!r}; choose from {sorted(_BUILDERS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def generate(requests: int, mix: Dict[str, float], rate: float, arrival: str = "poisson", seed: int = 1) -> List[Entry]:
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    at = 0.0
+    entries: List[Entry] = []
+    for n in range(requests):
+        name = rng.choices(names, weights)[0]
+        entries.append({"at": round(at, 6), "name": name, **_BUILDERS[name](rng, n)})
+        at += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+    return entries
+
+
+def read_traffic(path: Path) -> List[Entry]:
+    with path.open() as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    for entry in entries:
+        entry.setdefault("at", 0.0)
+        entry.setdefault("service", "backend")
+        entry.setdefault("name", f"{entry.get('method', 'GET')} {entry['path']}")
+    return sorted(entries, key=lambda e: e["at"])
+
+
+def write_traffic(path: Path, entries: Iterable[Entry]) -> None:
+    with path.open("w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+# ---------- Replay ----------
+
+async def _send(client: httpx.AsyncClient, entry: Entry) -> int:
+    try:
+        response = await client.request(
+            entry.get("method", "GET"), entry["path"], params=entry.get("params"), json=entry.get("json")
+        )
+        return response.status_code
+    except httpx.HTTPError:
+        return 599
+
+
+async def replay(
+    entries: List[Entry],
+    clients: Dict[str, httpx.AsyncClient],
+    concurrency: int = 16,
+    speed: float = 1.0,
+    closed: bool = False,
+) -> Tuple[List[Entry], float]:
+    """Send ``entries``; returns one result per request (entry + status, latencyMs) and the elapsed seconds."""
+    results: List[Entry] = []
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def fire(entry: Entry, scheduled: float) -> None:
+        client = clients.get(entry["service"])
+        status = await _send(client, entry) if client is not None else 0
+        results.append({**entry, "status": status, "latencyMs": round((loop.time() - scheduled) * 1000, 3)})
+
+    if closed:
+        pending = iter(entries)
+
+        async def worker() -> None:
+            for entry in pending:
+                await fire(entry, loop.time())
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    else:
+        slots = asyncio.Semaphore(max(1, concurrency))
+        tasks = []
+
+        async def bounded(entry: Entry, scheduled: float) -> None:
+            try:
+                await fire(entry, scheduled)
+            finally:
+                slots.release()
+
+        for entry in entries:
+            scheduled = started + entry["at"] / speed
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # waiting for a slot delays the send, and that delay counts as latency
+            await slots.acquire()
+            tasks.append(asyncio.create_task(bounded(entry, scheduled)))
+        await asyncio.gather(*tasks)
+    return results, loop.time() - started
+
+
+def summarize(results: List[Entry], elapsed: float) -> List[Dict[str, Any]]:
+    """Per-name (and overall) throughput, error rate and latency percentiles."""
+    groups: Dict[str, List[Entry]] = {}
+    for r in results:
+        if r["status"]:  # 0: no client for that service
+            groups.setdefault(r["name"], []).append(r)
+    groups = dict(sorted(groups.items()))
+    groups["all"] = [r for rs in groups.values() for r in rs]
+    rows = []
+    for name, rs in groups.items():
+        latencies = sorted(r["latencyMs"] for r in rs)
+        errors = sum(1 for r in rs if r["status"] >= 400)
+        rows.append({
+            "name": name,
+            "requests": len(rs),
+            "errors": errors,
+            "errorRate": round(errors / len(rs), 4) if rs else 0.0,
+            "throughput": round(len(rs) / elapsed, 1) if elapsed else 0.0,
+            "p50Ms": round(percentile(latencies, 50), 3),
+            "p95Ms": round(percentile(latencies, 95), 3),
+            "p99Ms": round(percentile(latencies, 99), 3),
+        })
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'endpoint':<12} {'req':>7} {'err%':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    for r in rows:
+        lines.append(
+            f"{r['name']:<12} {r['requests']:>7} {r['errorRate'] * 100:>6.2f} {r['throughput']:>9.1f} "
+            f"{r['p50Ms']:>8.2f} {r['p95Ms']:>8.2f} {r['p99Ms']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+# ---------- In-process apps ----------
+
+def _take_modules(package: str) -> Dict[str, ModuleType]:
+    names = [n for n in sys.modules if n == package or n.startswith(package + ".")]
+    return {n: sys.modules.pop(n) for n in names}
+
+
+def load_service(service: str) -> Dict[str, ModuleType]:
+    """Import ``<service>/app`` as a module tree of its own.
+
+    Both services name their package ``app``; each import gets a private
+    copy, and whatever ``app`` was imported before is put back afterwards.
+    """
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/animoassign_loadgen")
+    previous = _take_modules("app")
+    saved_path = sys.path[:]
+    # analytics/app has no __init__.py, so any other ``app`` on the path would win over it
+    sys.path[:] = [str(REPO / service)] + [p for p in saved_path if not (Path(p or ".").resolve() / "app").is_dir()]
+    try:
+        importlib.import_module("app.main")
+    finally:
+        sys.path[:] = saved_path
+        modules = _take_modules("app")
+        sys.modules.update(previous)
+    return modules
+
+
+async def _seed(db: InMemoryDatabase, records: int, source: str) -> None:
+    rng = random.Random(records)
+    start = datetime.now(timezone.utc) - timedelta(days=60)
+    step = timedelta(days=60) / max(records, 1)
+    await db[source].insert_many([
+        {
+            "title": " ".join(rng.choices(_VOCAB, k=3)).title(),
+            "content": " ".join(rng.choices(_VOCAB, k=20)),
+            "created_at": start + i * step,
+        }
+        for i in range(records)
+    ])
+
+
+@asynccontextmanager
+async def inprocess_clients(seed_records: int = 1000) -> AsyncIterator[Dict[str, httpx.AsyncClient]]:
+    """Both apps over one in-memory database, lifespans running, keyed by service."""
+    db = InMemoryDatabase()
+    analytics, backend = load_service("analytics"), load_service("backend")
+    analytics_main, backend_main = analytics["app.main"], backend["app.main"]
+    await _seed(db, seed_records, analytics_main.SOURCE_COLLECTION)
+    await analytics["app.rollups"].rebuild(db, analytics_main.SOURCE_COLLECTION)
+
+    def _analytics_client(*_args: Any, **_kwargs: Any) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=analytics_main.app), base_url="http://analytics")
+
+    for main in (analytics_main, backend_main):
+        main.create_client = lambda *_args, **_kwargs: InMemoryClient(db)
+    backend_main.build_http_client = _analytics_client
+
+    async with AsyncExitStack() as stack:
+        await stack.enter_async_context(analytics_main.lifespan(analytics_main.app))
+        await stack.enter_async_context(backend_main.lifespan(backend_main.app))
+        clients = {
+            "analytics": _analytics_client(),
+            "backend": httpx.AsyncClient(transport=httpx.ASGITransport(app=backend_main.app), base_url="http://backend"),
+        }
+        for client in clients.values():
+            await stack.enter_async_context(client)
+        yield clients
+
+
+@asynccontextmanager
+async def http_clients(base_urls: Dict[str, str], timeout_s: float) -> AsyncIterator[Dict[str, httpx.AsyncClient]]:
+    async with AsyncExitStack() as stack:
+        clients = {}
+        for service, url in base_urls.items():
+            clients[service] = await stack.enter_async_context(httpx.AsyncClient(base_url=url, timeout=timeout_s))
+        yield clients
+
+
+# ---------- CLI ----------
+
+def _base_url(spec: str) -> Tuple[str, str]:
+    service, _, url = spec.partition("=")
+    if service not in SERVICES or not url:
+        raise argparse.ArgumentTypeError(f"expected SERVICE=URL with SERVICE in {SERVICES}")
+    return service, url
+
+
+async def _run_replay(args: argparse.Namespace) -> int:
+    entries = read_traffic(args.traffic)
+    if args.limit:
+        entries = entries[: args.limit]
+    clients_cm = (
+        inprocess_clients(args.seed_records) if args.inprocess else http_clients(dict(args.base_url), args.timeout)
+    )
+    async with clients_cm as clients:
+        skipped = sum(1 for e in entries if e["service"] not in clients)
+        if skipped:
+            print(f"skipping {skipped} requests for services without a target", file=sys.stderr)
+        results, elapsed = await replay(entries, clients, args.concurrency, args.speed, args.closed)
+    rows = summarize(results, elapsed)
+    print(format_table(rows))
+    print(f"{len(results) - skipped} requests in {elapsed:.2f}s")
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2) + "\n")
+    if args.record:
+        write_traffic(args.record, sorted(results, key=lambda r: r["at"]))
+    return 1 if args.max_error_rate is not None and rows[-1]["errorRate"] > args.max_error_rate else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="write a traffic file from a weighted request mix")
+    gen.add_argument("-o", "--out", type=Path, required=True)
+    gen.add_argument("--requests", type=int, default=1000)
+    gen.add_argument("--rate", type=float, default=100.0, help="mean arrivals per second")
+    gen.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    gen.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. list=30,search=25,create=10")
+    gen.add_argument("--seed", type=int, default=1)
+    gen.add_argument("--force", action="store_true", help="overwrite an existing file")
+
+    rep = sub.add_parser("replay", help="send a traffic file and report per-endpoint statistics")
+    rep.add_argument("traffic", type=Path)
+    target = rep.add_mutually_exclusive_group(required=True)
+    target.add_argument("--inprocess", action="store_true", help="in-process apps on the in-memory stand-in")
+    target.add_argument("--base-url", type=_base_url, action="append", metavar="SERVICE=URL")
+    rep.add_argument("--seed-records", type=int, default=1000, help="records seeded for --inprocess")
+    rep.add_argument("--concurrency", type=int, default=16, help="max requests in flight")
+    rep.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier for arrival offsets")
+    rep.add_argument("--closed", action="store_true", help="ignore offsets; keep --concurrency requests busy")
+    rep.add_argument("--limit", type=int, help="replay only the first N requests")
+    rep.add_argument("--timeout", type=float, default=10.0, help="HTTP timeout in seconds")
+    rep.add_argument("--json", type=Path, help="also write the summary here")
+    rep.add_argument("--record", type=Path, help="write each request with its status and latency here")
+    rep.add_argument("--max-error-rate", type=float, help="exit non-zero above this overall error rate")
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        if args.out.exists() and not args.force:
+            parser.error(f"{args.out} exists; pass --force to overwrite it")
+        entries = generate(args.requests, args.mix, args.rate, args.arrival, args.seed)
+        write_traffic(args.out, entries)
+        print(f"wrote {len(entries)} requests spanning {entries[-1]['at'] if entries else 0:.2f}s to {args.out}")
+        return 0
+    return asyncio.run(_run_replay(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
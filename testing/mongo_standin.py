@@ -0,0 +1,944 @@
+# testing/mongo_standin.py
+"""In-memory stand-in for the Motor API surface used by backend and analytics.
+
+Grown out of the fakes in backend/tests/test_records.py so that tests,
+benchmarks and the load generator can run both services fully offline. It
+implements just enough of Motor/pymongo semantics for our queries:
+
+* ``find`` / ``find_one`` with equality, ``$lt``/``$lte``/``$gt``/``$gte``,
+  ``$in``/``$nin``/``$ne``/``$exists``, ``$regex``, ``$and``/``$or`` and a
+  crude ``$text`` (weighted token match, plural folding), inclusion/exclusion
+  projections and ``{"$meta": "textScore"}``
+* cursor ``sort`` (single key or key list), ``skip``, ``limit``, ``batch_size``,
+  ``to_list`` and async iteration
+* ``insert_one`` / ``insert_many`` (``_id`` stamped onto the caller's dicts,
+  duplicate ``_id`` raises like the server), ``update_one`` / ``bulk_write``
+  with ``$set``/``$inc``/``$setOnInsert``/``$max``/``$push`` and upserts,
+  ``replace_one``, ``delete_one`` / ``delete_many``
+* ``count_documents``, ``estimated_document_count``, ``distinct``
+* ``aggregate`` with ``$match``, ``$group`` (``$sum``/``$max``/``$min``/
+  ``$first``), ``$sort``, ``$limit``, ``$skip``, ``$project``, ``$unwind``
+  and the ``$toDate`` / ``$dateToString`` / ``$dateTrunc`` expressions
+* ``rename`` (with ``dropTarget``), swapping the contents and indexes into
+  the target name
+* ``create_index`` / ``index_information`` / ``drop_index`` bookkeeping, and
+  an ``explain`` of ``find`` that picks an index by its leading key the way
+  the real planner would for our simple queries
+* ``collMod`` of an index's ``expireAfterSeconds``, and ``expire_ttl()`` to
+  run one pass of the TTL monitor on demand
+
+Nothing here models performance beyond two indexes, so benchmarks of the
+paths that use them scale the way they do on the server: ``find`` with no
+filter other than an ``_id`` range, sorted on ``_id`` and limited, walks a
+sorted ``_id`` list (keyset pages cost O(limit)), and ``$text`` looks its
+terms up in postings instead of tokenizing every document. Every other query
+is a Python scan.
+"""
+import bisect
+import copy
+import heapq
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+_MISSING = object()
+
+# ---------- results ----------
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id: Any):
+        self.inserted_id = inserted_id
+        self.acknowledged = True
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids: List[Any]):
+        self.inserted_ids = inserted_ids
+        self.acknowledged = True
+
+
+class UpdateResult:
+    def __init__(self, matched: int, modified: int, upserted_id: Any = None):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_id = upserted_id
+        self.acknowledged = True
+
+
+class DeleteResult:
+    def __init__(self, deleted: int):
+        self.deleted_count = deleted
+        self.acknowledged = True
+
+
+class BulkWriteResult:
+    def __init__(self, inserted: int, matched: int, modified: int, deleted: int, upserted: Dict[int, Any]):
+        self.inserted_count = inserted
+        self.matched_count = matched
+        self.modified_count = modified
+        self.deleted_count = deleted
+        self.upserted_ids = upserted
+        self.upserted_count = len(upserted)
+        self.acknowledged = True
+
+
+# ---------- field access ----------
+
+
+def _get(doc: Dict[str, Any], path: str, default: Any = None) -> Any:
+    cur: Any = doc
+    for part in path.split("."):
+        if isinstance(cur, dict) and part in cur:
+            cur = cur[part]
+        else:
+            return default
+    return cur
+
+
+def _set(doc: Dict[str, Any], path: str, value: Any) -> None:
+    parts = path.split(".")
+    cur = doc
+    for part in parts[:-1]:
+        cur = cur.setdefault(part, {})
+    cur[parts[-1]] = value
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # BSON-ish ordering: missing/None < numbers < strings < ObjectId < datetimes
+    if value is None or value is _MISSING:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (5, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, ObjectId):
+        return (3, value.binary)
+    if isinstance(value, datetime):
+        return (4, _as_utc(value))
+    return (6, str(value))
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _comparable(a: Any, b: Any) -> Tuple[Any, Any]:
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        return _as_utc(a), _as_utc(b)
+    return a, b
+
+
+# ---------- $text ----------
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> List[str]:
+    # crude stand-in for Mongo's stemmer: fold simple plurals
+    return [t[:-1] if len(t) > 3 and t.endswith("s") else t for t in _TOKEN.findall(text.lower())]
+
+
+def _text_search(filters: Dict[str, Any]) -> str:
+    if "$text" in filters:
+        return filters["$text"]["$search"]
+    for clause in filters.get("$and", []):
+        found = _text_search(clause)
+        if found:
+            return found
+    return ""
+
+
+# ---------- filters ----------
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+}
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict) or not any(k.startswith("$") for k in condition):
+        if condition is None:
+            return value is None or value is _MISSING
+        if isinstance(value, list) and not isinstance(condition, list):
+            return condition in value
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$regex":
+            flags = re.IGNORECASE if "i" in condition.get("$options", "") else 0
+            if not isinstance(value, str) or not re.search(operand, value, flags):
+                return False
+        elif op == "$options":
+            continue
+        elif op in _COMPARISONS:
+            if value is None or value is _MISSING:
+                return False
+            a, b = _comparable(value, operand)
+            try:
+                if not _COMPARISONS[op](a, b):
+                    return False
+            except TypeError:
+                return False
+        elif op == "$eq":
+            if value != operand:
+                return False
+        elif op == "$ne":
+            if value == operand:
+                return False
+        elif op == "$in":
+            if value not in operand:
+                return False
+        elif op == "$nin":
+            if value in operand:
+                return False
+        elif op == "$exists":
+            if (value is not _MISSING) != bool(operand):
+                return False
+        elif op == "$type":
+            if operand == "string" and not isinstance(value, str):
+                return False
+            if operand == "date" and not isinstance(value, datetime):
+                return False
+        else:
+            raise NotImplementedError(f"mongo_standin: unsupported operator {op}")
+    return True
+
+
+Scorer = Callable[[Dict[str, Any], List[str]], float]
+
+
+def match(document: Dict[str, Any], filters: Optional[Dict[str, Any]], scorer: Optional[Scorer] = None) -> bool:
+    if not filters:
+        return True
+    for key, condition in filters.items():
+        if key == "$and":
+            if not all(match(document, clause, scorer) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(match(document, clause, scorer) for clause in condition):
+                return False
+        elif key == "$text":
+            if (scorer or text_score)(document, _tokens(condition["$search"])) <= 0:
+                return False
+        elif not _match_condition(_get(document, key, _MISSING), condition):
+            return False
+    return True
+
+
+def text_score(document: Dict[str, Any], terms: List[str], weights: Optional[Dict[str, int]] = None) -> float:
+    """Uncached scorer for callers outside a collection."""
+    weights = weights or {"title": 1, "content": 1}
+    score = 0.0
+    for field, weight in weights.items():
+        words = _tokens(str(document.get(field) or ""))
+        score += weight * sum(words.count(term) for term in terms)
+    return score
+
+
+# ---------- projection ----------
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]], score: Optional[float] = None) -> Dict[str, Any]:
+    if not projection:
+        return doc
+    metas = {k: v for k, v in projection.items() if isinstance(v, dict) and "$meta" in v}
+    plain = {k: v for k, v in projection.items() if k not in metas}
+    include = {k for k, v in plain.items() if v and k != "_id"}
+    if include:
+        out = {k: doc[k] for k in include if k in doc}
+        if plain.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+    else:
+        out = {k: v for k, v in doc.items() if not (k in plain and not plain[k])}
+    for field in metas:
+        out[field] = score or 0.0
+    return out
+
+
+# ---------- aggregation expressions ----------
+
+
+def _to_date(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, ObjectId):
+        return value.generation_time
+    return None
+
+
+def evaluate(expr: Any, doc: Dict[str, Any]) -> Any:
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(doc, expr[1:])
+    if isinstance(expr, list):
+        return [evaluate(e, doc) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) == 1:
+        op, arg = next(iter(expr.items()))
+        if op == "$toDate":
+            return _to_date(evaluate(arg, doc))
+        if op == "$dateToString":
+            dt = _to_date(evaluate(arg["date"], doc))
+            return _as_utc(dt).strftime(arg.get("format", "%Y-%m-%dT%H:%M:%S.000Z")) if dt else None
+        if op == "$dateTrunc":
+            dt = _to_date(evaluate(arg["date"], doc))
+            unit = arg["unit"]
+            if dt is None:
+                return None
+            dt = _as_utc(dt)
+            if unit == "hour":
+                return dt.replace(minute=0, second=0, microsecond=0)
+            if unit == "day":
+                return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+            raise NotImplementedError(f"mongo_standin: $dateTrunc unit {unit}")
+        if op == "$toLower":
+            value = evaluate(arg, doc)
+            return value.lower() if isinstance(value, str) else ""
+        if op == "$type":
+            value = evaluate(arg, doc)
+            return "date" if isinstance(value, datetime) else "string" if isinstance(value, str) else "missing"
+        if op == "$literal":
+            return arg
+    return {k: evaluate(v, doc) for k, v in expr.items()}
+
+
+def _group(rows: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    groups: Dict[Any, Dict[str, Any]] = {}
+    key_expr = spec["_id"]
+    for row in rows:
+        key = evaluate(key_expr, row)
+        hashable = repr(key)
+        out = groups.get(hashable)
+        if out is None:
+            out = groups[hashable] = {"_id": key}
+        for field, acc in spec.items():
+            if field == "_id":
+                continue
+            op, arg = next(iter(acc.items()))
+            value = evaluate(arg, row)
+            if op == "$sum":
+                out[field] = out.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+            elif op == "$max":
+                if field not in out or (value is not None and _sort_key(value) > _sort_key(out[field])):
+                    out[field] = value
+            elif op == "$min":
+                if field not in out or (value is not None and _sort_key(value) < _sort_key(out[field])):
+                    out[field] = value
+            elif op == "$first":
+                out.setdefault(field, value)
+            elif op == "$push":
+                out.setdefault(field, []).append(value)
+            else:
+                raise NotImplementedError(f"mongo_standin: unsupported accumulator {op}")
+    return list(groups.values())
+
+
+def _sort_rows(rows: List[Dict[str, Any]], keys: Iterable[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    for key, direction in reversed(list(keys)):
+        descending = direction < 0 if isinstance(direction, int) else True  # {"$meta": ...} sorts desc
+        rows.sort(key=lambda row: _sort_key(_get(row, key, None)), reverse=descending)
+    return rows
+
+
+# ---------- cursors ----------
+
+
+class InMemoryCursor:
+    """Sorts/slices the raw matches first and copies only the rows it returns."""
+
+    def __init__(
+        self,
+        items: Any,
+        transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        id_walk: Optional[Callable[[int], Iterator[Dict[str, Any]]]] = None,
+    ):
+        # a list, or a callable producing it once a scan is really needed
+        self._source = items if callable(items) else list(items)
+        self._transform = transform
+        self._id_walk = id_walk
+        self._sort: List[Tuple[str, Any]] = []
+        self._skip = 0
+        self._limit = 0
+        self._iter = None
+        self.batch_size_hint = 0
+
+    def sort(self, key_or_list, direction: int = 1):
+        keys = key_or_list if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        self._sort = list(keys)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int):
+        self.batch_size_hint = size
+        return self
+
+    @property
+    def _items(self) -> List[Dict[str, Any]]:
+        if callable(self._source):
+            self._source = list(self._source())
+        return self._source
+
+    def _materialize(self) -> List[Dict[str, Any]]:
+        if self._id_walk is not None and self._limit > 0 and len(self._sort) == 1 and self._sort[0][0] == "_id":
+            # _id index order: read just the rows returned
+            walk = self._id_walk(self._sort[0][1])
+            items = [row for _, row in zip(range(self._skip + self._limit), walk)]
+        elif len(self._sort) == 1 and self._limit > 0 and isinstance(self._sort[0][1], int):
+            # top-k without sorting the whole match set
+            key, direction = self._sort[0]
+            pick = heapq.nsmallest if direction > 0 else heapq.nlargest
+            items = pick(self._skip + self._limit, self._items, key=lambda row: _sort_key(_get(row, key)))
+        else:
+            items = _sort_rows(self._items, self._sort) if self._sort else self._items
+        items = items[self._skip:]
+        if self._limit > 0:
+            items = items[: self._limit]
+        if self._transform is not None:
+            items = [self._transform(item) for item in items]
+        return items
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        items = self._materialize()
+        return items if length is None else items[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._materialize())
+        return self
+
+    async def __anext__(self):
+        assert self._iter is not None
+        try:
+            return next(self._iter)
+        except StopIteration as exc:  # pragma: no cover - iterator protocol
+            raise StopAsyncIteration from exc
+
+
+class AggregateCursor(InMemoryCursor):
+    pass
+
+
+# ---------- collections ----------
+
+
+class InMemoryCollection:
+    def __init__(self, name: str = "collection", database: Optional["InMemoryDatabase"] = None):
+        self.name = name
+        self.database = database
+        self._data: List[Dict[str, Any]] = []
+        self._by_id: Dict[Any, Dict[str, Any]] = {}
+        # every _id in ascending order, like the _id index; None until rebuilt
+        self._id_order: Optional[List[Any]] = []
+        self._indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)]}}
+        # id(stored doc) -> {field: Counter(tokens)}; keeps $text scoring cheap in benchmarks
+        self._token_cache: Dict[int, Dict[str, Counter]] = {}
+        # token -> _ids whose text fields contain it; built on the first $text query
+        self._postings: Optional[Dict[str, Set[Any]]] = None
+        self.read_preference = None
+
+    # -- helpers --
+
+    @property
+    def _text_weights(self) -> Optional[Dict[str, int]]:
+        for info in self._indexes.values():
+            if any(direction == "text" for _, direction in info["key"]):
+                return info.get("weights") or {field: 1 for field, _ in info["key"]}
+        return None
+
+    def _score(self, doc: Dict[str, Any], terms: List[str]) -> float:
+        weights = self._text_weights or {"title": 1, "content": 1}
+        cached = self._token_cache.setdefault(id(doc), {})
+        score = 0.0
+        for field, weight in weights.items():
+            counts = cached.get(field)
+            if counts is None:
+                counts = cached[field] = Counter(_tokens(str(doc.get(field) or "")))
+            score += weight * sum(counts[t] for t in terms)
+        return score
+
+    def _text_fields(self) -> List[str]:
+        return list(self._text_weights or {"title": 1, "content": 1})
+
+    def _post(self, doc: Dict[str, Any]) -> None:
+        assert self._postings is not None
+        for field in self._text_fields():
+            for token in _tokens(str(doc.get(field) or "")):
+                self._postings.setdefault(token, set()).add(doc["_id"])
+
+    def _forget_text(self, doc: Optional[Dict[str, Any]] = None) -> None:
+        """A document's text changed or left (or the text index did): drop derived token data."""
+        if doc is None:
+            self._token_cache.clear()
+        else:
+            self._token_cache.pop(id(doc), None)
+        self._postings = None
+
+    def _text_candidates(self, terms: List[str]) -> List[Dict[str, Any]]:
+        """Documents holding any of ``terms``, in ``_id`` order."""
+        if self._postings is None:
+            self._postings = {}
+            for doc in self._data:
+                self._post(doc)
+        ids: Set[Any] = set()
+        for term in terms:
+            ids |= self._postings.get(term, set())
+        try:
+            return [self._by_id[i] for i in sorted(ids)]
+        except TypeError:  # mixed _id types
+            return [doc for doc in self._data if doc["_id"] in ids]
+
+    def _store(self, document: Dict[str, Any]) -> Any:
+        document.setdefault("_id", ObjectId())
+        if document["_id"] in self._by_id:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_", 11000)
+        stored = copy.deepcopy(document)
+        self._data.append(stored)
+        self._by_id[stored["_id"]] = stored
+        order = self._id_order
+        if order is not None:
+            try:
+                if not order or stored["_id"] > order[-1]:
+                    order.append(stored["_id"])
+                else:
+                    bisect.insort(order, stored["_id"])
+            except TypeError:  # mixed _id types: no index order, scan instead
+                self._id_order = None
+        if self._postings is not None:
+            self._post(stored)
+        return document["_id"]
+
+    def _sorted_ids(self) -> Optional[List[Any]]:
+        if self._id_order is None:
+            try:
+                self._id_order = sorted(self._by_id)
+            except TypeError:
+                return None
+        return self._id_order
+
+    def _walk_ids(self, filters: Dict[str, Any]) -> Optional[Callable[[int], Iterator[Dict[str, Any]]]]:
+        """An ``_id``-order walk when ``filters`` is at most an ``_id`` range, else None."""
+        bounds = filters.get("_id", {}) if set(filters) <= {"_id"} else None
+        if not isinstance(bounds, dict) or not set(bounds) <= {"$lt", "$lte", "$gt", "$gte"}:
+            return None
+        if self._sorted_ids() is None:
+            return None
+
+        def walk(direction: int) -> Iterator[Dict[str, Any]]:
+            order = self._sorted_ids() or []
+            lo, hi = 0, len(order)
+            for op, value in bounds.items():
+                if op in ("$gt", "$gte"):
+                    lo = max(lo, (bisect.bisect_right if op == "$gt" else bisect.bisect_left)(order, value))
+                else:
+                    hi = min(hi, (bisect.bisect_left if op == "$lt" else bisect.bisect_right)(order, value))
+            for i in (range(hi - 1, lo - 1, -1) if direction < 0 else range(lo, hi)):
+                yield self._by_id[order[i]]
+
+        return walk
+
+    def _matching(self, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        identifier = (filters or {}).get("_id")
+        if identifier is not None and not isinstance(identifier, dict) and len(filters) == 1:
+            found = self._by_id.get(identifier)
+            return [found] if found is not None else []
+        if filters and "$text" in filters:
+            terms = _tokens(filters["$text"]["$search"])
+            return [doc for doc in self._text_candidates(terms) if match(doc, filters, self._score)]
+        return [doc for doc in self._data if match(doc, filters, self._score)]
+
+    def with_options(self, **kwargs: Any) -> "InMemoryCollection":
+        # one shared dataset; read preferences are recorded but have no effect
+        self.read_preference = kwargs.get("read_preference", self.read_preference)
+        return self
+
+    # -- reads --
+
+    def find(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 0,
+        **_kwargs: Any,
+    ) -> InMemoryCursor:
+        terms = _tokens(_text_search(filters or {}))
+        if terms:
+            docs = self._matching(filters)
+            # the score is needed for sorting, so text queries project eagerly
+            # the score must be visible to sort(); copy deeply only the rows returned
+            meta = [k for k, v in (projection or {}).items() if isinstance(v, dict) and "$meta" in v]
+            scored = [{**doc, **{k: self._score(doc, terms) for k in meta}} for doc in docs]
+            cursor = InMemoryCursor(scored, lambda doc: _project(copy.deepcopy(doc), projection, doc.get(meta[0]) if meta else None))
+        else:
+            cursor = InMemoryCursor(
+                lambda: self._matching(filters),
+                lambda doc: _project(copy.deepcopy(doc), projection),
+                self._walk_ids(filters or {}),
+            )
+        cursor.batch_size_hint = batch_size
+        return cursor
+
+    async def find_one(self, filters: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        cursor = self.find(filters, projection)
+        if "sort" in kwargs and kwargs["sort"]:
+            cursor.sort(kwargs["sort"])
+        items = await cursor.limit(1).to_list()
+        return items[0] if items else None
+
+    async def count_documents(self, filters: Optional[Dict[str, Any]] = None, **_kwargs: Any) -> int:
+        return len(self._matching(filters))
+
+    async def estimated_document_count(self, **_kwargs: Any) -> int:
+        return len(self._data)
+
+    async def distinct(self, key: str, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        seen: List[Any] = []
+        for doc in self._matching(filters):
+            value = _get(doc, key)
+            if value is not None and value not in seen:
+                seen.append(value)
+        return seen
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **_kwargs: Any) -> AggregateCursor:
+        rows = list(self._data)
+        for stage in pipeline:
+            op, spec = next(iter(stage.items()))
+            if op == "$match":
+                rows = [row for row in rows if match(row, spec, self._score)]
+            elif op == "$group":
+                rows = _group(rows, spec)
+            elif op == "$sort":
+                rows = _sort_rows(rows, list(spec.items()))
+            elif op == "$limit":
+                rows = rows[:spec]
+            elif op == "$skip":
+                rows = rows[spec:]
+            elif op == "$project":
+                rows = [
+                    {k: (evaluate(v, row) if not isinstance(v, (int, bool)) else _get(row, k)) for k, v in spec.items() if v}
+                    | ({"_id": row.get("_id")} if spec.get("_id", 1) and "_id" not in spec else {})
+                    for row in rows
+                ]
+            elif op == "$unwind":
+                path = spec if isinstance(spec, str) else spec["path"]
+                field = path[1:]
+                rows = [{**row, field: item} for row in rows for item in (_get(row, field) or [])]
+            elif op == "$count":
+                rows = [{spec: len(rows)}]
+            else:
+                raise NotImplementedError(f"mongo_standin: unsupported stage {op}")
+        return AggregateCursor(rows, copy.deepcopy)
+
+    # -- writes --
+
+    async def insert_one(self, document: Dict[str, Any], **_kwargs: Any) -> InsertOneResult:
+        # like pymongo, stamp the generated _id onto the caller's document
+        return InsertOneResult(self._store(document))
+
+    async def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True, **_kwargs: Any) -> InsertManyResult:
+        ids: List[Any] = []
+        errors: List[Dict[str, Any]] = []
+        for index, document in enumerate(documents):
+            try:
+                ids.append(self._store(document))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(ids)})
+        return InsertManyResult(ids)
+
+    def _apply_update(self, doc: Dict[str, Any], update: Dict[str, Any], inserting: bool) -> None:
+        self._forget_text(doc)
+        for op, fields in update.items():
+            if op == "$set":
+                for k, v in fields.items():
+                    _set(doc, k, copy.deepcopy(v))
+            elif op == "$setOnInsert":
+                if inserting:
+                    for k, v in fields.items():
+                        _set(doc, k, copy.deepcopy(v))
+            elif op == "$inc":
+                for k, v in fields.items():
+                    _set(doc, k, (_get(doc, k) or 0) + v)
+            elif op == "$max":
+                for k, v in fields.items():
+                    cur = _get(doc, k)
+                    if cur is None or _sort_key(v) > _sort_key(cur):
+                        _set(doc, k, v)
+            elif op == "$min":
+                for k, v in fields.items():
+                    cur = _get(doc, k)
+                    if cur is None or _sort_key(v) < _sort_key(cur):
+                        _set(doc, k, v)
+            elif op == "$push":
+                for k, v in fields.items():
+                    arr = _get(doc, k) or []
+                    if isinstance(v, dict) and "$each" in v:
+                        arr.extend(copy.deepcopy(v["$each"]))
+                        if "$slice" in v:
+                            s = v["$slice"]
+                            arr = arr[s:] if s < 0 else arr[:s]
+                    else:
+                        arr.append(copy.deepcopy(v))
+                    _set(doc, k, arr)
+            elif op == "$unset":
+                for k in fields:
+                    doc.pop(k, None)
+            else:
+                raise NotImplementedError(f"mongo_standin: unsupported update operator {op}")
+
+    def _upsert_seed(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: copy.deepcopy(v) for k, v in filters.items() if not k.startswith("$") and not isinstance(v, dict)}
+
+    async def update_one(self, filters: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, **_kwargs: Any) -> UpdateResult:
+        found = self._matching(filters)
+        if found:
+            self._apply_update(found[0], update, inserting=False)
+            return UpdateResult(1, 1)
+        if not upsert:
+            return UpdateResult(0, 0)
+        doc = self._upsert_seed(filters)
+        self._apply_update(doc, update, inserting=True)
+        return UpdateResult(0, 0, self._store(doc))
+
+    async def update_many(self, filters: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, **_kwargs: Any) -> UpdateResult:
+        found = self._matching(filters)
+        for doc in found:
+            self._apply_update(doc, update, inserting=False)
+        if not found and upsert:
+            return await self.update_one(filters, update, upsert=True)
+        return UpdateResult(len(found), len(found))
+
+    async def replace_one(self, filters: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False, **_kwargs: Any) -> UpdateResult:
+        found = self._matching(filters)
+        if found:
+            target = found[0]
+            self._forget_text(target)
+            keep_id = target["_id"]
+            target.clear()
+            target.update(copy.deepcopy(replacement))
+            target["_id"] = keep_id
+            return UpdateResult(1, 1)
+        if not upsert:
+            return UpdateResult(0, 0)
+        doc = {**self._upsert_seed(filters), **copy.deepcopy(replacement)}
+        return UpdateResult(0, 0, self._store(doc))
+
+    async def delete_one(self, filters: Dict[str, Any], **_kwargs: Any) -> DeleteResult:
+        found = self._matching(filters)
+        if not found:
+            return DeleteResult(0)
+        self._remove([found[0]])
+        return DeleteResult(1)
+
+    async def delete_many(self, filters: Optional[Dict[str, Any]] = None, **_kwargs: Any) -> DeleteResult:
+        found = self._matching(filters) if filters else list(self._data)
+        self._remove(found)
+        return DeleteResult(len(found))
+
+    def _remove(self, docs: List[Dict[str, Any]]) -> None:
+        ids = {id(doc) for doc in docs}
+        self._data = [doc for doc in self._data if id(doc) not in ids]
+        self._id_order = None
+        for doc in docs:
+            self._by_id.pop(doc.get("_id"), None)
+            self._forget_text(doc)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **_kwargs: Any) -> BulkWriteResult:
+        inserted = matched = modified = deleted = 0
+        upserted: Dict[int, Any] = {}
+        for index, req in enumerate(requests):
+            doc = getattr(req, "_doc", None)
+            flt = getattr(req, "_filter", None)
+            upsert = bool(getattr(req, "_upsert", False))
+            if isinstance(req, InsertOne):
+                await self.insert_one(doc)
+                inserted += 1
+            elif isinstance(req, (UpdateOne, UpdateMany)):
+                fn = self.update_one if isinstance(req, UpdateOne) else self.update_many
+                result = await fn(flt, doc, upsert=upsert)
+                matched += result.matched_count
+                modified += result.modified_count
+                if result.upserted_id is not None:
+                    upserted[index] = result.upserted_id
+            elif isinstance(req, ReplaceOne):
+                result = await self.replace_one(flt, doc, upsert=upsert)
+                matched += result.matched_count
+                if result.upserted_id is not None:
+                    upserted[index] = result.upserted_id
+            elif isinstance(req, (DeleteOne, DeleteMany)):
+                fn = self.delete_one if isinstance(req, DeleteOne) else self.delete_many
+                deleted += (await fn(flt)).deleted_count
+            else:
+                raise NotImplementedError(f"mongo_standin: unsupported bulk op {type(req).__name__}")
+        return BulkWriteResult(inserted, matched, modified, deleted, upserted)
+
+    # -- indexes --
+
+    async def create_index(self, keys, name: Optional[str] = None, **options: Any) -> str:
+        key_list = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = name or "_".join(f"{k}_{d}" for k, d in key_list)
+        self._indexes[name] = {"key": key_list, **options}
+        self._forget_text()
+        return name
+
+    async def index_information(self) -> Dict[str, Dict[str, Any]]:
+        return copy.deepcopy(self._indexes)
+
+    async def drop_index(self, name: str) -> None:
+        self._indexes.pop(name, None)
+        self._forget_text()
+
+    def explain_find(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """A queryPlanner-shaped plan for ``find``.
+
+        ``$text`` uses the text index. Otherwise an index qualifies when its
+        leading keys are equality-filtered fields, optionally followed by the
+        sort key (no blocking SORT) or a range-filtered field; with none, the
+        plan is a collection scan.
+        """
+        filters = spec.get("filter") or {}
+        sort = list((spec.get("sort") or {}).items())
+        plan: Dict[str, Any]
+        text_index = next((n for n, i in self._indexes.items() if any(d == "text" for _, d in i["key"])), None)
+        if "$text" in filters and text_index:
+            plan = {"stage": "TEXT_MATCH", "inputStage": {"stage": "IXSCAN", "indexName": text_index}}
+            return {"stage": "SORT", "inputStage": plan} if sort else plan
+        fields = {k for k in filters if not k.startswith("$")}
+        equality = {k for k in fields if not isinstance(filters[k], dict)}
+        best: Optional[Tuple[Tuple[bool, int], str, bool]] = None
+        for name, info in self._indexes.items():
+            keys = [k for k, _ in info["key"]]
+            if any(d == "text" for _, d in info["key"]):
+                continue
+            i = 0
+            while i < len(keys) and keys[i] in equality:
+                i += 1
+            provides_sort = bool(sort) and i < len(keys) and keys[i] == sort[0][0]
+            if i or provides_sort or keys[0] in fields:
+                rank = (provides_sort or not sort, i)
+                if best is None or rank > best[0]:
+                    best = (rank, name, provides_sort)
+        if best is None:
+            plan = {"stage": "COLLSCAN"}
+            return {"stage": "SORT", "inputStage": plan} if sort else plan
+        plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": best[1]}}
+        return {"stage": "SORT", "inputStage": plan} if sort and not best[2] else plan
+
+    async def rename(self, new_name: str, dropTarget: bool = False, **_kwargs: Any) -> None:
+        db = self.database
+        if db is None or not self._data:
+            raise OperationFailure("source namespace does not exist", 26)
+        target = db[new_name]
+        if target._data and not dropTarget:
+            raise OperationFailure("target namespace exists", 48)
+        # move into the cached target object so handles held elsewhere see the swap
+        target._data, target._by_id, target._indexes = self._data, self._by_id, self._indexes
+        target._id_order, self._id_order = self._id_order, []
+        target._token_cache, target._postings = self._token_cache, self._postings
+        self._data, self._by_id, self._token_cache, self._postings = [], {}, {}, None
+        self._indexes = {"_id_": {"key": [("_id", 1)]}}
+        db._collections.pop(self.name, None)
+
+    async def drop(self) -> None:
+        self._data.clear()
+        self._by_id.clear()
+        self._id_order = []
+        self._forget_text()
+        self._indexes = {"_id_": {"key": [("_id", 1)]}}
+
+
+# ---------- database / client ----------
+
+
+class InMemoryDatabase:
+    def __init__(self, name: str = "animoassign"):
+        self.name = name
+        self._collections: Dict[str, InMemoryCollection] = {}
+        self.commands: List[Dict[str, Any]] = []
+        self.read_preference: Any = None
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        coll = self._collections.get(name)
+        if coll is None:
+            coll = self._collections[name] = InMemoryCollection(name, self)
+        return coll
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def with_options(self, **kwargs: Any) -> "InMemoryDatabase":
+        # same dataset; the read preference is recorded for assertions only
+        self.read_preference = kwargs.get("read_preference", self.read_preference)
+        return self
+
+    def get_collection(self, name: str, **kwargs: Any) -> InMemoryCollection:
+        return self[name].with_options(**kwargs) if kwargs else self[name]
+
+    async def expire_ttl(self, now: Optional[datetime] = None) -> int:
+        """One pass of mongod's TTL monitor: delete documents past their index's expiry."""
+        now = now or datetime.now(timezone.utc)
+        removed = 0
+        for coll in self._collections.values():
+            for index in coll._indexes.values():
+                ttl = index.get("expireAfterSeconds")
+                if ttl is None or len(index["key"]) != 1:
+                    continue
+                field = index["key"][0][0]
+                removed += (await coll.delete_many({field: {"$lt": now - timedelta(seconds=ttl)}})).deleted_count
+        return removed
+
+    async def list_collection_names(self) -> List[str]:
+        return [name for name, coll in self._collections.items() if coll._data]
+
+    async def command(self, command: Any, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        self.commands.append({"command": command, "args": args, **kwargs})
+        name = command if isinstance(command, str) else next(iter(command))
+        if name in ("ping", "hello", "isMaster"):
+            return {"ok": 1.0}
+        if name == "collMod":
+            index = command["index"]
+            self[command["collMod"]]._indexes[index["name"]]["expireAfterSeconds"] = index["expireAfterSeconds"]
+            return {"ok": 1.0}
+        if name == "explain":
+            target = command["explain"] if isinstance(command, dict) else {}
+            if "find" not in target:
+                return {"ok": 1.0, "queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+            return {"ok": 1.0, "queryPlanner": {"winningPlan": self[target["find"]].explain_find(target)}}
+        return {"ok": 1.0}
+
+
+class InMemoryClient:
+    def __init__(self, database: Optional[InMemoryDatabase] = None):
+        self._default = database or InMemoryDatabase()
+        self.admin = InMemoryDatabase("admin")
+
+    def get_default_database(self, *args: Any, **kwargs: Any) -> InMemoryDatabase:
+        return self._default
+
+    def get_database(self, name: Optional[str] = None, **kwargs: Any) -> InMemoryDatabase:
+        return self._default
+
+    def close(self) -> None:
+        pass